@@ -3,6 +3,33 @@ import numpy as np
 from typing import Dict, Tuple, List, Optional
 from datetime import datetime, timedelta
 import json
+from baseline_engine import BaselineEngine
+from reason_codes import ReasonCodes, ReasonMask, AGRI_NITRATE, AGRI_TURBIDITY, AGRI_DOC, AGRI_OXYGEN
+
+# Eintragsart -> Grund-Code
+RUNOFF_REASON_CODES = {
+    'fertilizer_runoff': ReasonCodes.AGRI_FERTILIZER,
+    'erosion_runoff': ReasonCodes.AGRI_EROSION,
+    'manure_runoff': ReasonCodes.AGRI_MANURE,
+    'pesticide_runoff': ReasonCodes.AGRI_PESTICIDE
+}
+
+# Muster-Indikator -> (Parameterspalte, Schlüssel der gecachten Maske)
+INDICATOR_MASKS = {
+    'nitrate_spike': ('Nitrat', 'nitrate'),
+    'conductivity_increase': ('Leitfähigkeit', 'conductivity'),
+    'turbidity_spike': ('Trübung', 'turbidity'),
+    'doc_spike': ('DOC', 'doc'),
+    'oxygen_depletion': ('Gelöster Sauerstoff', 'oxygen')
+}
+
+# Gefundener Indikator -> Bit im Argument 'indicators'
+INDICATOR_REASON_BITS = {
+    'nitrate': AGRI_NITRATE,
+    'turbidity': AGRI_TURBIDITY,
+    'doc': AGRI_DOC,
+    'oxygen': AGRI_OXYGEN
+}
 
 class QartodFlags:
     """Definiert die standardisierten QARTOD-Flag-Werte."""
@@ -74,7 +101,11 @@ class AgriculturalRunoffDetector:
     
     def detect_agricultural_runoff(self, df: pd.DataFrame, 
                                  weather_data: Optional[pd.DataFrame] = None,
-                                 lookback_hours: int = 72) -> Tuple[pd.Series, pd.Series, Dict]:
+                                 lookback_hours: int = 72,
+                                 as_codes: bool = False,
+                                 baseline_engine: Optional[BaselineEngine] = None,
+                                 weekly_history: Optional[pd.DataFrame] = None,
+                                 analyze_trends: bool = True) -> Tuple[pd.Series, pd.Series, Dict]:
         """
         Hauptmethode zur Erkennung landwirtschaftlicher Einträge.
         
@@ -82,40 +113,40 @@ class AgriculturalRunoffDetector:
             df: DataFrame mit Sensordaten
             weather_data: Optionale Wetterdaten (Niederschlag)
             lookback_hours: Zeitfenster für Trendanalyse
+            as_codes: Gründe als ReasonMask statt als Texte zurückgeben
+            baseline_engine: Optionale, bereits vorhandene BaselineEngine für `df` (nutzt deren Cache)
+            weekly_history: Optionale Wochenmittel aus dem RollupStore (Index = Wochenbeginn)
+            analyze_trends: Langzeittrends mitberechnen (False, wenn sie nach der Validierung
+                            mit analyze_long_term_trends bestimmt werden)
             
         Returns:
             Tuple[flags, reasons, analysis_details]
         """
         flags = pd.Series(QartodFlags.GOOD, index=df.index)
-        reasons = pd.Series("", index=df.index)
+        reasons = ReasonMask(df.index)
         analysis_details = {'detected_events': [], 'risk_indicators': {}}
         
         # 1. Berechne Baseline und Trends
-        baselines = self._calculate_baselines(df, lookback_hours)
+        baselines = self._calculate_baselines(df, lookback_hours, baseline_engine)
         
         # 2. Erkenne Niederschlagsereignisse (falls Wetterdaten vorhanden)
         rain_events = self._identify_rain_events(weather_data) if weather_data is not None else []
         
-        # 3. Analysiere verschiedene Eintragstypen
+        # 3. Spike- und Zehrungsmasken einmal pro Lauf berechnen (für alle Muster gemeinsam)
+        indicator_masks = self._calculate_indicator_masks(df, baselines)
+        
+        # 4. Analysiere verschiedene Eintragstypen
         for runoff_type, pattern in self.runoff_patterns.items():
             detection_result = self._detect_runoff_pattern(
-                df, baselines, pattern, rain_events, runoff_type
+                df, baselines, pattern, rain_events, runoff_type, indicator_masks
             )
             
             if detection_result['detected']:
                 # Aktualisiere Flags und Gründe
-                affected_indices = detection_result['affected_indices']
-                # Konvertiere Integer-Indizes zu DateTime-Indizes
-                if affected_indices:
-                    datetime_indices = df.index[affected_indices]
-                    flags.loc[datetime_indices] = QartodFlags.SUSPECT
-                    
-                    for idx, dt_idx in zip(affected_indices, datetime_indices):
-                        reason = detection_result['reasons'].get(idx, '')
-                        if reasons.loc[dt_idx]:
-                            reasons.loc[dt_idx] += f"; {reason}"
-                        else:
-                            reasons.loc[dt_idx] = reason
+                affected = detection_result['affected']
+                if affected.any():
+                    flags[affected] = QartodFlags.SUSPECT
+                    reasons.add(affected, RUNOFF_REASON_CODES[runoff_type], **detection_result['reason_args'])
                 
                 # Sammle Details für Bericht
                 analysis_details['detected_events'].append({
@@ -126,89 +157,66 @@ class AgriculturalRunoffDetector:
                     'affected_parameters': detection_result['affected_parameters']
                 })
         
-        # 4. Berechne Gesamtrisikoindikator
+        # 5. Berechne Gesamtrisikoindikator
         analysis_details['risk_indicators'] = self._calculate_risk_indicators(df, baselines)
         
-        # 5. Langzeittrend-Analyse
-        if len(df) > 24 * 7:  # Mindestens eine Woche Daten
-            analysis_details['long_term_trends'] = self._analyze_long_term_trends(df)
+        # 6. Langzeittrend-Analyse
+        if analyze_trends and (len(df) > 24 * 7 or (weekly_history is not None and len(weekly_history) >= 4)):
+            analysis_details['long_term_trends'] = self.analyze_long_term_trends(df, weekly_history)
         
-        return flags, reasons, analysis_details
+        return flags, (reasons if as_codes else reasons.render()), analysis_details
     
-    def _calculate_baselines(self, df: pd.DataFrame, lookback_hours: int) -> Dict[str, pd.Series]:
-        """Berechnet gleitende Baselines für alle Parameter."""
-        baselines = {}
-        
-        for param in df.columns:
-            if 'flag' not in param and 'reason' not in param:
-                # Robuste Baseline mit Median
-                baseline = df[param].rolling(
-                    window=f'{lookback_hours}H',
-                    min_periods=int(lookback_hours * 0.5)
-                ).median()
-                
-                # Fülle erste Werte mit Gesamtmedian
-                baseline.fillna(df[param].median(), inplace=True)
-                baselines[param] = baseline
-        
-        return baselines
+    def _calculate_baselines(self, df: pd.DataFrame, lookback_hours: int,
+                             baseline_engine: Optional[BaselineEngine] = None) -> Dict[str, pd.Series]:
+        """Berechnet gleitende Baselines (robuster Median) für alle Parameter in einem Durchlauf."""
+        if baseline_engine is None:
+            baseline_engine = BaselineEngine(df)
+        return baseline_engine.baselines(lookback_hours, min_periods=int(lookback_hours * 0.5))
+    
+    def _calculate_indicator_masks(self, df: pd.DataFrame, baselines: Dict) -> Dict[str, np.ndarray]:
+        """
+        Berechnet die Indikator-Masken (Spikes, Sauerstoffzehrung) einmal für alle
+        Parameter, die in den Mustern vorkommen. Die Muster kombinieren nur noch
+        diese booleschen Arrays.
+        """
+        masks = {}
+        for indicator, (column, key) in INDICATOR_MASKS.items():
+            if column not in df.columns or key in masks:
+                continue
+            if indicator == 'oxygen_depletion':
+                masks[key] = self._detect_oxygen_depletion(df[column], baselines.get(column))
+            else:
+                threshold_key = 'conductivity_spike' if key == 'conductivity' else indicator
+                masks[key] = self._detect_parameter_spike(
+                    df[column], baselines.get(column), self.thresholds[threshold_key]
+                )
+        return masks
     
     def _detect_runoff_pattern(self, df: pd.DataFrame, baselines: Dict,
                               pattern: Dict, rain_events: List,
-                              runoff_type: str) -> Dict:
+                              runoff_type: str,
+                              indicator_masks: Optional[Dict[str, np.ndarray]] = None) -> Dict:
         """Erkennt spezifische Eintrags-Muster."""
         result = {
             'detected': False,
-            'affected_indices': [],
-            'reasons': {},
+            'affected': np.zeros(len(df), dtype=bool),
+            'reason_args': {},
             'severity': 'low',
             'affected_parameters': [],
             'start_time': None,
             'duration': 0
         }
         
-        indicators_found = {}
+        if indicator_masks is None:
+            indicator_masks = self._calculate_indicator_masks(df, baselines)
         
         # Prüfe jeden Indikator des Musters
+        indicators_found = {}
         for indicator in pattern['indicators']:
-            if indicator == 'nitrate_spike' and 'Nitrat' in df.columns:
-                spike_indices = self._detect_parameter_spike(
-                    df['Nitrat'], baselines.get('Nitrat'),
-                    self.thresholds['nitrate_spike']
-                )
-                if len(spike_indices) > 0:
-                    indicators_found['nitrate'] = spike_indices
-                    
-            elif indicator == 'conductivity_increase' and 'Leitfähigkeit' in df.columns:
-                spike_indices = self._detect_parameter_spike(
-                    df['Leitfähigkeit'], baselines.get('Leitfähigkeit'),
-                    self.thresholds['conductivity_spike']
-                )
-                if len(spike_indices) > 0:
-                    indicators_found['conductivity'] = spike_indices
-                    
-            elif indicator == 'turbidity_spike' and 'Trübung' in df.columns:
-                spike_indices = self._detect_parameter_spike(
-                    df['Trübung'], baselines.get('Trübung'),
-                    self.thresholds['turbidity_spike']
-                )
-                if len(spike_indices) > 0:
-                    indicators_found['turbidity'] = spike_indices
-                    
-            elif indicator == 'doc_spike' and 'DOC' in df.columns:
-                spike_indices = self._detect_parameter_spike(
-                    df['DOC'], baselines.get('DOC'),
-                    self.thresholds['doc_spike']
-                )
-                if len(spike_indices) > 0:
-                    indicators_found['doc'] = spike_indices
-                    
-            elif indicator == 'oxygen_depletion' and 'Gelöster Sauerstoff' in df.columns:
-                depletion_indices = self._detect_oxygen_depletion(
-                    df['Gelöster Sauerstoff'], baselines.get('Gelöster Sauerstoff')
-                )
-                if len(depletion_indices) > 0:
-                    indicators_found['oxygen'] = depletion_indices
+            if indicator in INDICATOR_MASKS:
+                key = INDICATOR_MASKS[indicator][1]
+                if key in indicator_masks and indicator_masks[key].any():
+                    indicators_found[key] = indicator_masks[key]
         
         # Bewerte ob genügend Indikatoren gefunden wurden
         if len(indicators_found) >= 2:  # Mindestens 2 Indikatoren
@@ -216,15 +224,12 @@ class AgriculturalRunoffDetector:
             result['affected_parameters'] = list(indicators_found.keys())
             
             # Finde gemeinsame betroffene Zeitpunkte
-            all_indices = set()
-            for indices in indicators_found.values():
-                all_indices.update(indices)
-            
-            result['affected_indices'] = sorted(list(all_indices))
+            affected = np.logical_or.reduce(list(indicators_found.values()))
+            result['affected'] = affected
+            affected_positions = np.flatnonzero(affected)
             
-            if result['affected_indices']:
-                result['start_time'] = df.index[result['affected_indices'][0]]
-                result['duration'] = len(result['affected_indices'])
+            result['start_time'] = df.index[affected_positions[0]]
+            result['duration'] = len(affected_positions)
             
             # Bewerte Schweregrad
             if len(indicators_found) >= 4:
@@ -234,87 +239,55 @@ class AgriculturalRunoffDetector:
             else:
                 result['severity'] = 'low'
             
-            # Erstelle Begründungen
-            for idx in result['affected_indices']:
-                reasons = []
-                
-                if runoff_type == 'fertilizer_runoff':
-                    reasons.append("Verdacht auf Düngemitteleintrag")
-                elif runoff_type == 'erosion_runoff':
-                    reasons.append("Verdacht auf Erosionseintrag")
-                elif runoff_type == 'manure_runoff':
-                    reasons.append("Verdacht auf Gülleeintrag")
-                elif runoff_type == 'pesticide_runoff':
-                    reasons.append("Verdacht auf Pestizideintrag")
-                
-                # Füge spezifische Parameter hinzu
-                param_changes = []
-                for param, param_indices in indicators_found.items():
-                    if idx in param_indices:
-                        if param == 'nitrate':
-                            value = df.loc[df.index[idx], 'Nitrat']
-                            baseline = baselines['Nitrat'].iloc[idx]
-                            param_changes.append(f"Nitrat ↑{value-baseline:.1f} mg/L")
-                        elif param == 'turbidity':
-                            param_changes.append("Trübung erhöht")
-                        elif param == 'doc':
-                            param_changes.append("DOC erhöht")
-                        elif param == 'oxygen':
-                            param_changes.append("O₂-Zehrung")
-                
-                if param_changes:
-                    reasons.append(f"({', '.join(param_changes)})")
-                
-                # Prüfe Zusammenhang mit Regen
-                if rain_events and self._is_post_rain(df.index[idx], rain_events, pattern['post_rain_delay']):
-                    reasons.append("nach Niederschlag")
-                
-                result['reasons'][idx] = " - ".join(reasons)
+            # Erstelle Begründungsargumente (nur für betroffene Zeitpunkte, Text erst beim Rendern)
+            indicator_bits = np.zeros(len(affected_positions), dtype=int)
+            for param, param_mask in indicators_found.items():
+                if param in INDICATOR_REASON_BITS:
+                    indicator_bits[param_mask[affected_positions]] |= INDICATOR_REASON_BITS[param]
+            
+            nitrate_increase = np.zeros(len(affected_positions))
+            if 'nitrate' in indicators_found:
+                nitrate_increase = (df['Nitrat'].to_numpy(dtype=float)[affected_positions] -
+                                    baselines['Nitrat'].to_numpy(dtype=float)[affected_positions])
+            
+            # Prüfe Zusammenhang mit Regen
+            post_rain = self._is_post_rain(df.index[affected_positions], rain_events, pattern['post_rain_delay'])
+            
+            result['reason_args'] = {
+                'indicators': indicator_bits,
+                'nitrate_increase': nitrate_increase,
+                'post_rain': post_rain
+            }
         
         return result
     
     def _detect_parameter_spike(self, series: pd.Series, baseline: pd.Series,
-                               threshold: Dict) -> List[int]:
-        """Erkennt signifikante Anstiege eines Parameters."""
-        spike_indices = []
+                               threshold: Dict) -> np.ndarray:
+        """Erkennt signifikante Anstiege eines Parameters (boolesche Maske)."""
+        values = series.to_numpy(dtype=float)
+        base = baseline.to_numpy(dtype=float)
         
-        for i in range(len(series)):
-            if pd.isna(series.iloc[i]) or pd.isna(baseline.iloc[i]):
-                continue
-                
-            value = series.iloc[i]
-            base = baseline.iloc[i]
-            
+        with np.errstate(divide='ignore', invalid='ignore'):
             # Absolute und relative Änderung
-            abs_change = value - base
-            rel_change = abs_change / base if base > 0 else 0
+            abs_change = values - base
+            rel_change = np.where(base > 0, abs_change / base, 0.0)
             
-            # Prüfe Schwellenwerte
-            if (abs_change >= threshold['absolute_increase'] or 
-                rel_change >= threshold['relative_increase']):
-                spike_indices.append(i)
-        
-        return spike_indices
+            # Prüfe Schwellenwerte (NaN in Wert oder Baseline ergibt nie einen Spike)
+            return ((abs_change >= threshold['absolute_increase']) |
+                    (rel_change >= threshold['relative_increase'])) & ~np.isnan(abs_change)
     
     def _detect_oxygen_depletion(self, o2_series: pd.Series, 
-                               baseline: pd.Series, threshold: float = 0.3) -> List[int]:
-        """Erkennt Sauerstoffzehrung."""
-        depletion_indices = []
+                               baseline: pd.Series, threshold: float = 0.3) -> np.ndarray:
+        """Erkennt Sauerstoffzehrung (boolesche Maske)."""
+        values = o2_series.to_numpy(dtype=float)
+        base = baseline.to_numpy(dtype=float)
         
-        for i in range(len(o2_series)):
-            if pd.isna(o2_series.iloc[i]) or pd.isna(baseline.iloc[i]):
-                continue
-                
-            value = o2_series.iloc[i]
-            base = baseline.iloc[i]
-            
+        with np.errstate(divide='ignore', invalid='ignore'):
             # Relativer Rückgang
-            if base > 0:
-                rel_decrease = (base - value) / base
-                if rel_decrease >= threshold or value < 4.0:  # < 4 mg/L ist kritisch
-                    depletion_indices.append(i)
+            rel_decrease = (base - values) / base
+            depleted = (rel_decrease >= threshold) | (values < 4.0)  # < 4 mg/L ist kritisch
         
-        return depletion_indices
+        return depleted & (base > 0) & ~np.isnan(values)
     
     def _identify_rain_events(self, weather_data: pd.DataFrame,
                             rain_threshold: float = 5.0) -> List[Dict]:
@@ -340,14 +313,14 @@ class AgriculturalRunoffDetector:
         
         return rain_events
     
-    def _is_post_rain(self, timestamp: pd.Timestamp, rain_events: List[Dict],
-                     delay_hours: int) -> bool:
-        """Prüft ob ein Zeitpunkt kurz nach einem Regenereignis liegt."""
+    def _is_post_rain(self, timestamps: pd.DatetimeIndex, rain_events: List[Dict],
+                     delay_hours: int) -> np.ndarray:
+        """Prüft für jeden Zeitpunkt, ob er kurz nach einem Regenereignis liegt."""
+        post_rain = np.zeros(len(timestamps), dtype=bool)
         for event in rain_events:
-            time_since_rain = (timestamp - event['end']).total_seconds() / 3600
-            if 0 <= time_since_rain <= delay_hours + 12:  # Toleranz von 12h
-                return True
-        return False
+            time_since_rain = (timestamps - event['end']).total_seconds() / 3600
+            post_rain |= np.asarray((0 <= time_since_rain) & (time_since_rain <= delay_hours + 12))  # Toleranz von 12h
+        return post_rain
     
     def _calculate_risk_indicators(self, df: pd.DataFrame, 
                                  baselines: Dict[str, pd.Series]) -> Dict[str, float]:
@@ -369,7 +342,7 @@ class AgriculturalRunoffDetector:
                     df[param], baselines[param],
                     {'relative_increase': 0.2, 'absolute_increase': 0}
                 )
-                spike_count += len(spikes)
+                spike_count += int(spikes.sum())
         
         indicators['runoff_frequency_index'] = min(100, (spike_count / len(df)) * 1000)
         
@@ -395,9 +368,21 @@ class AgriculturalRunoffDetector:
         
         return indicators
     
-    def _analyze_long_term_trends(self, df: pd.DataFrame) -> Dict[str, Dict]:
-        """Analysiert Langzeittrends die auf chronische Belastung hindeuten."""
+    def analyze_long_term_trends(self, df: pd.DataFrame,
+                                 weekly_history: Optional[pd.DataFrame] = None) -> Dict[str, Dict]:
+        """
+        Analysiert Langzeittrends die auf chronische Belastung hindeuten.
+
+        Mit `weekly_history` (Wochenmittel der Rollups, die die Stunden von `df` bereits
+        enthalten) werden gespeicherte Wochen unverändert übernommen; aus den Stundenwerten
+        kommen nur Wochen hinzu, die dort fehlen. Enthält `df` Flag-Spalten
+        (flag_<Parameter>), gehen wie in den Rollups nur GOOD-Werte ein.
+        Die Steigung bezieht sich auf Wochen (x = Abstand zur ersten Woche), Lücken in
+        der Historie verkürzen die Zeitachse also nicht.
+        """
         trends = {}
+        if weekly_history is not None:
+            week_starts = df.index.normalize() - pd.to_timedelta(df.index.weekday, unit='D')
         
         # Analysiere wichtige Parameter
         trend_params = ['Nitrat', 'DOC', 'Leitfähigkeit', 'Chl-a', 'pH']
@@ -406,14 +391,23 @@ class AgriculturalRunoffDetector:
             if param not in df.columns:
                 continue
                 
-            # Berechne Wochenmittelwerte
-            weekly_means = df[param].resample('W').mean()
+            # Berechne Wochenmittelwerte (mit Flags nur GOOD-Werte)
+            values = df[param]
+            if f'flag_{param}' in df.columns:
+                values = values.where(df[f'flag_{param}'] == QartodFlags.GOOD)
+            if weekly_history is not None:
+                current = values.groupby(week_starts).mean()
+                history = weekly_history[param].dropna() if param in weekly_history.columns else pd.Series(dtype=float)
+                # Eine gespeicherte Woche umfasst mehr als die Stunden dieses Laufs
+                weekly_means = pd.concat([history, current[~current.index.isin(history.index)]]).sort_index()
+            else:
+                weekly_means = values.resample('W').mean()
             
             if len(weekly_means) < 4:  # Mindestens 4 Wochen
                 continue
             
-            # Linearer Trend
-            x = np.arange(len(weekly_means))
+            # Linearer Trend über den Abstand in Wochen
+            x = np.asarray((weekly_means.index - weekly_means.index[0]) / pd.Timedelta(weeks=1), dtype=float)
             y = weekly_means.values
             
             # Entferne NaN-Werte
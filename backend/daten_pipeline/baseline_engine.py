@@ -0,0 +1,113 @@
+# baseline_engine.py
+"""
+Robuste gleitende Baselines (Median bzw. Quantil) für alle Parameter einer Station.
+
+Exakter Modus: pandas' rolling().median()/quantile() pflegt intern ein sortiertes
+Fenster (Skiplist, O(log w) pro Schritt) und wird hier einmal für alle Parameter
+gemeinsam über die Zeitachse ausgeführt.
+
+Näherungsmodus: für lange Fenster (14-30 Tage) werden die Werte zuerst in Blöcke
+von `resolution_hours` Stunden zusammengefasst (Blockquantil); das gleitende
+Quantil läuft dann nur über die Blöcke. Jede Messung erhält den Wert des letzten
+vollständig abgeschlossenen Blocks - kein Vorgriff auf spätere Werte. Abweichungen
+zum exakten Modus: das Fenster endet bis zu einen Block vor der Messung, und das
+Quantil der Blockquantile ist nur eine Näherung des Quantils der Einzelwerte.
+
+Berechnete Baselines werden pro (Fenster, min_periods, Quantil) im Engine-Objekt
+gespeichert; wiederholte Aufrufe mit derselben Engine rechnen nicht erneut.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple
+
+
+class BaselineEngine:
+    """
+    Berechnet und cached gleitende Baselines für einen DataFrame mit Zeitindex.
+    """
+
+    def __init__(self, df: pd.DataFrame, approximate: bool = False, resolution_hours: int = 6):
+        """
+        Args:
+            df: DataFrame mit Sensordaten (DatetimeIndex)
+            approximate: Näherungsmodus über Blockquantile verwenden
+            resolution_hours: Blockgröße im Näherungsmodus
+        """
+        self.df = df
+        self.approximate = approximate
+        self.resolution_hours = resolution_hours
+        self.columns = [col for col in df.columns
+                        if 'flag' not in col and 'reason' not in col
+                        and pd.api.types.is_numeric_dtype(df[col])]
+        self._cache: Dict[Tuple[int, Optional[int], float], pd.DataFrame] = {}
+
+    def baselines(self, lookback_hours: int, min_periods: Optional[int] = None,
+                  quantile: float = 0.5, fill_with_median: bool = True) -> Dict[str, pd.Series]:
+        """
+        Gleitende Baseline (Standard: Median) über die letzten `lookback_hours` Stunden.
+
+        Args:
+            lookback_hours: Fensterlänge in Stunden
+            min_periods: Mindestanzahl an Werten im Fenster (Standard: halbe Fensterlänge)
+            quantile: 0.5 = Median, sonst beliebiges Quantil
+            fill_with_median: Anfangswerte ohne ausreichendes Fenster mit dem Gesamtmedian füllen
+
+        Returns:
+            Dict[str, pd.Series]: Baseline pro Parameter
+        """
+        if min_periods is None:
+            min_periods = int(lookback_hours * 0.5)
+
+        key = (lookback_hours, min_periods, quantile)
+        if key not in self._cache:
+            if self.approximate:
+                self._cache[key] = self._approximate_baselines(lookback_hours, min_periods, quantile)
+            else:
+                self._cache[key] = self._exact_baselines(lookback_hours, min_periods, quantile)
+
+        result = self._cache[key]
+        if fill_with_median:
+            # Fülle erste Werte mit Gesamtmedian
+            result = result.fillna(self.df[self.columns].median())
+        return {col: result[col] for col in self.columns}
+
+    def _exact_baselines(self, lookback_hours: int, min_periods: int, quantile: float) -> pd.DataFrame:
+        """Exaktes gleitendes Quantil über alle Parameter in einem Durchlauf."""
+        rolling = self.df[self.columns].rolling(window=pd.Timedelta(hours=lookback_hours), min_periods=min_periods)
+        if quantile == 0.5:
+            return rolling.median()
+        return rolling.quantile(quantile)
+
+    def _approximate_baselines(self, lookback_hours: int, min_periods: int, quantile: float) -> pd.DataFrame:
+        """Gleitendes Quantil über Blockquantile (Block = `resolution_hours` Stunden)."""
+        data = self.df[self.columns]
+        resolution = pd.Timedelta(hours=self.resolution_hours)
+
+        blocks = data.resample(resolution)
+        block_values = blocks.median() if quantile == 0.5 else blocks.quantile(quantile)
+        block_counts = blocks.count()
+
+        window_blocks = max(1, int(np.ceil(lookback_hours / self.resolution_hours)))
+        rolling_values = block_values.rolling(window=window_blocks, min_periods=1)
+        rolling_values = rolling_values.median() if quantile == 0.5 else rolling_values.quantile(quantile)
+        enough_values = block_counts.rolling(window=window_blocks, min_periods=1).sum() >= min_periods
+        rolling_values = rolling_values.where(enough_values)
+
+        # Jede Messung erhält den Wert des letzten Blocks, der zu ihrem Zeitpunkt abgeschlossen
+        # ist; Messungen im ersten Block haben noch keinen (NaN)
+        block_ends = block_values.index + resolution
+        block_positions = block_ends.searchsorted(data.index, side='right') - 1
+        complete = block_positions >= 0
+        result = np.full((len(data), len(self.columns)), np.nan)
+        result[complete] = rolling_values.to_numpy(dtype=float)[block_positions[complete]]
+        return pd.DataFrame(result, index=data.index, columns=self.columns)
+
+
+def calculate_rolling_baselines(df: pd.DataFrame, lookback_hours: int,
+                                min_periods: Optional[int] = None,
+                                approximate: bool = False) -> Dict[str, pd.Series]:
+    """
+    Einfacher Einstieg ohne Engine-Objekt: gleitender Median für alle Parameter.
+    """
+    return BaselineEngine(df, approximate=approximate).baselines(lookback_hours, min_periods)
@@ -0,0 +1,201 @@
+# basic_validation.py
+"""
+Basis-Validierungen (Range, Stuck, Spike) einer Station, wahlweise parallel.
+
+Jedes Paar (Parameter, Test) ist unabhängig. Modi (BASIC_VALIDATION in config_file.py):
+    'serial'     nacheinander im Hauptprozess (Standard)
+    'threads'    Thread-Pool auf denselben Spalten-Arrays (NumPy/pandas geben den GIL teilweise frei)
+    'processes'  Prozess-Pool über multiprocessing.shared_memory: Messwert-Matrix, Zeitstempel,
+                 Flags und Grund-Bits liegen in gemeinsamen Blöcken; pro Aufgabe werden nur
+                 Namen/Regeln übergeben und nur die (kleinen) Grund-Argumente zurückgegeben.
+
+Die Gründe werden in jedem Modus in derselben Reihenfolge wie im seriellen Lauf
+zusammengeführt; Flags und Gründe sind daher identisch.
+"""
+
+import os
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+from config_file import BASIC_VALIDATION
+from flag_matrix import FlagMatrix
+from reason_codes import ReasonMask
+from validator import WaterQualityValidator
+from stuck_value_validator import check_stuck_values, get_stuck_rule
+from spike_validator import check_spikes
+
+BASIC_TESTS = ['range', 'stuck', 'spike']
+
+
+def basic_validation_tasks(parameters: List[str], validation_rules: Dict, stuck_rules: Dict,
+                           spike_rules: Dict) -> List[Tuple[str, str, Dict]]:
+    """
+    Aufgaben (Test, Parameter, Regel) in der Reihenfolge des seriellen Laufs.
+    Stuck läuft für jeden Parameter (Standardregel), Range und Spike nur mit Regel.
+    """
+    tasks = []
+    for param_name in parameters:
+        if param_name in validation_rules:
+            tasks.append(('range', param_name, validation_rules[param_name]))
+        tasks.append(('stuck', param_name, get_stuck_rule(stuck_rules, param_name)))
+        if param_name in spike_rules:
+            tasks.append(('spike', param_name, {'max_change': spike_rules[param_name]}))
+    return tasks
+
+
+def run_basic_test(test: str, series: pd.Series, rule: Dict, seasonal_rules: Dict):
+    """Führt einen Basis-Test für eine Zeitreihe aus und gibt (Flags, ReasonMask) zurück."""
+    if test == 'range':
+        return WaterQualityValidator().validate_range(
+            series, rule['min'], rule['max'],
+            param_name=series.name, seasonal_rules=seasonal_rules, as_codes=True
+        )
+    if test == 'stuck':
+        return check_stuck_values(
+            series,
+            tolerance=rule['suspect_threshold'],
+            epsilon=rule['epsilon'],
+            fail_threshold=rule['fail_threshold'],
+            as_codes=True
+        )
+    if test == 'spike':
+        return check_spikes(series, max_rate_of_change=rule['max_change'], as_codes=True)
+    raise ValueError(f"Unbekannter Basis-Test: {test}")
+
+
+def resolve_mode(n_rows: int, n_parameters: int, mode: Optional[str] = None) -> str:
+    """
+    Wählt den Ausführungsmodus. Kleine Stationen (unter 'min_values' Messwerten) laufen
+    seriell, weil sich der Pool nicht lohnt; innerhalb eines Pool-Prozesses
+    (main_pipeline.py --workers) werden keine weiteren Prozesse gestartet.
+    """
+    mode = mode or BASIC_VALIDATION['mode']
+    if mode not in ('serial', 'threads', 'processes'):
+        raise ValueError(f"Unbekannter Modus für die Basis-Validierung: {mode}")
+    if mode != 'serial' and n_rows * n_parameters < BASIC_VALIDATION['min_values']:
+        return 'serial'
+    if mode == 'processes' and multiprocessing.parent_process() is not None:
+        return 'threads'
+    return mode
+
+
+def run_basic_validation(processed_data: pd.DataFrame, flag_matrix: FlagMatrix, validation_rules: Dict,
+                         seasonal_rules: Dict, stuck_rules: Dict, spike_rules: Dict,
+                         mode: Optional[str] = None, max_workers: Optional[int] = None) -> str:
+    """
+    Führt alle Basis-Tests einer Station aus und schreibt sie in die Flag-Matrix.
+
+    Returns:
+        str: tatsächlich verwendeter Modus
+    """
+    tasks = basic_validation_tasks(list(processed_data.columns), validation_rules, stuck_rules, spike_rules)
+    mode = resolve_mode(len(processed_data), len(processed_data.columns), mode)
+    if mode == 'processes' and not isinstance(processed_data.index, pd.DatetimeIndex):
+        mode = 'threads'
+    if not tasks:
+        return mode
+    max_workers = max_workers or BASIC_VALIDATION['max_workers'] or os.cpu_count()
+
+    if mode == 'serial':
+        for test, param_name, rule in tasks:
+            flags, reasons = run_basic_test(test, processed_data[param_name], rule, seasonal_rules)
+            flag_matrix.set(test, param_name, flags, reasons)
+    elif mode == 'threads':
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(run_basic_test, test, processed_data[param_name], rule, seasonal_rules)
+                       for test, param_name, rule in tasks]
+            # Zusammenführen in Aufgabenreihenfolge (Gründe werden pro Parameter kombiniert)
+            for (test, param_name, _), future in zip(tasks, futures):
+                flags, reasons = future.result()
+                flag_matrix.set(test, param_name, flags, reasons)
+    else:
+        _run_in_processes(processed_data, flag_matrix, tasks, seasonal_rules, max_workers)
+    return mode
+
+
+# --- Prozess-Modus (shared memory) ---
+
+def _shared_array(shape, dtype) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Legt einen gemeinsamen Speicherblock an und gibt ihn samt Array-Sicht zurück."""
+    dtype = np.dtype(dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _process_context():
+    """
+    Startmethode des Pools: die Basis-Validierung läuft in einem Thread des Ablaufgraphen
+    (pipeline_graph.py), und fork aus einem Prozess mit mehreren Threads ist unsicher.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+# Sichten eines Pool-Prozesses auf die gemeinsamen Blöcke (gesetzt von _init_process)
+_SHARED = {}
+
+
+def _init_process(layout: Dict, parameters: List[str], seasonal_rules: Dict):
+    """
+    Öffnet die gemeinsamen Blöcke einmal pro Pool-Prozess. Freigegeben (unlink) werden sie
+    nur vom Hauptprozess; Pool-Prozesse teilen dessen resource_tracker.
+    """
+    blocks = {key: shared_memory.SharedMemory(name=name) for key, (name, _, _) in layout.items()}
+    arrays = {key: np.ndarray(shape, dtype=dtype, buffer=blocks[key].buf)
+              for key, (_, shape, dtype) in layout.items()}
+    _SHARED.update(blocks=blocks, arrays=arrays, index=pd.DatetimeIndex(arrays['index']),
+                   param_pos={param: i for i, param in enumerate(parameters)},
+                   seasonal_rules=seasonal_rules)
+
+
+def _run_shared_task(task_pos: int, test: str, param_name: str, rule: Dict) -> Dict:
+    """
+    Führt eine Aufgabe auf den gemeinsamen Blöcken aus. Flags und Grund-Bits werden in
+    die Zeile `task_pos` geschrieben; zurück kommen nur die Argumente der gesetzten Zeilen.
+    """
+    arrays = _SHARED['arrays']
+    series = pd.Series(arrays['values'][_SHARED['param_pos'][param_name]], index=_SHARED['index'],
+                       name=param_name, copy=False)
+    flags, reasons = run_basic_test(test, series, rule, _SHARED['seasonal_rules'])
+    arrays['flags'][task_pos] = np.asarray(flags, dtype=np.int8)
+    arrays['bits'][task_pos] = reasons.bits
+    return {code: {name: value if np.ndim(value) == 0 else value[reasons.has(code)]
+                   for name, value in code_args.items()}
+            for code, code_args in reasons.args.items()}
+
+
+def _run_in_processes(processed_data: pd.DataFrame, flag_matrix: FlagMatrix, tasks: List[Tuple[str, str, Dict]],
+                      seasonal_rules: Dict, max_workers: int):
+    """Verteilt die Aufgaben auf einen Prozess-Pool; die Daten liegen in shared memory."""
+    parameters = list(processed_data.columns)
+    n_rows = len(processed_data)
+    index = np.asarray(processed_data.index)
+    blocks, arrays = {}, {}
+    try:
+        for key, shape, dtype in [('values', (len(parameters), n_rows), np.float64),
+                                  ('index', index.shape, index.dtype),
+                                  ('flags', (len(tasks), n_rows), np.int8),
+                                  ('bits', (len(tasks), n_rows), np.uint64)]:
+            blocks[key], arrays[key] = _shared_array(shape, dtype)
+        arrays['values'][:] = processed_data.to_numpy(dtype=np.float64).T
+        arrays['index'][:] = index
+        layout = {key: (blocks[key].name, array.shape, array.dtype.str) for key, array in arrays.items()}
+
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks)), mp_context=_process_context(),
+                                 initializer=_init_process, initargs=(layout, parameters, seasonal_rules)) as executor:
+            futures = [executor.submit(_run_shared_task, pos, test, param_name, rule)
+                       for pos, (test, param_name, rule) in enumerate(tasks)]
+            for pos, ((test, param_name, _), future) in enumerate(zip(tasks, futures)):
+                compact_args = future.result()
+                reasons = ReasonMask(flag_matrix.index)
+                for code, code_args in compact_args.items():
+                    reasons.add((arrays['bits'][pos] & np.uint64(1 << code)) != 0, code, **code_args)
+                flag_matrix.set(test, param_name, arrays['flags'][pos], reasons)
+    finally:
+        arrays.clear()  # Sichten freigeben, sonst lässt sich der Block nicht schließen
+        for block in blocks.values():
+            block.close()
+            block.unlink()
@@ -0,0 +1,81 @@
+# benchmark_consolidation.py
+"""
+Vergleicht die Konsolidierungsstrategien der consolidation_engine auf demselben
+Stationsjahr: Laufzeit, Anzahl Tage mit Ergebnis und Abweichung der Tagesmittel
+gegenüber 'interpolate_good'.
+
+Aufruf:
+    python benchmark_consolidation.py                       # synthetisches Stationsjahr
+    python benchmark_consolidation.py --csv stundenwerte.csv  # z.B. *_Stundenwerte_*.csv aus output/
+"""
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from config_file import CONSOLIDATION_RULES
+from consolidation_engine import STRATEGIES, consolidate
+
+
+def synthetic_station_year(days: int = 365, seed: int = 42) -> pd.DataFrame:
+    """Erzeugt Stundenwerte mit Flags und Gründen für ein Stationsjahr."""
+    rng = np.random.default_rng(seed)
+    n = days * 24
+    index = pd.date_range('2024-01-01', periods=n, freq='h')
+    data = pd.DataFrame(index=index)
+    for param, mean, scale in [('Wassertemp. (0.5m)', 12, 4), ('pH', 8, 0.3), ('Gelöster Sauerstoff', 9, 1.5),
+                               ('Leitfähigkeit', 450, 30), ('Trübung', 5, 2), ('Chl-a', 10, 4)]:
+        values = mean + scale * rng.standard_normal(n)
+        values[rng.random(n) < 0.02] = np.nan
+        flags = np.ones(n, dtype=int)
+        flags[rng.random(n) < 0.05] = 3
+        flags[rng.random(n) < 0.02] = 4
+        data[param] = values
+        data[f'flag_{param}'] = flags
+        data[f'reason_{param}'] = np.where(flags == 4, 'Außerhalb Messbereich', np.where(flags == 3, 'Spike', ''))
+    return data
+
+
+def load_station_csv(path: str) -> pd.DataFrame:
+    """Lädt eine gespeicherte Stundenwert-Datei (Zeitstempel in der ersten Spalte)."""
+    data = pd.read_csv(path, sep=None, engine='python', index_col=0, parse_dates=True)
+    return data.sort_index()
+
+
+def run_benchmark(data: pd.DataFrame, repeat: int = 3, min_hours: int = 1) -> pd.DataFrame:
+    params = [col for col in data.columns if not col.startswith(('flag_', 'reason_'))]
+    rules = {param: CONSOLIDATION_RULES.get(param, CONSOLIDATION_RULES.get('default', ['min', 'max', 'mean']))
+             for param in params}
+
+    results, outputs = [], {}
+    for name in STRATEGIES:
+        options = {'min_hours': min_hours} if name == 'flexible' else {}
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs[name] = consolidate(data, rules, name, **options)
+            timings.append(time.perf_counter() - start)
+        results.append({'Strategie': name, 'Laufzeit_s': min(timings),
+                        'Tage': len(outputs[name]), 'Spalten': outputs[name].shape[1]})
+
+    # Abweichung der Tagesmittel gegenüber der Pipeline-Strategie
+    reference = outputs['interpolate_good']
+    for row in results:
+        other = outputs[row['Strategie']]
+        mean_cols = [col for col in reference.columns if col.endswith('_Mittelwert') and col in other.columns]
+        diff = (other[mean_cols].apply(pd.to_numeric) - reference[mean_cols].apply(pd.to_numeric)).abs()
+        row['Max_Abw_Mittelwert'] = float(np.nanmax(diff.to_numpy())) if diff.notna().any().any() else 0.0
+    return pd.DataFrame(results).set_index('Strategie')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark der Konsolidierungsstrategien.')
+    parser.add_argument('--csv', help='Stundenwerte einer Station (sonst synthetisches Jahr).')
+    parser.add_argument('--days', type=int, default=365, help='Tage für synthetische Daten.')
+    parser.add_argument('--repeat', type=int, default=3, help='Wiederholungen pro Strategie.')
+    parser.add_argument('--min-hours', type=int, default=1, help='min_hours der Strategie flexible.')
+    args = parser.parse_args()
+
+    station_data = load_station_csv(args.csv) if args.csv else synthetic_station_year(args.days)
+    print(f"Stundenwerte: {len(station_data)} Zeilen")
+    print(run_benchmark(station_data, args.repeat, args.min_hours).to_string(float_format=lambda x: f"{x:.4f}"))
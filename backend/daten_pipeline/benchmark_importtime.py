@@ -0,0 +1,94 @@
+# benchmark_importtime.py
+"""
+Misst die Importzeit von Pipeline-Modulen mit `python -X importtime` (jeweils in einem
+frischen Interpreter): Gesamtzeit, die teuersten importierten Pakete und ob
+schwere optionale Abhängigkeiten (pyod, scikit-learn, scipy) schon beim Import geladen werden.
+
+Aufruf:
+    python benchmark_importtime.py                                # Standardmodule
+    python benchmark_importtime.py --module main_pipeline --top 15
+    python benchmark_importtime.py --plugins                      # zusätzlich jedes Plugin aus validator_registry
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+import pandas as pd
+from validator_registry import VALIDATOR_PLUGINS
+
+DEFAULT_MODULES = ['main_pipeline', 'validator', 'metadata_mapper', 'consolidation_engine']
+HEAVY_PACKAGES = ['pyod', 'sklearn', 'scipy', 'numba']
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def measure_import(module: str) -> pd.DataFrame:
+    """
+    Importiert ein Modul in einem neuen Interpreter und liefert die Zeilen von -X importtime.
+
+    Returns:
+        pd.DataFrame: Spalten package, level (Einrückung), self_ms, cumulative_ms
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import von {module} fehlgeschlagen:\n{result.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, package = match.groups()
+            rows.append({'package': package, 'level': len(indent) // 2,
+                         'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+    return pd.DataFrame(rows)
+
+
+def summarize(module: str, repeat: int = 3, top: int = 10) -> dict:
+    """Bestes Ergebnis aus `repeat` Messungen eines Moduls."""
+    best = None
+    for _ in range(repeat):
+        timings = measure_import(module)
+        total = timings.loc[timings['level'] == 0, 'cumulative_ms'].sum()
+        if best is None or total < best[0]:
+            best = (total, timings)
+    total, timings = best
+
+    root_packages = set(timings['package'].str.split('.').str[0])
+    # Jedes Paket erscheint nur beim ersten Import; dessen kumulative Zeit sind seine Kosten
+    packages = timings[~timings['package'].str.contains('.', regex=False) & (timings['package'] != module)]
+    direct = packages.nlargest(top, 'cumulative_ms')
+    return {
+        'Modul': module,
+        'Importzeit_ms': total,
+        'Schwere_Pakete': ', '.join(p for p in HEAVY_PACKAGES if p in root_packages) or '-',
+        'Teuerste_Pakete': ', '.join(f"{row.package} ({row.cumulative_ms:.0f} ms)" for row in direct.itertuples())
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Importzeiten der Pipeline-Module (python -X importtime).')
+    parser.add_argument('--module', action='append', help='Zu messendes Modul (mehrfach möglich).')
+    parser.add_argument('--plugins', action='store_true', help='Zusätzlich alle Plugins aus validator_registry messen.')
+    parser.add_argument('--repeat', type=int, default=3, help='Messungen pro Modul (bestes Ergebnis zählt).')
+    parser.add_argument('--top', type=int, default=5, help='Anzahl der teuersten Pakete.')
+    args = parser.parse_args()
+
+    modules = args.module or list(DEFAULT_MODULES)
+    if args.plugins:
+        modules += [module for module, _ in VALIDATOR_PLUGINS.values() if module not in modules]
+
+    results = []
+    for module in modules:
+        try:
+            results.append(summarize(module, args.repeat, args.top))
+        except RuntimeError as e:
+            print(e)
+    if results:
+        table = pd.DataFrame(results).set_index('Modul')
+        with pd.option_context('display.max_colwidth', None, 'display.width', 200):
+            print(table.to_string(float_format=lambda x: f"{x:.1f}"))
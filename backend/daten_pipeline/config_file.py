@@ -46,6 +46,84 @@ QARTOD_AGGREGATION = {
     # <75% automatisch BAD
 }
 
+# Persistierte Isolation-Forest-Modelle (pro Station und Jahreszeit)
+MULTIVARIATE_MODELS = {
+    'model_dir': os.path.join(BASE_DIR, "models", "multivariate"),
+    'max_training_samples': 5000,  # Obergrenze der (deterministischen) Trainingsstichprobe
+    'min_training_samples': 336,   # Mindestgröße der Trainingsstichprobe (2 Wochen Stundenwerte)
+    'min_cold_start_samples': 1,   # Vorläufiges Modell aus den aktuellen Daten (Kaltstart: wie früher jeder Upload)
+    'contamination': 0.02,         # Erwarteter Anteil Anomalien
+    'drift_factor': 3.0,           # Drift, wenn Anomalierate > drift_factor * contamination
+    'drift_min_rows': 24,          # Mindestanzahl neuer Zeilen für die Drift-Prüfung
+    'drift_cooldown_hours': 24     # Kein erneutes Neutraining innerhalb dieser Zeit nach dem letzten
+}
+
+# Verdichtete Zeitreihen (Woche, Monat, Badesaison) aus den Tagesaggregaten
+ROLLUPS = {
+    'local_dir': os.path.join(BASE_DIR, "rollups"),
+    'periods': ['week', 'month', 'bathing_season'],
+    'bathing_season': ((6, 1), (9, 15)),  # (Monat, Tag) Beginn und Ende der Badesaison
+    'trend_weeks': 52                      # Wochen für die Langzeittrend-Analyse
+}
+
+# Gleitende Baselines der Eintragserkennung (siehe baseline_engine.py)
+BASELINES = {
+    'lookback_hours': 72,     # Fensterlänge des gleitenden Medians
+    'mode': 'exact',          # 'exact' oder 'approximate' (Blockquantile, für Fenster von 14-30 Tagen)
+    'resolution_hours': 6,    # Blockgröße im Näherungsmodus
+    'stations': {}            # Abweichungen pro Station, z.B. {'wamo00019': {'mode': 'approximate', 'lookback_hours': 336}}
+}
+
+# Datenbankzugriff der Pipeline: ein Verbindungspool pro Prozess
+DB_POOL = {
+    'minconn': 1,
+    'maxconn': 4   # Lauf-Loader, Historie für Modelltraining, Konfiguration + Reserve
+}
+
+# Lokale Kopie der Datenbank-Konfiguration (neu geladen nur bei geänderter config_version)
+CONFIG_CACHE = {
+    'path': os.path.join(BASE_DIR, "cache", "config_snapshot.pkl"),
+    'max_age_seconds': 0,      # > 0: jüngere Kopie ohne Versionsabfrage verwenden
+    'offline_fallback': True   # Datenbank nicht erreichbar -> letzte gültige Kopie verwenden
+}
+
+# Einlesen der WAMO-CSV-Exporte (siehe wamo_csv_reader.py)
+CSV_INGEST = {
+    'value_dtype': 'float64',                # 'float32' halbiert den Speicher großer Nachberechnungen
+    'timestamp_format': '%Y-%m-%dT%H:%M:%S%z', # Ortszeit mit UTC-Versatz (+0200), siehe wamo_csv_reader.py
+    'parse_workers': None,                   # Prozesse für das Einlesen (None = Anzahl CPU-Kerne)
+    'parallel_min_files': 4,                 # Darunter werden die Dateien nacheinander gelesen
+    'duplicates': 'last'                     # Doppelte Zeitstempel: 'last', 'mean' oder 'error'
+}
+
+# Zwischenspeicher der eingelesenen CSV-Dateien, Schlüssel = Dateiinhalt + Spalten-Mapping
+# (siehe raw_data_cache.py; leeren mit: python raw_data_cache.py --clear)
+CSV_CACHE = {
+    'enabled': True,
+    'cache_dir': os.path.join(BASE_DIR, "cache", "csv"),
+    'format': 'arrow',    # 'arrow' (Speicherabbild, benötigt pyarrow) oder 'pickle'
+    'max_age_days': 90,   # Einträge, die so lange nicht gelesen wurden, werden entfernt
+    'max_size_mb': 2048   # Danach die am längsten ungenutzten, bis die Größe eingehalten ist
+}
+
+# Basis-Validierungen (Range, Stuck, Spike) innerhalb einer Station, siehe basic_validation.py
+BASIC_VALIDATION = {
+    'mode': 'serial',          # 'serial', 'threads' oder 'processes' (shared memory, für große Nachberechnungen)
+    'max_workers': None,       # None = Anzahl CPU-Kerne
+    'min_values': 2_000_000    # Parallel erst ab so vielen Messwerten (Zeilen x Parameter)
+}
+
+# Ablaufgraph einer Station (siehe pipeline_graph.py und STATION_GRAPH in main_pipeline.py)
+VALIDATION_GRAPH = {
+    'max_workers': 4,        # Gleichzeitig laufende Stufen (1 = nacheinander)
+    'timing_report': True    # Zeitaufschlüsselung mit kritischem Pfad pro Station ausgeben
+}
+
+# Dauerhafter Pipeline-Worker (main_pipeline.py --serve), angesprochen vom Node-Server
+PIPELINE_WORKER = {
+    'socket_path': os.getenv('PIPELINE_SOCKET', os.path.join(BASE_DIR, "pipeline_worker.sock"))
+}
+
 """
 # ========================================
 # STATIONEN
@@ -163,6 +241,7 @@ SPIKE_THRESHOLDS = {
 # Präzision für Rundung
 PRECISION_RULES = {
     'Phycocyanin Abs.': 1,
+    'Phycocyanin Abs. (comp)': 1,
     'TOC': 1,
     'Trübung': 1,
     'Chl-a': 1,
@@ -172,6 +251,9 @@ PRECISION_RULES = {
     'Leitfähigkeit': 0,
     'pH': 2,
     'Redoxpotential': 0,
+    'Wassertemp. (0.5m)': 2,
+    'Wassertemp. (1m)': 2,
+    'Wassertemp. (2m)': 2,
     'Wassertemperatur': 2,
     'Lufttemperatur': 1,
     'default': 2
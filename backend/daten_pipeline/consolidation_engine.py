@@ -0,0 +1,376 @@
+# consolidation_engine.py
+"""
+Gemeinsame Engine für die Tageskonsolidierung.
+
+Flag-Filterung, Statistik-Berechnung und Rundung sind hier einmal implementiert
+und arbeiten vektorisiert über alle Tage und Parameter eines Stations-DataFrames.
+Die Unterschiede der bisherigen Konsolidierer stecken nur noch in Strategien:
+
+- 'strict_good':      nur GOOD-Werte, BAD-Tage ohne Statistik (früher consolidator.py)
+- 'interpolate_good': an GOOD-Tagen BAD/SUSPECT maskieren und interpolieren
+                      (früher interpolating_consolidator.py, Standard der Pipeline)
+- 'flexible':         auch wenige Stunden pro Tag, BAD-Tage mit allen Werten
+                      (früher flexible_consolidator.py)
+
+Statistiken werden über ein Methodenregister (AGGREGATION_METHODS) aufgelöst und
+mit einem groupby(...).agg pro Lauf berechnet; gerundet wird spaltenweise nach
+PRECISION_RULES.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Optional, Tuple, Union
+from config_file import QARTOD_AGGREGATION, PRECISION_RULES
+
+
+class QartodFlags:
+    """Definiert die standardisierten QARTOD-Flag-Werte."""
+    GOOD = 1
+    NOT_EVALUATED = 2
+    SUSPECT = 3
+    BAD = 4
+    MISSING = 9
+
+
+NS_PER_DAY = 24 * 60 * 60 * 10**9
+
+DEFAULT_REASON = "Alle Werte plausibel"
+
+# Methodenregister: Name -> (Aggregationsfunktion für groupby.agg, Spaltensuffix)
+AGGREGATION_METHODS: Dict[str, Tuple[Union[str, Callable], str]] = {
+    'mean': ('mean', 'Mittelwert'),
+    'min': ('min', 'Min'),
+    'max': ('max', 'Max'),
+    'median': ('median', 'Median'),
+    'std': ('std', 'StdAbw')
+}
+
+
+def register_method(name: str, func: Union[str, Callable], suffix: str) -> None:
+    """Registriert eine zusätzliche Aggregationsmethode (z.B. ein Quantil)."""
+    AGGREGATION_METHODS[name] = (func, suffix)
+
+
+def get_aggregation_flags(good_ratios: np.ndarray) -> np.ndarray:
+    """Aggregat-Flag aus dem Anteil guter Werte (vektorisiert)."""
+    return np.select(
+        [good_ratios >= QARTOD_AGGREGATION['GOOD_THRESHOLD'],
+         good_ratios >= QARTOD_AGGREGATION['SUSPECT_THRESHOLD']],
+        [QartodFlags.GOOD, QartodFlags.SUSPECT],
+        default=QartodFlags.BAD
+    )
+
+
+def get_precision(param: str, precision_rules: Optional[dict] = None) -> int:
+    """Nachkommastellen eines Parameters laut PRECISION_RULES (mit 'default')."""
+    precision_rules = PRECISION_RULES if precision_rules is None else precision_rules
+    return precision_rules.get(param, precision_rules.get('default', 2))
+
+
+def round_columns(columns: Dict[str, np.ndarray], column_params: Dict[str, str],
+                  precision_rules: Optional[dict] = None) -> Dict[str, np.ndarray]:
+    """
+    Rundet Statistikspalten: alle Spalten gleicher Genauigkeit werden gemeinsam
+    als 2D-Array gerundet.
+    """
+    by_precision: Dict[int, list] = {}
+    for name in columns:
+        by_precision.setdefault(get_precision(column_params[name], precision_rules), []).append(name)
+
+    rounded = {}
+    for precision, names in by_precision.items():
+        block = np.round(np.column_stack([columns[name] for name in names]).astype(float), precision)
+        rounded.update({name: block[:, i] for i, name in enumerate(names)})
+    return rounded
+
+
+class DayGrouping:
+    """Tagesschlüssel aus int64-Zeitstempeln (lokale Zeit) für einen Zeitindex."""
+
+    def __init__(self, index: pd.DatetimeIndex):
+        self.timestamps = index.values.astype('datetime64[ns]').astype(np.int64)
+        self.day_keys = np.floor_divide(self.timestamps, NS_PER_DAY)
+        self.unique_days, self.day_pos = np.unique(self.day_keys, return_inverse=True)
+        self.n_days = len(self.unique_days)
+
+    def count(self, mask: np.ndarray) -> np.ndarray:
+        """Anzahl der True-Werte pro Tag."""
+        return np.bincount(self.day_pos, weights=mask, minlength=self.n_days)
+
+    def day_index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.unique_days * NS_PER_DAY, name="Datum")
+
+
+# ========================================
+# STRATEGIEN
+# ========================================
+
+class ConsolidationStrategy:
+    """
+    Basisklasse: legt fest, welche Werte eines Tages in die Statistik eingehen
+    und wie Anteil guter Werte, Aggregat-Flag und Gründe bestimmt werden.
+    """
+    name = ''
+    sort_reasons = False        # Gründe alphabetisch statt in Reihenfolge des Auftretens
+    requires_flags = True       # Parameter ohne flag_-Spalte überspringen
+    requires_reasons = False    # Parameter ohne reason_-Spalte überspringen
+    report_hours = False        # Spalte Anzahl_Stunden ausgeben
+    omit_missing = False        # Nicht berechenbare Statistik weglassen statt None
+
+    def select(self, values: np.ndarray, flags: np.ndarray, days: DayGrouping):
+        """
+        Returns:
+            Tuple: (Werte für die Statistik (NaN = ausgeschlossen), Anteil guter Werte pro Tag,
+                    Aggregat-Flag pro Tag, Tage mit Statistik, Tage mit Qualitätsangaben)
+        """
+        raise NotImplementedError
+
+
+class StrictGoodStrategy(ConsolidationStrategy):
+    """Nur GOOD-Werte; Anteil bezogen auf alle Stunden; BAD-Tage nur mit Qualitätsangaben."""
+    name = 'strict_good'
+    sort_reasons = True
+    requires_reasons = True
+
+    def select(self, values, flags, days):
+        is_good = flags == QartodFlags.GOOD
+        total = days.count(np.ones(len(values), dtype=bool))
+        good_ratios = np.where(total > 0, days.count(is_good) / np.maximum(total, 1) * 100, 0.0)
+        agg_flags = get_aggregation_flags(good_ratios)
+
+        calc = np.where(is_good, values, np.nan)
+        with_stats = (days.count(is_good) > 0) & (agg_flags != QartodFlags.BAD)
+        return calc, good_ratios, agg_flags, with_stats, total > 0
+
+
+class InterpolateGoodStrategy(ConsolidationStrategy):
+    """
+    An GOOD-Tagen werden BAD/SUSPECT-Werte maskiert und innerhalb des Tages linear
+    über die Zeit interpoliert (Grenze als Zeitspanne); sonst nur GOOD-Werte.
+    """
+    name = 'interpolate_good'
+
+    def __init__(self, interpolation_limit: pd.Timedelta = pd.Timedelta(hours=3)):
+        self.limit_ns = int(pd.Timedelta(interpolation_limit).value)
+
+    def select(self, values, flags, days):
+        valid = ~np.isnan(values)
+        is_good = flags == QartodFlags.GOOD
+        total = days.count(valid)
+        good_ratios = np.where(total > 0, days.count(valid & is_good) / np.maximum(total, 1) * 100, 0.0)
+        agg_flags = get_aggregation_flags(good_ratios)
+
+        good_day = (agg_flags == QartodFlags.GOOD)[days.day_pos]
+        masked = np.where(np.isin(flags, [QartodFlags.BAD, QartodFlags.SUSPECT]), np.nan, values)
+        interpolated = interpolate_within_days(np.where(good_day, masked, np.nan), days, self.limit_ns)
+        calc = np.where(good_day, interpolated, np.where(is_good, values, np.nan))
+
+        has_values = days.count(~np.isnan(calc)) > 0
+        return calc, good_ratios, agg_flags, has_values, has_values
+
+
+class FlexibleStrategy(ConsolidationStrategy):
+    """
+    Auch für Tage mit wenigen Stunden: GOOD/NOT_EVALUATED-Werte, an BAD-Tagen alle Werte.
+    Parameter ohne Flags gelten als GOOD.
+    """
+    name = 'flexible'
+    sort_reasons = True
+    requires_flags = False
+    report_hours = True
+    omit_missing = True
+
+    def __init__(self, min_hours: int = 1):
+        self.min_hours = max(int(min_hours), 1)
+
+    def select(self, values, flags, days):
+        valid = ~np.isnan(values)
+        total = days.count(valid)
+        good_ratios = np.where(total > 0, days.count(valid & (flags == QartodFlags.GOOD)) / np.maximum(total, 1) * 100, 0.0)
+        agg_flags = get_aggregation_flags(good_ratios)
+
+        bad_day = (agg_flags == QartodFlags.BAD)[days.day_pos]
+        usable = valid & (bad_day | np.isin(flags, [QartodFlags.GOOD, QartodFlags.NOT_EVALUATED]))
+        calc = np.where(usable, values, np.nan)
+
+        enough = (total > 0) & (days.count(usable) >= self.min_hours)
+        return calc, good_ratios, agg_flags, enough, enough
+
+
+STRATEGIES = {
+    StrictGoodStrategy.name: StrictGoodStrategy,
+    InterpolateGoodStrategy.name: InterpolateGoodStrategy,
+    FlexibleStrategy.name: FlexibleStrategy
+}
+
+
+def get_strategy(strategy: Union[str, ConsolidationStrategy], **options) -> ConsolidationStrategy:
+    """Strategie-Objekt aus Name oder Instanz."""
+    if isinstance(strategy, ConsolidationStrategy):
+        return strategy
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unbekannte Konsolidierungsstrategie: {strategy}")
+    return STRATEGIES[strategy](**options)
+
+
+# ========================================
+# ENGINE
+# ========================================
+
+def interpolate_within_days(values: np.ndarray, days: DayGrouping, limit_ns: int) -> np.ndarray:
+    """
+    Lineare Interpolation über die Zeit, nur innerhalb desselben Tages.
+    Eine Lücke wird gefüllt, wenn der nächste gültige Wert davor oder danach
+    höchstens `limit_ns` entfernt ist (Ränder: konstante Fortsetzung).
+    """
+    n = len(values)
+    valid = ~np.isnan(values)
+    if valid.all() or not valid.any():
+        return values
+
+    timestamps, day_keys = days.timestamps, days.day_keys
+    positions = np.arange(n)
+    prev_idx = np.maximum.accumulate(np.where(valid, positions, -1))
+    next_idx = np.minimum.accumulate(np.where(valid, positions, n)[::-1])[::-1]
+
+    has_prev = prev_idx >= 0
+    has_next = next_idx < n
+    prev_safe = np.where(has_prev, prev_idx, 0)
+    next_safe = np.where(has_next, next_idx, 0)
+    has_prev &= day_keys[prev_safe] == day_keys
+    has_next &= day_keys[next_safe] == day_keys
+
+    gap_before = timestamps - timestamps[prev_safe]
+    gap_after = timestamps[next_safe] - timestamps
+    within_limit = (has_prev & (gap_before <= limit_ns)) | (has_next & (gap_after <= limit_ns))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        span = (timestamps[next_safe] - timestamps[prev_safe]).astype(float)
+        weight = np.where(span > 0, gap_before / span, 0.0)
+        interpolated = np.where(
+            has_prev & has_next,
+            values[prev_safe] + (values[next_safe] - values[prev_safe]) * weight,
+            np.where(has_prev, values[prev_safe], values[next_safe])
+        )
+
+    fill = ~valid & (has_prev | has_next) & within_limit
+    result = values.copy()
+    result[fill] = interpolated[fill]
+    return result
+
+
+def collect_daily_reasons(reasons: np.ndarray, days: DayGrouping, sort: bool = False) -> np.ndarray:
+    """Eindeutige Gründe pro Tag (Reihenfolge des Auftretens oder alphabetisch), '; '-verbunden."""
+    daily_reasons = np.full(days.n_days, DEFAULT_REASON, dtype=object)
+    non_empty = np.flatnonzero(pd.notna(reasons) & (reasons != ''))
+    if len(non_empty):
+        long = pd.DataFrame({'day': days.day_pos[non_empty], 'reason': reasons[non_empty].astype(str)})
+        long = long.drop_duplicates()
+        if sort:
+            long = long.sort_values(['day', 'reason'])
+        joined = long.groupby('day', sort=False)['reason'].agg('; '.join)
+        daily_reasons[joined.index.to_numpy()] = joined.to_numpy()
+    return daily_reasons
+
+
+def consolidate(processed_data: pd.DataFrame, parameter_rules: dict,
+                strategy: Union[str, ConsolidationStrategy] = 'interpolate_good',
+                precision_rules: Optional[dict] = None, **strategy_options) -> pd.DataFrame:
+    """
+    Tageskonsolidierung aller Tage und Parameter eines Stations-DataFrames.
+
+    Args:
+        processed_data: Stundenwerte mit Spalten param, flag_param, reason_param
+        parameter_rules: Parameter -> Liste von Methoden aus AGGREGATION_METHODS
+        strategy: Name aus STRATEGIES oder Strategie-Objekt
+        precision_rules: Nachkommastellen pro Parameter (Standard: PRECISION_RULES)
+        **strategy_options: z.B. min_hours (flexible), interpolation_limit (interpolate_good)
+
+    Returns:
+        pd.DataFrame: Eine Zeile pro Tag (Index "Datum"), Spalten {param}_{Kennwert};
+                      object-dtype, None = Statistik nicht berechenbar, NaN = Parameter fehlt am Tag
+    """
+    strategy = get_strategy(strategy, **strategy_options)
+    params = [param for param in parameter_rules
+              if param in processed_data.columns
+              and (f'flag_{param}' in processed_data.columns or not strategy.requires_flags)
+              and (f'reason_{param}' in processed_data.columns or not strategy.requires_reasons)]
+    if processed_data.empty or not params:
+        return pd.DataFrame()
+
+    days = DayGrouping(processed_data.index)
+
+    calc_columns = {}
+    quality = {}
+    for param in params:
+        values = processed_data[param].to_numpy(dtype=float)
+        if f'flag_{param}' in processed_data.columns:
+            flags = processed_data[f'flag_{param}'].to_numpy()
+        else:
+            flags = np.where(np.isnan(values), QartodFlags.MISSING, QartodFlags.GOOD)
+        calc_columns[param], *quality[param] = strategy.select(values, flags, days)
+
+    # Alle Statistiken in einem groupby(...).agg
+    calc = pd.DataFrame(calc_columns, index=days.day_pos)
+    agg_spec = {param: list(dict.fromkeys(AGGREGATION_METHODS[m][0] for m in parameter_rules[param]
+                                          if m in AGGREGATION_METHODS)) + ['count']
+                for param in params}
+    stats = calc.groupby(level=0).agg(agg_spec).reindex(range(days.n_days))
+
+    stat_columns, stat_params, present = {}, {}, {}
+    meta_columns = {}
+    column_order = []
+    for param in params:
+        good_ratios, agg_flags, with_stats, with_quality = quality[param]
+        for method in parameter_rules[param]:
+            if method in AGGREGATION_METHODS:
+                func, suffix = AGGREGATION_METHODS[method]
+                name = f"{param}_{suffix}"
+                stat_columns[name] = stats[(param, func)].to_numpy(dtype=float)
+                stat_params[name] = param
+                present[name] = with_stats
+                column_order.append(name)
+        if strategy.report_hours:
+            name = f"{param}_Anzahl_Stunden"
+            meta_columns[name] = stats[(param, 'count')].to_numpy().astype(int)
+            present[name] = with_stats
+            column_order.append(name)
+
+        reason_col = f'reason_{param}'
+        reasons = processed_data[reason_col].to_numpy(dtype=object) if reason_col in processed_data.columns \
+            else np.full(len(processed_data), '', dtype=object)
+        for suffix, column in (('Anteil_Guter_Werte_Prozent', np.round(good_ratios, 1)),
+                               ('Aggregat_QARTOD_Flag', agg_flags.astype(int)),
+                               ('Aggregat_Gruende', collect_daily_reasons(reasons, days, strategy.sort_reasons))):
+            name = f"{param}_{suffix}"
+            meta_columns[name] = column
+            present[name] = with_quality
+            column_order.append(name)
+
+    stat_columns = round_columns(stat_columns, stat_params, precision_rules)
+    daily = pd.DataFrame({**stat_columns, **meta_columns}, index=days.day_index())[column_order].astype(object)
+
+    missing_value = np.nan if strategy.omit_missing else None
+    for name in column_order:
+        column = daily[name].where(present[name], np.nan)
+        if name in stat_columns:
+            column = column.where(column.notna() | ~present[name], missing_value)
+        daily[name] = column
+
+    any_present = np.logical_or.reduce([present[name] for name in column_order])
+    used_columns = [name for name in column_order if present[name].any()]
+    return daily.loc[any_present, used_columns]
+
+
+def consolidate_day(hourly_data: pd.DataFrame, parameter_rules: dict, precision_rules: Optional[dict] = None,
+                    strategy: Union[str, ConsolidationStrategy] = 'interpolate_good',
+                    **strategy_options) -> Optional[pd.Series]:
+    """
+    Konsolidierung eines einzelnen Tages als flache Series (wie die bisherigen
+    Tagesfunktionen); None, wenn kein Parameter ein Ergebnis liefert.
+    """
+    daily = consolidate(hourly_data, parameter_rules, strategy, precision_rules, **strategy_options)
+    if daily.empty:
+        return None
+    row = daily.iloc[0]
+    return row[[value is None or not (isinstance(value, float) and np.isnan(value)) for value in row]]
@@ -0,0 +1,332 @@
+# daily_sketch.py
+"""
+Zusammenführbare Tagesaggregate pro (Station, Tag, Parameter).
+
+Pro Tag und Parameter wird ein kleiner Zustand gespeichert: die Stundenwerte des
+Tages mit Flag und Grund (höchstens 25 Einträge) und daraus abgeleitet Anzahl,
+Summe, Quadratsumme, Minimum, Maximum, Anzahl guter Werte, eine Bitmaske der
+enthaltenen Stunden und eine kompakte Quantil-Skizze der GOOD-Werte.
+
+- Nachträglich eintreffende Stunden werden in den gespeicherten Tag eingemischt;
+  eine erneut hochgeladene Stunde mit geänderten Werten, Flags oder Gründen ersetzt
+  ihren früheren Beitrag (unveränderte Stunden ändern nichts).
+- daily_aggregations wird beim Finalisieren aus den Stundenwerten mit derselben
+  Konsolidierungsstrategie wie die Tageskonsolidierung der Pipeline berechnet
+  (Standard 'interpolate_good', siehe consolidation_engine.py) und stimmt daher mit
+  messwerte, Ergebnisdateien und Dashboard überein.
+- Die abgeleiteten Summen beruhen nur auf den GOOD-Werten (ohne Interpolation) und
+  sind die Bausteine der Wochen-, Monats- und Badesaison-Rollups (rollup_store.py).
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from consolidation_engine import NS_PER_DAY, QartodFlags, consolidate, get_aggregation_flags
+
+NS_PER_SECOND = 10**9
+
+# Schlüssel eines Tagesaggregats: (Tag als Timestamp, Parameter)
+SketchKey = Tuple[pd.Timestamp, str]
+
+# Stundenwerte eines Tages: Zeitschlüssel -> (Wert, Flag, Grund); NaN = fehlt.
+# Zeitschlüssel = Sekunden seit Mitternacht * 2 + Wiederholung; die Wiederholung (0/1)
+# unterscheidet die Stunde, die bei der Zeitumstellung im Oktober zweimal vorkommt.
+Slots = Dict[int, Tuple[float, float, str]]
+
+
+class QuantileSketch:
+    """
+    Kompakte, zusammenführbare Quantil-Skizze aus gewichteten Zentroiden.
+
+    Bis `max_centroids` Werte ist die Skizze exakt (Stundenwerte eines Tages
+    passen immer hinein); darüber werden benachbarte Zentroide zu Gruppen
+    gleichen Gewichts verschmolzen.
+    """
+
+    def __init__(self, max_centroids: int = 64, means: Optional[Iterable[float]] = None,
+                 weights: Optional[Iterable[float]] = None):
+        self.max_centroids = max_centroids
+        self.means = np.asarray(means if means is not None else [], dtype=float)
+        self.weights = np.asarray(weights if weights is not None else np.ones(len(self.means)), dtype=float)
+
+    @property
+    def total_weight(self) -> float:
+        return float(self.weights.sum())
+
+    def add(self, values: np.ndarray) -> None:
+        """Fügt einzelne Werte (Gewicht 1) hinzu."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self._extend(values, np.ones(len(values)))
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        """Mischt eine andere Skizze ein."""
+        if len(other.means):
+            self._extend(other.means, other.weights)
+
+    def _extend(self, means: np.ndarray, weights: np.ndarray) -> None:
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='mergesort')
+        self.means, self.weights = means[order], weights[order]
+        if len(self.means) > self.max_centroids:
+            self._compress()
+
+    def _compress(self) -> None:
+        """Verschmilzt sortierte Zentroide zu `max_centroids` Gruppen gleichen Gewichts."""
+        cumulative = np.cumsum(self.weights) - self.weights
+        groups = np.minimum((cumulative / self.total_weight * self.max_centroids).astype(int), self.max_centroids - 1)
+        weights = np.bincount(groups, weights=self.weights)
+        means = np.bincount(groups, weights=self.means * self.weights)
+        keep = weights > 0
+        self.means, self.weights = means[keep] / weights[keep], weights[keep]
+
+    def quantile(self, q: float) -> float:
+        """Quantil der Skizze (exakt wie pandas, solange nicht komprimiert wurde)."""
+        if not len(self.means):
+            return np.nan
+        if np.all(self.weights == 1):
+            return float(np.quantile(self.means, q))
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.total_weight, centers, self.means))
+
+    def to_dict(self) -> dict:
+        return {'means': self.means.tolist(), 'weights': self.weights.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict], max_centroids: int = 64) -> 'QuantileSketch':
+        data = data or {}
+        return cls(max_centroids, data.get('means', []), data.get('weights'))
+
+
+class DailySketch:
+    """Zusammenführbarer Zustand eines Tagesaggregats für einen Parameter."""
+
+    def __init__(self, count: int = 0, total: float = 0.0, total_sq: float = 0.0,
+                 minimum: float = np.nan, maximum: float = np.nan,
+                 good_count: int = 0, hour_mask: int = 0,
+                 reasons: Optional[List[str]] = None, digest: Optional[QuantileSketch] = None,
+                 slots: Optional[Slots] = None):
+        self.count = count              # Anzahl aller Werte ungleich NaN
+        self.good_count = good_count    # Anzahl der GOOD-Werte (Basis der Statistiken)
+        self.total = total
+        self.total_sq = total_sq
+        self.minimum = minimum
+        self.maximum = maximum
+        self.hour_mask = hour_mask      # Bit h = Stunde h ist bereits enthalten
+        self.reasons = list(reasons or [])
+        self.digest = digest if digest is not None else QuantileSketch()
+        self.slots = slots              # Stundenwerte (nur Tageszustände, nicht Rollups)
+
+    @classmethod
+    def from_slots(cls, slots: Slots) -> 'DailySketch':
+        """Tageszustand aus den Stundenwerten eines Tages."""
+        keys = sorted(slots)
+        values = np.array([slots[key][0] for key in keys], dtype=float)
+        flags = np.array([slots[key][1] for key in keys], dtype=float)
+        valid = ~np.isnan(values)
+        good_values = values[valid & (flags == QartodFlags.GOOD)]
+        digest = QuantileSketch()
+        digest.add(good_values)
+        hour_mask = 0
+        for key in keys:
+            hour_mask |= 1 << (key // 2 // 3600)
+        return cls(
+            count=int(valid.sum()), total=float(good_values.sum()), total_sq=float((good_values ** 2).sum()),
+            minimum=float(good_values.min()) if len(good_values) else np.nan,
+            maximum=float(good_values.max()) if len(good_values) else np.nan,
+            good_count=len(good_values), hour_mask=hour_mask,
+            reasons=list(dict.fromkeys(slots[key][2] for key in keys if slots[key][2])),
+            digest=digest, slots=dict(slots)
+        )
+
+    def merge(self, other: 'DailySketch') -> 'DailySketch':
+        """
+        Mischt die Summen eines anderen Zustands ein (O(Größe von other)), z.B. einen Tag
+        in eine Woche. Stundenwerte werden nicht übernommen; Tage untereinander werden
+        über merge_daily_sketches zusammengeführt.
+        """
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.minimum = np.fmin(self.minimum, other.minimum)
+        self.maximum = np.fmax(self.maximum, other.maximum)
+        self.good_count += other.good_count
+        self.hour_mask |= other.hour_mask
+        self.reasons.extend(reason for reason in other.reasons if reason not in self.reasons)
+        self.digest.merge(other.digest)
+        return self
+
+    def finalize(self) -> Dict[str, float]:
+        """Berechnet die Tageskennwerte aus dem Zustand."""
+        good_ratio = self.good_count / self.count * 100 if self.count > 0 else 0.0
+        n = self.good_count
+        mean = self.total / n if n else np.nan
+        if n > 1:
+            variance = max((self.total_sq - self.total ** 2 / n) / (n - 1), 0.0)
+            std = np.sqrt(variance)
+        else:
+            std = np.nan
+        return {
+            'mean': mean,
+            'min': self.minimum,
+            'max': self.maximum,
+            'median': self.digest.quantile(0.5),
+            'std': std,
+            'good_ratio': good_ratio,
+            'flag': int(get_aggregation_flags(np.array([good_ratio]))[0]),
+            'reasons': "; ".join(self.reasons) if self.reasons else "Alle Werte plausibel"
+        }
+
+    def to_record(self) -> dict:
+        """Serialisierbare Form (z.B. für die Datenbank)."""
+        return {
+            'value_count': self.count, 'value_sum': self.total, 'value_sum_sq': self.total_sq,
+            'min_value': None if np.isnan(self.minimum) else float(self.minimum),
+            'max_value': None if np.isnan(self.maximum) else float(self.maximum),
+            'good_count': self.good_count,
+            'hour_mask': self.hour_mask, 'reasons': self.reasons,
+            'quantile_sketch': self.digest.to_dict(),
+            'hourly_slots': None if self.slots is None else {
+                'keys': sorted(self.slots),
+                'values': [None if np.isnan(self.slots[key][0]) else self.slots[key][0] for key in sorted(self.slots)],
+                'flags': [None if np.isnan(self.slots[key][1]) else int(self.slots[key][1]) for key in sorted(self.slots)],
+                'reasons': [self.slots[key][2] for key in sorted(self.slots)]
+            }
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> 'DailySketch':
+        def as_float(value):
+            return np.nan if value is None else float(value)
+
+        slots = None
+        if record.get('hourly_slots'):
+            hourly = record['hourly_slots']
+            slots = {int(key): (as_float(value), as_float(flag), reason or '')
+                     for key, value, flag, reason in zip(hourly['keys'], hourly['values'],
+                                                         hourly['flags'], hourly['reasons'])}
+        return cls(
+            count=int(record['value_count']), total=float(record['value_sum']),
+            total_sq=float(record['value_sum_sq']),
+            minimum=as_float(record['min_value']), maximum=as_float(record['max_value']),
+            good_count=int(record['good_count']),
+            hour_mask=int(record['hour_mask']), reasons=record.get('reasons') or [],
+            digest=QuantileSketch.from_dict(record.get('quantile_sketch')),
+            slots=slots
+        )
+
+
+def _slot_keys(index: pd.DatetimeIndex) -> Tuple[np.ndarray, np.ndarray]:
+    """Tagesnummer und Zeitschlüssel (siehe Slots) jedes Zeitstempels."""
+    timestamps = index.values.astype('datetime64[ns]').astype(np.int64)
+    day_keys = np.floor_divide(timestamps, NS_PER_DAY)
+    seconds = np.floor_divide(timestamps - day_keys * NS_PER_DAY, NS_PER_SECOND)
+    repeat = pd.Series(timestamps).groupby(timestamps).cumcount().to_numpy()
+    return day_keys, seconds * 2 + np.minimum(repeat, 1)
+
+
+def build_daily_sketches(processed_data: pd.DataFrame, parameters: Iterable[str]) -> Dict[SketchKey, DailySketch]:
+    """
+    Erzeugt die Tageszustände aus validierten Stundenwerten (Spalten param, flag_param, reason_param).
+    Alle Zeitstempel werden übernommen, auch fehlende Werte (sie werden ggf. interpoliert).
+    """
+    sketches: Dict[SketchKey, DailySketch] = {}
+    if processed_data.empty:
+        return sketches
+
+    day_keys, slot_keys = _slot_keys(processed_data.index)
+    unique_days, day_pos = np.unique(day_keys, return_inverse=True)
+    days = pd.DatetimeIndex(unique_days * NS_PER_DAY)
+    order = np.argsort(day_pos, kind='stable')
+    rows_per_day = np.split(order, np.flatnonzero(np.diff(day_pos[order])) + 1)
+
+    for param in parameters:
+        if param not in processed_data.columns or f'flag_{param}' not in processed_data.columns:
+            continue
+        values = processed_data[param].to_numpy(dtype=float)
+        flags = pd.to_numeric(processed_data[f'flag_{param}'], errors='coerce').to_numpy(dtype=float)
+        reason_col = f'reason_{param}'
+        reasons = (processed_data[reason_col].fillna('').astype(str).to_numpy(dtype=object)
+                   if reason_col in processed_data.columns else np.full(len(values), '', dtype=object))
+
+        for rows in rows_per_day:
+            slots = {int(key): (float(value), float(flag), reason)
+                     for key, value, flag, reason in zip(slot_keys[rows], values[rows], flags[rows], reasons[rows])}
+            sketches[(days[day_pos[rows[0]]], param)] = DailySketch.from_slots(slots)
+    return sketches
+
+
+def _same_slot(first: Tuple[float, float, str], second: Tuple[float, float, str]) -> bool:
+    """Gleicher Wert, gleiches Flag und gleicher Grund (NaN gleich NaN)."""
+    return all(a == b or (pd.isna(a) and pd.isna(b)) for a, b in zip(first, second))
+
+
+def merge_daily_sketches(existing: Dict[SketchKey, DailySketch], new: Dict[SketchKey, DailySketch]
+                         ) -> Tuple[Dict[SketchKey, DailySketch], Dict[SketchKey, DailySketch], Set[SketchKey]]:
+    """
+    Mischt die Tageszustände eines Uploads in die gespeicherten ein; Stunden des Uploads
+    ersetzen dieselben gespeicherten Stunden.
+
+    Returns:
+        Tuple: (geänderte Tageszustände zum Speichern,
+                Zuwächse aus nur neu hinzugekommenen Stunden für die Rollups,
+                Tage, deren gespeicherte Stunden sich geändert haben - deren Rollup-Perioden
+                werden neu berechnet, da sich Min/Max/Median nicht abziehen lassen)
+    """
+    changed, increments, replaced = {}, {}, set()
+    for key, sketch in new.items():
+        stored = existing.get(key)
+        if stored is None:
+            changed[key] = increments[key] = sketch
+            continue
+        if stored.slots is None:
+            # Gespeicherter Zustand ohne Stundenwerte: durch den Upload ersetzen
+            changed[key] = sketch
+            replaced.add(key)
+            continue
+
+        added = {slot: entry for slot, entry in sketch.slots.items() if slot not in stored.slots}
+        modified = [slot for slot, entry in sketch.slots.items()
+                    if slot in stored.slots and not _same_slot(stored.slots[slot], entry)]
+        if not added and not modified:
+            continue
+        changed[key] = DailySketch.from_slots({**stored.slots, **sketch.slots})
+        if modified:
+            replaced.add(key)
+        else:
+            increments[key] = DailySketch.from_slots(added)
+    return changed, increments, replaced
+
+
+def finalize_daily_sketches(sketches: Dict[SketchKey, DailySketch], parameter_rules: dict,
+                            precision_rules: dict, strategy: str = 'interpolate_good',
+                            **strategy_options) -> pd.DataFrame:
+    """
+    Tageskonsolidierung aus den Stundenwerten der Tageszustände (Index "Datum", Spalten
+    {param}_Mittelwert, ..., {param}_Aggregat_Gruende), mit derselben Strategie wie
+    consolidation_engine.consolidate.
+    """
+    rows = []
+    for (day, param), sketch in sketches.items():
+        if param not in parameter_rules or sketch.slots is None:
+            continue
+        start = pd.Timestamp(day).value
+        for key, (value, flag, reason) in sketch.slots.items():
+            rows.append((start + key // 2 * NS_PER_SECOND, key % 2, param, value, flag, reason))
+    if not rows:
+        return pd.DataFrame()
+
+    long = pd.DataFrame(rows, columns=['timestamp', 'repeat', 'param', 'value', 'flag', 'reason'])
+    wide = long.set_index(['timestamp', 'repeat', 'param']).unstack('param').sort_index()
+    params = list(dict.fromkeys(long['param']))
+    columns = {}
+    for param in params:
+        columns[param] = wide[('value', param)].to_numpy(dtype=float)
+        columns[f'flag_{param}'] = wide[('flag', param)].to_numpy(dtype=float)
+        columns[f'reason_{param}'] = wide[('reason', param)].to_numpy(dtype=object)
+    hourly = pd.DataFrame(columns, index=pd.DatetimeIndex(
+        wide.index.get_level_values('timestamp').to_numpy(dtype='datetime64[ns]')))
+    return consolidate(hourly, {param: parameter_rules[param] for param in params}, strategy,
+                       precision_rules, **strategy_options)
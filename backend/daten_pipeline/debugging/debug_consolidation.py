@@ -184,7 +184,8 @@ def check_consolidator_function():
     print("=" * 60)
     
     try:
-        from interpolating_consolidator import interpolate_and_aggregate, QartodFlags
+        from interpolating_consolidator import interpolate_and_aggregate
+        from consolidation_engine import QartodFlags
         print("✓ Import erfolgreich")
         
         # Erstelle Testdaten
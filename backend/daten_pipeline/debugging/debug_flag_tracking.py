@@ -14,7 +14,7 @@ from metadata_mapper import load_metadata, create_column_mapping, map_columns_to
 from validator import WaterQualityValidator
 from stuck_value_validator import check_stuck_values
 from spike_validator import check_spikes
-from multivariate_validator import check_multivariate_anomalies
+from validator_registry import validators  # multivariate Validierung (pyod) erst bei Bedarf laden
 
 def track_flag_changes():
     """Verfolgt Schritt für Schritt welche Flags gesetzt werden"""
@@ -111,7 +111,8 @@ def track_flag_changes():
     test_params = ['Nitrat', 'pH', 'Gelöster Sauerstoff', 'Leitfähigkeit', 'Trübung']
     available_params = [p for p in test_params if p in processed_data.columns]
     
-    if len(available_params) > 1:
+    check_multivariate_anomalies = validators.get('multivariate') if len(available_params) > 1 else None
+    if check_multivariate_anomalies:
         test_df = processed_data[available_params].copy()
         multi_flags, multi_reasons = check_multivariate_anomalies(test_df, available_params)
         flag_tracking['Multi_Flag'] = multi_flags
@@ -1,8 +1,9 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional
 from datetime import datetime
 import warnings
+from reason_codes import ReasonCodes, ReasonMask, combine_reason_masks, ALGAE_CHL_HIGH, ALGAE_PH_HIGH, ALGAE_O2_HIGH, ALGAE_O2_LOW_NIGHT, ALGAE_TURBIDITY
 
 class QartodFlags:
     """Definiert die standardisierten QARTOD-Flag-Werte."""
@@ -34,142 +35,181 @@ class EnhancedCorrelationValidator:
             ('Leitfähigkeit', 'Wassertemperatur'): {'min': 0.1, 'max': 0.4, 'condition': 'normal'}
         }
     
-    def validate_all_correlations(self, df: pd.DataFrame, timestamp: pd.Timestamp) -> Tuple[pd.Series, pd.Series]:
+    def validate_all_correlations(self, df: pd.DataFrame, timestamp: pd.Timestamp,
+                                  as_codes: bool = False) -> Tuple[pd.Series, pd.Series]:
         """
         Hauptmethode zur Durchführung aller Korrelationsprüfungen.
+        Tageszeit und Monat werden für alle Zeilen aus `timestamp` übernommen.
+        
+        Args:
+            as_codes: Gründe als ReasonMask statt als Texte zurückgeben
         
         Returns:
             Tuple[pd.Series, pd.Series]: (Flags, Begründungen)
         """
-        flags = pd.Series(QartodFlags.GOOD, index=df.index)
-        reasons = pd.Series("", index=df.index)
+        flags = np.full(len(df), QartodFlags.GOOD, dtype=int)
+        masks = []
+        
+        # Kombiniere alle Ergebnisse (höchster Wert = schlechtester Flag, Gründe per ODER)
+        for _, result_flags, result_reasons in self._run_checks(df, timestamp):
+            flags = np.maximum(flags, result_flags.to_numpy())
+            masks.append(result_reasons)
+        
+        reasons = combine_reason_masks(masks, df.index)
+        return pd.Series(flags, index=df.index), (reasons if as_codes else reasons.render())
+    
+    def validate_frame(self, df: pd.DataFrame, as_codes: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Führt alle Korrelationsprüfungen in einem Aufruf über den gesamten DataFrame aus.
+        Tageszeit und Monat werden pro Zeitstempel aus dem Index abgeleitet, statt
+        für jede Stunde einen eigenen DataFrame zu bauen.
+        
+        Das Ergebnis einer Prüfung wird allen Parametern zugeordnet, die sie liest.
         
-        # Sammle alle Validierungsergebnisse
+        Args:
+            as_codes: Gründe als Dict Parameter -> ReasonMask statt als Text-DataFrame zurückgeben
+        
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: (Flags, Begründungen) mit einer Spalte pro Parameter
+        """
+        flag_columns = {}
+        reason_masks = {}
+        
+        for params, result_flags, result_reasons in self._run_checks(df, None):
+            for param in params:
+                if param not in flag_columns:
+                    flag_columns[param] = np.full(len(df), QartodFlags.GOOD, dtype=int)
+                    reason_masks[param] = ReasonMask(df.index)
+                flag_columns[param] = np.maximum(flag_columns[param], result_flags.to_numpy())
+                reason_masks[param] |= result_reasons
+        
+        flags = pd.DataFrame(flag_columns, index=df.index)
+        if as_codes:
+            return flags, reason_masks
+        reasons = pd.DataFrame({param: mask.render() for param, mask in reason_masks.items()}, index=df.index)
+        return flags, reasons
+    
+    def _run_checks(self, df: pd.DataFrame, timestamp: Optional[pd.Timestamp]) -> List[Tuple[List[str], pd.Series, ReasonMask]]:
+        """
+        Führt alle anwendbaren Prüfungen aus und gibt pro Prüfung
+        (gelesene Parameter, Flags, Begründungscodes) zurück.
+        """
         validation_results = []
         
         # 1. pH-Sauerstoff-Beziehung
         if all(col in df.columns for col in ['pH', 'Gelöster Sauerstoff']):
             result = self._validate_ph_oxygen_relationship(df, timestamp)
-            validation_results.append(result)
+            validation_results.append((['pH', 'Gelöster Sauerstoff'], *result))
         
         # 2. Temperatur-Sauerstoff-Sättigung
         if all(col in df.columns for col in ['Wassertemp. (0.5m)', 'Gelöster Sauerstoff']):
             result = self._validate_oxygen_saturation(df)
-            validation_results.append(result)
+            validation_results.append((['Wassertemp. (0.5m)', 'Gelöster Sauerstoff'], *result))
         
         # 3. Temperaturschichtung
         temp_cols = ['Wassertemp. (0.5m)', 'Wassertemp. (1m)', 'Wassertemp. (2m)']
         if all(col in df.columns for col in temp_cols):
             result = self._validate_thermal_stratification(df, timestamp)
-            validation_results.append(result)
+            validation_results.append((temp_cols, *result))
         
         # 4. Algenblüten-Indikatoren
-        if all(col in df.columns for col in ['Chl-a', 'pH', 'Gelöster Sauerstoff', 'Trübung']):
+        algae_cols = ['Chl-a', 'pH', 'Gelöster Sauerstoff', 'Trübung']
+        if all(col in df.columns for col in algae_cols):
             result = self._validate_algae_bloom_indicators(df, timestamp)
-            validation_results.append(result)
+            validation_results.append((algae_cols, *result))
         
         # 5. Leitfähigkeit-Temperatur-Kompensation
         if all(col in df.columns for col in ['Leitfähigkeit', 'Wassertemp. (0.5m)']):
             result = self._validate_conductivity_temperature(df)
-            validation_results.append(result)
+            validation_results.append((['Leitfähigkeit', 'Wassertemp. (0.5m)'], *result))
         
         # 6. Redox-Sauerstoff-Beziehung
         if all(col in df.columns for col in ['Redoxpotential', 'Gelöster Sauerstoff']):
             result = self._validate_redox_oxygen(df)
-            validation_results.append(result)
+            validation_results.append((['Redoxpotential', 'Gelöster Sauerstoff'], *result))
         
         # 7. Nährstoff-Algen-Beziehung
-        if all(col in df.columns for col in ['Nitrat', 'Chl-a', 'Phycocyanin Abs.']):
+        nutrient_cols = ['Nitrat', 'Chl-a', 'Phycocyanin Abs.']
+        if all(col in df.columns for col in nutrient_cols):
             result = self._validate_nutrient_algae_relationship(df)
-            validation_results.append(result)
-        
-        # Kombiniere alle Ergebnisse
-        for result_flags, result_reasons in validation_results:
-            # Aktualisiere Flags (höchster Wert = schlechtester Flag)
-            flags = pd.concat([flags, result_flags], axis=1).max(axis=1)
-            # Sammle Gründe
-            for idx in result_reasons[result_reasons != ""].index:
-                if reasons[idx] == "":
-                    reasons[idx] = result_reasons[idx]
-                else:
-                    reasons[idx] += "; " + result_reasons[idx]
+            validation_results.append((nutrient_cols, *result))
         
-        return flags, reasons
+        return validation_results
+    
+    @staticmethod
+    def _time_vectors(df: pd.DataFrame, timestamp: Optional[pd.Timestamp]) -> Tuple[np.ndarray, np.ndarray]:
+        """Liefert Stunde und Monat je Zeile - aus `timestamp` oder, falls None, aus dem Index."""
+        if timestamp is None:
+            return df.index.hour.to_numpy(), df.index.month.to_numpy()
+        return np.full(len(df), timestamp.hour), np.full(len(df), timestamp.month)
+    
+    @staticmethod
+    def _values(df: pd.DataFrame, col: str) -> np.ndarray:
+        return df[col].to_numpy(dtype=float)
+    
+    @staticmethod
+    def _result(df: pd.DataFrame, flags: np.ndarray, reasons: ReasonMask) -> Tuple[pd.Series, ReasonMask]:
+        return pd.Series(flags, index=df.index), reasons
     
-    def _validate_ph_oxygen_relationship(self, df: pd.DataFrame, timestamp: pd.Timestamp) -> Tuple[pd.Series, pd.Series]:
+    def _validate_ph_oxygen_relationship(self, df: pd.DataFrame, timestamp: Optional[pd.Timestamp] = None) -> Tuple[pd.Series, ReasonMask]:
         """Validiert die pH-Sauerstoff-Beziehung unter Berücksichtigung der Tageszeit."""
-        flags = pd.Series(QartodFlags.GOOD, index=df.index)
-        reasons = pd.Series("", index=df.index)
-        
-        hour = timestamp.hour
-        is_daylight = 6 <= hour <= 20  # Vereinfachte Annahme
-        
-        ph_values = df['pH']
-        o2_values = df['Gelöster Sauerstoff']
-        
-        for idx in df.index:
-            ph = ph_values.loc[idx]
-            o2 = o2_values.loc[idx]
-            
-            if pd.isna(ph) or pd.isna(o2):
-                continue
-            
-            # Tagsüber: Photosynthese sollte pH und O2 erhöhen
-            if is_daylight:
-                if ph > 8.5 and o2 < 6:
-                    flags.loc[idx] = QartodFlags.SUSPECT
-                    reasons.loc[idx] = "Hoher pH bei niedrigem O2 tagsüber (untypisch für Photosynthese)"
-                elif ph < 7 and o2 > 12:
-                    flags.loc[idx] = QartodFlags.SUSPECT
-                    reasons.loc[idx] = "Niedriger pH bei hohem O2 tagsüber (untypisch)"
-            else:
-                # Nachts: Respiration sollte pH und O2 senken
-                if ph > 8.5 and o2 > 12:
-                    flags.loc[idx] = QartodFlags.SUSPECT
-                    reasons.loc[idx] = "Hoher pH und O2 nachts (keine Photosynthese erwartet)"
+        flags = np.full(len(df), QartodFlags.GOOD, dtype=int)
+        reasons = ReasonMask(df.index)
         
-        return flags, reasons
+        hours, _ = self._time_vectors(df, timestamp)
+        is_daylight = (6 <= hours) & (hours <= 20)  # Vereinfachte Annahme
+        
+        ph = self._values(df, 'pH')
+        o2 = self._values(df, 'Gelöster Sauerstoff')
+        valid = ~np.isnan(ph) & ~np.isnan(o2)
+        
+        # Tagsüber: Photosynthese sollte pH und O2 erhöhen
+        day_high_ph = valid & is_daylight & (ph > 8.5) & (o2 < 6)
+        day_low_ph = valid & is_daylight & ~day_high_ph & (ph < 7) & (o2 > 12)
+        # Nachts: Respiration sollte pH und O2 senken
+        night_high = valid & ~is_daylight & (ph > 8.5) & (o2 > 12)
+        
+        flags[day_high_ph | day_low_ph | night_high] = QartodFlags.SUSPECT
+        reasons.add(day_high_ph, ReasonCodes.PH_O2_DAY_HIGH_PH)
+        reasons.add(day_low_ph, ReasonCodes.PH_O2_DAY_LOW_PH)
+        reasons.add(night_high, ReasonCodes.PH_O2_NIGHT)
+        
+        return self._result(df, flags, reasons)
     
-    def _validate_oxygen_saturation(self, df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    def _validate_oxygen_saturation(self, df: pd.DataFrame) -> Tuple[pd.Series, ReasonMask]:
         """Prüft die Sauerstoffsättigung basierend auf der Wassertemperatur."""
-        flags = pd.Series(QartodFlags.GOOD, index=df.index)
-        reasons = pd.Series("", index=df.index)
+        flags = np.full(len(df), QartodFlags.GOOD, dtype=int)
+        reasons = ReasonMask(df.index)
         
         temp_col = 'Wassertemp. (0.5m)' if 'Wassertemp. (0.5m)' in df.columns else 'Wassertemperatur'
-        temperatures = df[temp_col]
-        o2_values = df['Gelöster Sauerstoff']
-        
-        for idx in df.index:
-            temp = temperatures.loc[idx]
-            o2 = o2_values.loc[idx]
-            
-            if pd.isna(temp) or pd.isna(o2):
-                continue
-            
-            # Berechne theoretische O2-Sättigung
-            saturation_mg_l = self._calculate_o2_saturation(temp)
-            saturation_percent = (o2 / saturation_mg_l) * 100 if saturation_mg_l > 0 else 0
-            
-            # Bewertung der Sättigung
-            if saturation_percent > 140:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = f"Extreme O2-Übersättigung ({saturation_percent:.0f}%) - mögliche starke Algenblüte"
-            elif saturation_percent > 120:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = f"O2-Übersättigung ({saturation_percent:.0f}%) - aktive Photosynthese"
-            elif saturation_percent < 30:
-                flags.loc[idx] = QartodFlags.BAD
-                reasons.loc[idx] = f"Kritisch niedriger O2 ({saturation_percent:.0f}% Sättigung)"
-            elif saturation_percent < 60:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = f"Niedrige O2-Sättigung ({saturation_percent:.0f}%) - mögliche Belastung"
+        temp = self._values(df, temp_col)
+        o2 = self._values(df, 'Gelöster Sauerstoff')
+        valid = ~np.isnan(temp) & ~np.isnan(o2)
         
-        return flags, reasons
+        # Berechne theoretische O2-Sättigung
+        with np.errstate(divide='ignore', invalid='ignore'):
+            saturation_mg_l = self._calculate_o2_saturation(temp)
+            saturation_percent = np.where(saturation_mg_l > 0, (o2 / saturation_mg_l) * 100, 0.0)
+        
+        # Bewertung der Sättigung (erste zutreffende Stufe gewinnt)
+        extreme = valid & (saturation_percent > 140)
+        high = valid & ~extreme & (saturation_percent > 120)
+        critical = valid & (saturation_percent < 30)
+        low = valid & ~critical & (saturation_percent < 60)
+        
+        flags[extreme | high | low] = QartodFlags.SUSPECT
+        flags[critical] = QartodFlags.BAD
+        reasons.add(extreme, ReasonCodes.O2_SATURATION_EXTREME, saturation=saturation_percent)
+        reasons.add(high, ReasonCodes.O2_SATURATION_HIGH, saturation=saturation_percent)
+        reasons.add(critical, ReasonCodes.O2_SATURATION_CRITICAL, saturation=saturation_percent)
+        reasons.add(low, ReasonCodes.O2_SATURATION_LOW, saturation=saturation_percent)
+        
+        return self._result(df, flags, reasons)
     
-    def _calculate_o2_saturation(self, temp_celsius: float, salinity: float = 0) -> float:
+    def _calculate_o2_saturation(self, temp_celsius, salinity: float = 0):
         """
         Berechnet die theoretische O2-Sättigung in mg/L nach Benson & Krause.
-        Für Süßwasser (salinity = 0).
+        Für Süßwasser (salinity = 0). Akzeptiert Skalare und NumPy-Arrays.
         """
         temp_kelvin = temp_celsius + 273.15
         
@@ -182,187 +222,167 @@ class EnhancedCorrelationValidator:
         o2_sat = np.exp(ln_o2_sat) * 1.42905  # Umrechnung in mg/L
         return o2_sat
     
-    def _validate_thermal_stratification(self, df: pd.DataFrame, timestamp: pd.Timestamp) -> Tuple[pd.Series, pd.Series]:
+    def _validate_thermal_stratification(self, df: pd.DataFrame, timestamp: Optional[pd.Timestamp] = None) -> Tuple[pd.Series, ReasonMask]:
         """Prüft die physikalische Plausibilität der Temperaturschichtung."""
-        flags = pd.Series(QartodFlags.GOOD, index=df.index)
-        reasons = pd.Series("", index=df.index)
-        
-        month = timestamp.month
-        is_summer = 5 <= month <= 9
-        
-        for idx in df.index:
-            temp_05m = df.loc[idx, 'Wassertemp. (0.5m)']
-            temp_1m = df.loc[idx, 'Wassertemp. (1m)']
-            temp_2m = df.loc[idx, 'Wassertemp. (2m)']
-            
-            if any(pd.isna([temp_05m, temp_1m, temp_2m])):
-                continue
-            
-            # Temperaturgradienten
-            gradient_upper = temp_05m - temp_1m  # Oberer Gradient
-            gradient_lower = temp_1m - temp_2m    # Unterer Gradient
-            
-            # Inverse Schichtung (Tiefe wärmer als Oberfläche)
-            if temp_2m > temp_05m + 0.5:
-                if is_summer:
-                    flags.loc[idx] = QartodFlags.BAD
-                    reasons.loc[idx] = "Inverse Temperaturschichtung im Sommer (physikalisch unplausibel)"
-                else:
-                    flags.loc[idx] = QartodFlags.SUSPECT
-                    reasons.loc[idx] = "Inverse Temperaturschichtung - für Jahreszeit prüfen"
-            
-            # Extreme Sprungschicht
-            if gradient_upper > 3 or gradient_lower > 3:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = f"Extreme Temperatursprungschicht (>{3}°C/0.5m)"
-            
-            # Instabile Schichtung
-            if 0 < temp_1m - temp_05m < 0.2 and 0 < temp_2m - temp_1m < 0.2:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = "Instabile Temperaturschichtung detektiert"
-        
-        return flags, reasons
+        flags = np.full(len(df), QartodFlags.GOOD, dtype=int)
+        reasons = ReasonMask(df.index)
+        
+        _, months = self._time_vectors(df, timestamp)
+        is_summer = (5 <= months) & (months <= 9)
+        
+        temp_05m = self._values(df, 'Wassertemp. (0.5m)')
+        temp_1m = self._values(df, 'Wassertemp. (1m)')
+        temp_2m = self._values(df, 'Wassertemp. (2m)')
+        valid = ~np.isnan(temp_05m) & ~np.isnan(temp_1m) & ~np.isnan(temp_2m)
+        
+        # Temperaturgradienten
+        gradient_upper = temp_05m - temp_1m  # Oberer Gradient
+        gradient_lower = temp_1m - temp_2m    # Unterer Gradient
+        
+        # Die Prüfungen überschreiben sich in dieser Reihenfolge (letzte gewinnt)
+        # Inverse Schichtung (Tiefe wärmer als Oberfläche)
+        inverse = valid & (temp_2m > temp_05m + 0.5)
+        flags[inverse & is_summer] = QartodFlags.BAD
+        flags[inverse & ~is_summer] = QartodFlags.SUSPECT
+        
+        # Extreme Sprungschicht
+        extreme = valid & ((gradient_upper > 3) | (gradient_lower > 3))
+        flags[extreme] = QartodFlags.SUSPECT
+        
+        # Instabile Schichtung
+        upper_step = temp_1m - temp_05m
+        lower_step = temp_2m - temp_1m
+        unstable = valid & (0 < upper_step) & (upper_step < 0.2) & (0 < lower_step) & (lower_step < 0.2)
+        flags[unstable] = QartodFlags.SUSPECT
+        
+        # Pro Zeile bleibt nur der Grund der zuletzt zutreffenden Prüfung
+        extreme &= ~unstable
+        inverse &= ~extreme & ~unstable
+        reasons.add(inverse & is_summer, ReasonCodes.STRATIFICATION_INVERSE_SUMMER)
+        reasons.add(inverse & ~is_summer, ReasonCodes.STRATIFICATION_INVERSE)
+        reasons.add(extreme, ReasonCodes.STRATIFICATION_EXTREME)
+        reasons.add(unstable, ReasonCodes.STRATIFICATION_UNSTABLE)
+        
+        return self._result(df, flags, reasons)
     
-    def _validate_algae_bloom_indicators(self, df: pd.DataFrame, timestamp: pd.Timestamp) -> Tuple[pd.Series, pd.Series]:
+    def _validate_algae_bloom_indicators(self, df: pd.DataFrame, timestamp: Optional[pd.Timestamp] = None) -> Tuple[pd.Series, ReasonMask]:
         """Erkennt Anzeichen für Algenblüten durch Kombination mehrerer Parameter."""
-        flags = pd.Series(QartodFlags.GOOD, index=df.index)
-        reasons = pd.Series("", index=df.index)
-        
-        hour = timestamp.hour
-        is_daylight = 6 <= hour <= 20
-        
-        for idx in df.index:
-            chl_a = df.loc[idx, 'Chl-a']
-            ph = df.loc[idx, 'pH']
-            o2 = df.loc[idx, 'Gelöster Sauerstoff']
-            turbidity = df.loc[idx, 'Trübung']
-            
-            if any(pd.isna([chl_a, ph, o2, turbidity])):
-                continue
-            
-            # Starke Algenblüte Indikatoren
-            indicators = 0
-            details = []
-            
-            if chl_a > 50:
-                indicators += 1
-                details.append(f"Chl-a hoch ({chl_a:.1f})")
-            
-            if ph > 8.5 and is_daylight:
-                indicators += 1
-                details.append(f"pH erhöht ({ph:.2f})")
-            
-            if o2 > 12 and is_daylight:
-                indicators += 1
-                details.append(f"O2 erhöht ({o2:.1f})")
-            elif o2 < 4 and not is_daylight:
-                indicators += 1
-                details.append(f"O2 kritisch niedrig nachts ({o2:.1f})")
-            
-            if turbidity > 20 and chl_a > 30:
-                indicators += 1
-                details.append("Trübung algenbedingt")
-            
-            # Bewertung
-            if indicators >= 3:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = f"Starke Algenblüte wahrscheinlich: {', '.join(details)}"
-            elif indicators >= 2:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = f"Algenblüte möglich: {', '.join(details)}"
-        
-        return flags, reasons
+        flags = np.full(len(df), QartodFlags.GOOD, dtype=int)
+        reasons = ReasonMask(df.index)
+        
+        hours, _ = self._time_vectors(df, timestamp)
+        is_daylight = (6 <= hours) & (hours <= 20)
+        
+        chl_a = self._values(df, 'Chl-a')
+        ph = self._values(df, 'pH')
+        o2 = self._values(df, 'Gelöster Sauerstoff')
+        turbidity = self._values(df, 'Trübung')
+        valid = ~np.isnan(chl_a) & ~np.isnan(ph) & ~np.isnan(o2) & ~np.isnan(turbidity)
+        
+        # Starke Algenblüte Indikatoren
+        chl_high = chl_a > 50
+        ph_high = (ph > 8.5) & is_daylight
+        o2_high = (o2 > 12) & is_daylight
+        o2_low_night = ~o2_high & (o2 < 4) & ~is_daylight
+        turbidity_algae = (turbidity > 20) & (chl_a > 30)
+        
+        indicators = (chl_high.astype(int) + ph_high + (o2_high | o2_low_night) + turbidity_algae)
+        
+        # Bewertung
+        strong = valid & (indicators >= 3)
+        possible = valid & (indicators == 2)
+        flags[strong | possible] = QartodFlags.SUSPECT
+        
+        # Zutreffende Indikatoren als Bitfeld, Texte werden erst beim Rendern gebildet
+        indicator_bits = (chl_high * ALGAE_CHL_HIGH + ph_high * ALGAE_PH_HIGH + o2_high * ALGAE_O2_HIGH +
+                          o2_low_night * ALGAE_O2_LOW_NIGHT + turbidity_algae * ALGAE_TURBIDITY)
+        for mask, code in ((strong, ReasonCodes.ALGAE_BLOOM_STRONG), (possible, ReasonCodes.ALGAE_BLOOM_POSSIBLE)):
+            reasons.add(mask, code, indicators=indicator_bits, chl_a=chl_a, ph=ph, o2=o2)
+        
+        return self._result(df, flags, reasons)
     
-    def _validate_conductivity_temperature(self, df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    def _validate_conductivity_temperature(self, df: pd.DataFrame) -> Tuple[pd.Series, ReasonMask]:
         """Prüft die Temperaturabhängigkeit der Leitfähigkeit."""
-        flags = pd.Series(QartodFlags.GOOD, index=df.index)
-        reasons = pd.Series("", index=df.index)
+        flags = np.full(len(df), QartodFlags.GOOD, dtype=int)
+        reasons = ReasonMask(df.index)
         
         temp_col = 'Wassertemp. (0.5m)' if 'Wassertemp. (0.5m)' in df.columns else 'Wassertemperatur'
+        temp = self._values(df, temp_col)
+        cond = self._values(df, 'Leitfähigkeit')
+        valid = ~np.isnan(temp) & ~np.isnan(cond)
         
-        # Berechne temperaturkompensierte Leitfähigkeit (auf 25°C normiert)
-        for idx in df.index:
-            temp = df.loc[idx, temp_col]
-            cond = df.loc[idx, 'Leitfähigkeit']
-            
-            if pd.isna(temp) or pd.isna(cond):
-                continue
-            
-            # Temperaturkompensation (2% pro °C)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Temperaturkompensation (2% pro °C, auf 25°C normiert)
             cond_25 = cond / (1 + 0.02 * (temp - 25))
-            
-            # Prüfe ob kompensierte Leitfähigkeit in plausiblem Bereich
-            if cond_25 < 50:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = f"Sehr niedrige Leitfähigkeit ({cond_25:.0f} µS/cm bei 25°C)"
-            elif cond_25 > 1000:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = f"Hohe Leitfähigkeit ({cond_25:.0f} µS/cm bei 25°C) - Verschmutzung?"
-            
-            # Prüfe unrealistische Temperatur-Leitfähigkeits-Kombinationen
-            expected_change = 0.02 * abs(temp - 25) * cond_25
-            if abs(cond - cond_25) > expected_change * 2:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = "Leitfähigkeit-Temperatur-Beziehung unplausibel"
+            # Erwartete Änderung für die Prüfung unrealistischer Kombinationen
+            expected_change = 0.02 * np.abs(temp - 25) * cond_25
+            implausible = valid & (np.abs(cond - cond_25) > expected_change * 2)
         
-        return flags, reasons
+        # Prüfe ob kompensierte Leitfähigkeit in plausiblem Bereich
+        too_low = valid & ~implausible & (cond_25 < 50)
+        too_high = valid & ~implausible & (cond_25 > 1000)
+        
+        flags[too_low | too_high | implausible] = QartodFlags.SUSPECT
+        reasons.add(too_low, ReasonCodes.CONDUCTIVITY_LOW, cond_25=cond_25)
+        reasons.add(too_high, ReasonCodes.CONDUCTIVITY_HIGH, cond_25=cond_25)
+        reasons.add(implausible, ReasonCodes.CONDUCTIVITY_IMPLAUSIBLE)
+        
+        return self._result(df, flags, reasons)
     
-    def _validate_redox_oxygen(self, df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    def _validate_redox_oxygen(self, df: pd.DataFrame) -> Tuple[pd.Series, ReasonMask]:
         """Validiert die Beziehung zwischen Redoxpotential und Sauerstoff."""
-        flags = pd.Series(QartodFlags.GOOD, index=df.index)
-        reasons = pd.Series("", index=df.index)
-        
-        for idx in df.index:
-            redox = df.loc[idx, 'Redoxpotential']
-            o2 = df.loc[idx, 'Gelöster Sauerstoff']
-            
-            if pd.isna(redox) or pd.isna(o2):
-                continue
-            
-            # Redox-Sauerstoff-Beziehung
-            if redox > 300 and o2 < 2:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = "Hohes Redoxpotential bei niedrigem O2 (ungewöhnlich)"
-            elif redox < 0 and o2 > 8:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = "Negatives Redoxpotential bei hohem O2 (widersprüchlich)"
-            elif redox < -100:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = "Stark reduzierende Bedingungen - anaerobe Zone?"
+        flags = np.full(len(df), QartodFlags.GOOD, dtype=int)
+        reasons = ReasonMask(df.index)
         
-        return flags, reasons
+        redox = self._values(df, 'Redoxpotential')
+        o2 = self._values(df, 'Gelöster Sauerstoff')
+        valid = ~np.isnan(redox) & ~np.isnan(o2)
+        
+        # Redox-Sauerstoff-Beziehung (erste zutreffende Bedingung gewinnt)
+        high_redox = valid & (redox > 300) & (o2 < 2)
+        negative_redox = valid & ~high_redox & (redox < 0) & (o2 > 8)
+        reducing = valid & ~high_redox & ~negative_redox & (redox < -100)
+        
+        flags[high_redox | negative_redox | reducing] = QartodFlags.SUSPECT
+        reasons.add(high_redox, ReasonCodes.REDOX_HIGH_LOW_O2)
+        reasons.add(negative_redox, ReasonCodes.REDOX_NEGATIVE_HIGH_O2)
+        reasons.add(reducing, ReasonCodes.REDOX_REDUCING)
+        
+        return self._result(df, flags, reasons)
     
-    def _validate_nutrient_algae_relationship(self, df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    def _validate_nutrient_algae_relationship(self, df: pd.DataFrame) -> Tuple[pd.Series, ReasonMask]:
         """Prüft die Beziehung zwischen Nährstoffen und Algenwachstum."""
-        flags = pd.Series(QartodFlags.GOOD, index=df.index)
-        reasons = pd.Series("", index=df.index)
-        
-        for idx in df.index:
-            nitrate = df.loc[idx, 'Nitrat']
-            chl_a = df.loc[idx, 'Chl-a']
-            phyco = df.loc[idx, 'Phycocyanin Abs.']
-            
-            if any(pd.isna([nitrate, chl_a, phyco])):
-                continue
-            
-            # Nährstofflimitierung vs. Algenwachstum
-            if nitrate < 0.5 and chl_a > 100:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = "Hohes Chl-a trotz Nitrat-Limitierung"
-            
-            # Cyanobakterien-Dominanz
-            if phyco > 50 and chl_a < 20:
-                flags.loc[idx] = QartodFlags.SUSPECT
-                reasons.loc[idx] = "Hoher Phycocyanin bei niedrigem Chl-a - Cyanobakterien-Dominanz"
-            
-            # Verhältnis Phycocyanin zu Chlorophyll
-            if chl_a > 0:
-                phyco_chl_ratio = phyco / chl_a
-                if phyco_chl_ratio > 0.5:
-                    flags.loc[idx] = QartodFlags.SUSPECT
-                    reasons.loc[idx] = f"Hohes Phycocyanin/Chl-a Verhältnis ({phyco_chl_ratio:.2f}) - Blaualgen"
-        
-        return flags, reasons
+        flags = np.full(len(df), QartodFlags.GOOD, dtype=int)
+        reasons = ReasonMask(df.index)
+        
+        nitrate = self._values(df, 'Nitrat')
+        chl_a = self._values(df, 'Chl-a')
+        phyco = self._values(df, 'Phycocyanin Abs.')
+        valid = ~np.isnan(nitrate) & ~np.isnan(chl_a) & ~np.isnan(phyco)
+        
+        # Die Prüfungen überschreiben sich in dieser Reihenfolge (letzte gewinnt)
+        # Nährstofflimitierung vs. Algenwachstum
+        limited = valid & (nitrate < 0.5) & (chl_a > 100)
+        flags[limited] = QartodFlags.SUSPECT
+        
+        # Cyanobakterien-Dominanz
+        cyano = valid & (phyco > 50) & (chl_a < 20)
+        flags[cyano] = QartodFlags.SUSPECT
+        
+        # Verhältnis Phycocyanin zu Chlorophyll
+        with np.errstate(divide='ignore', invalid='ignore'):
+            phyco_chl_ratio = np.where(chl_a > 0, phyco / chl_a, 0.0)
+        high_ratio = valid & (chl_a > 0) & (phyco_chl_ratio > 0.5)
+        flags[high_ratio] = QartodFlags.SUSPECT
+        
+        # Pro Zeile bleibt nur der Grund der zuletzt zutreffenden Prüfung
+        cyano &= ~high_ratio
+        limited &= ~cyano & ~high_ratio
+        reasons.add(limited, ReasonCodes.NUTRIENT_LIMITED)
+        reasons.add(cyano, ReasonCodes.NUTRIENT_CYANOBACTERIA)
+        reasons.add(high_ratio, ReasonCodes.NUTRIENT_PHYCO_RATIO, ratio=phyco_chl_ratio)
+        
+        return self._result(df, flags, reasons)
     
     def calculate_correlation_quality_metrics(self, df: pd.DataFrame, window_hours: int = 24) -> Dict[str, float]:
         """
@@ -417,24 +437,9 @@ def run_enhanced_validation_example(df: pd.DataFrame):
     # Initialisiere Validator
     validator = EnhancedCorrelationValidator()
     
-    # Führe Validierung für jeden Zeitstempel durch
-    all_flags = []
-    all_reasons = []
-    
-    for timestamp in df.index:
-        # Hole Daten für diesen Zeitpunkt
-        row_data = df.loc[[timestamp]]
-        
-        # Führe erweiterte Korrelationsvalidierung durch
-        flags, reasons = validator.validate_all_correlations(row_data, timestamp)
-        
-        all_flags.append(flags)
-        all_reasons.append(reasons)
-    
-    # Kombiniere Ergebnisse
-    final_flags = pd.concat(all_flags)
-    final_reasons = pd.concat(all_reasons)
-    
+    # Führe Validierung für alle Zeitstempel in einem Aufruf durch
+    final_flags, final_reasons = validator.validate_frame(df)
+
     # Berechne Qualitätsmetriken für das gesamte Dataset
     quality_metrics = validator.calculate_correlation_quality_metrics(df)
     
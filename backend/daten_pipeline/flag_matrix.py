@@ -0,0 +1,98 @@
+# flag_matrix.py
+"""
+Vorallokierte Flag-Matrix für alle Validierungstests einer Station.
+
+Statt pro Test eine Spalte an einen wachsenden DataFrame anzuhängen (und die
+Spalten später per Teilstring-Suche wiederzufinden), schreibt jeder Test in
+seinen Ausschnitt eines int8-Arrays der Form (Tests x Parameter x Zeitstempel).
+Die Gründe liegen parallel dazu als ReasonMask pro Parameter vor und werden erst an
+den Ausgaben (Detailbericht, Stundenwerte, Tageskonsolidierung, Datenbank) als
+Texte gebraucht, siehe with_reason_texts.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional
+from reason_codes import ReasonMask
+from consolidation_engine import QartodFlags
+
+# Reihenfolge der Tests in der Pipeline (Achse 0 der Matrix)
+VALIDATION_TESTS = ['range', 'stuck', 'spike', 'multivariate', 'correlation', 'agricultural']
+
+# Wert für "Test hat diesen Parameter/Zeitpunkt nicht bewertet" (kleiner als jeder QARTOD-Flag)
+NOT_SET = 0
+
+
+class FlagMatrix:
+    """
+    Flags aller Tests als int8-Array mit benannten Achsen (tests, parameters, index).
+
+    Nicht beschriebene Zellen bleiben NOT_SET und werden beim Kombinieren ignoriert.
+    """
+
+    def __init__(self, index: pd.Index, parameters: Iterable[str], tests: Iterable[str] = VALIDATION_TESTS):
+        self.index = index
+        self.parameters = list(parameters)
+        self.tests = list(tests)
+        self._param_pos = {param: i for i, param in enumerate(self.parameters)}
+        self._test_pos = {test: i for i, test in enumerate(self.tests)}
+
+        self.flags = np.full((len(self.tests), len(self.parameters), len(index)), NOT_SET, dtype=np.int8)
+        # Welcher Test hat welchen Parameter bewertet (ersetzt die Spaltensuche)
+        self.evaluated = np.zeros((len(self.tests), len(self.parameters)), dtype=bool)
+        self.reasons: Dict[str, ReasonMask] = {param: ReasonMask(index) for param in self.parameters}
+
+    def __contains__(self, param: str) -> bool:
+        return param in self._param_pos
+
+    def set(self, test: str, param: str, flags, reasons: Optional[ReasonMask] = None) -> None:
+        """Schreibt die Flags eines Tests für einen Parameter und ergänzt dessen Gründe."""
+        t, p = self._test_pos[test], self._param_pos[param]
+        self.flags[t, p, :] = np.asarray(flags, dtype=np.int8)
+        self.evaluated[t, p] = True
+        if reasons is not None:
+            self.reasons[param] |= reasons
+
+    def set_all_parameters(self, test: str, flags, reasons: Optional[ReasonMask] = None) -> None:
+        """Schreibt zeilenbezogene Flags eines Tests (z.B. Landwirtschaft) für alle Parameter."""
+        t = self._test_pos[test]
+        self.flags[t, :, :] = np.asarray(flags, dtype=np.int8)[np.newaxis, :]
+        self.evaluated[t, :] = True
+        if reasons is not None:
+            for param in self.parameters:
+                self.reasons[param] |= reasons
+
+    def test_flags(self, test: str, param: str) -> np.ndarray:
+        """Ausschnitt (View) der Flags eines Tests für einen Parameter."""
+        return self.flags[self._test_pos[test], self._param_pos[param]]
+
+    def evaluated_parameters(self) -> list:
+        """Parameter, die von mindestens einem Test bewertet wurden."""
+        return [param for param, done in zip(self.parameters, self.evaluated.any(axis=0)) if done]
+
+    def combine(self) -> pd.DataFrame:
+        """
+        Kombiniert alle Tests per Maximum über die Testachse (höchster Wert = schlechtester Flag).
+        Zellen ohne Bewertung durch irgendeinen Test werden GOOD.
+
+        Returns:
+            pd.DataFrame: Finale Flags mit einer Spalte pro Parameter
+        """
+        combined = self.flags.max(axis=0).astype(int)
+        combined[combined == NOT_SET] = QartodFlags.GOOD
+        return pd.DataFrame(combined.T, index=self.index, columns=self.parameters)
+
+def with_reason_texts(validated_data: pd.DataFrame, reason_masks: Dict[str, ReasonMask]) -> pd.DataFrame:
+    """
+    Ergänzt validierte Daten (Messwerte und flag_-Spalten) um die Spalten reason_<param>,
+    jeweils direkt hinter flag_<param>. Gerendert wird nur, wo ein Grund gesetzt ist;
+    jede ReasonMask rendert ihre Texte nur einmal, auch wenn mehrere Ausgaben sie anfordern.
+    """
+    if not reason_masks:
+        return validated_data
+    result = validated_data.copy()
+    for param, mask in reason_masks.items():
+        flag_col = f'flag_{param}'
+        if flag_col in result.columns:
+            result.insert(result.columns.get_loc(flag_col) + 1, f'reason_{param}', mask.render().to_numpy())
+    return result
@@ -10,13 +10,14 @@ from datetime import datetime
 from typing import Dict, List
 import os
 import glob
-from db_config_loader import load_config_from_db
+from db_config_loader import ConfigSnapshot, load_config_snapshot
 
 
 class HTMLDashboardGenerator:
-    def __init__(self):
-    # Konstruktor benötigt keine Parameter mehr
-        pass
+    def __init__(self, config: ConfigSnapshot = None):
+        # Konfiguration des Laufs (einmal geladen); ohne Angabe wird sie bei Bedarf einmal nachgeladen
+        self.config = config
+        self._legacy = None
         self.template = """
 <!DOCTYPE html>
 <html lang="de">
@@ -1987,7 +1988,7 @@ class HTMLDashboardGenerator:
 
         # Formatiere für bessere Darstellung - Lade aus Datenbank
         try:
-            config = load_config_from_db()
+            config = self._legacy_config()
             validation_rules = config.get('validation_rules', {})
             spike_thresholds = config.get('spike_thresholds', {})
             alert_thresholds = config.get('alert_thresholds', {})
@@ -2213,48 +2214,60 @@ class HTMLDashboardGenerator:
         html += '</div>'
         return html
     
-def _get_unit_for_parameter(self, param: str) -> str:
-    """Gibt die Einheit für einen Parameter zurück"""
-    try:
-        # Lade Konfiguration aus Datenbank
-        config = load_config_from_db()
-        validation_rules = config.get('validation_rules', {})
-        
-        # Suche Parameter in den Validierungsregeln
-        for param_key, rule in validation_rules.items():
-            if param_key.lower() == param.lower() or param_key in param:
-                return rule.get('unit', '')
-        
-        # Fallback: Hard-codierte Einheiten für Notfall
-        units = {
-            'Phycocyanin Abs.': 'µg/L',
-            'TOC': 'mg/L',
-            'Trübung': 'NTU',
-            'Chl-a': 'µg/L',
-            'DOC': 'mg/L',
-            'Nitrat': 'mg/L',
-            'Gelöster Sauerstoff': 'mg/L',
-            'Leitfähigkeit': 'µS/cm',
-            'pH': '',
-            'Redoxpotential': 'mV',
-            'Wassertemperatur': '°C',
-            'Lufttemperatur': '°C'
-        }
-        return units.get(param, '')
-    except Exception as e:
-        print(f"Fehler beim Laden der Einheiten: {e}")
-        return ''
+    def _legacy_config(self) -> Dict:
+        """Konfiguration im Format von load_config_from_db (einmal pro Generator aufbereitet)."""
+        if self._legacy is None:
+            if self.config is None:
+                self.config = load_config_snapshot()
+            self._legacy = self.config.as_legacy_config()
+        return self._legacy
+
+    def _get_unit_for_parameter(self, param: str) -> str:
+        """Gibt die Einheit für einen Parameter zurück"""
+        try:
+            # Konfiguration des Laufs (keine erneute Datenbankabfrage pro Parameter)
+            validation_rules = self._legacy_config().get('validation_rules', {})
+
+            # Suche Parameter in den Validierungsregeln
+            for param_key, rule in validation_rules.items():
+                if param_key.lower() == param.lower() or param_key in param:
+                    return rule.get('unit', '')
+
+            # Fallback: Hard-codierte Einheiten für Notfall
+            units = {
+                'Phycocyanin Abs.': 'µg/L',
+                'TOC': 'mg/L',
+                'Trübung': 'NTU',
+                'Chl-a': 'µg/L',
+                'DOC': 'mg/L',
+                'Nitrat': 'mg/L',
+                'Gelöster Sauerstoff': 'mg/L',
+                'Leitfähigkeit': 'µS/cm',
+                'pH': '',
+                'Redoxpotential': 'mV',
+                'Wassertemperatur': '°C',
+                'Lufttemperatur': '°C'
+            }
+            return units.get(param, '')
+        except Exception as e:
+            print(f"Fehler beim Laden der Einheiten: {e}")
+            return ''
 
 
 # Integration in main_pipeline.py
-def generate_html_dashboard(analysis_results: Dict, output_dir: str, station_id: str):
-    """Wrapper-Funktion für die Integration in main_pipeline.py"""
+def generate_html_dashboard(analysis_results: Dict, output_dir: str, station_id: str,
+                            config: ConfigSnapshot = None):
+    """
+    Wrapper-Funktion für die Integration in main_pipeline.py
+
+    `config` ist die einmal pro Lauf geladene Konfiguration; ohne Angabe wird sie geladen.
+    """
     
     # Station-Metadaten aus config laden
     try:
-        config = load_config_from_db()
-        stations = config.get('stations', {})
-        station_metadata = stations.get(station_id, {})
+        if config is None:
+            config = load_config_snapshot()
+        station_metadata = config.get_station(station_id) or {}
     except Exception as e:
         print(f"Fehler beim Laden der Station-Metadaten: {e}")
         station_metadata = {}
@@ -2285,7 +2298,7 @@ def generate_html_dashboard(analysis_results: Dict, output_dir: str, station_id:
         print("WARNUNG: Kein validierung_details.txt gefunden")
     
     # Dashboard generieren
-    generator = HTMLDashboardGenerator()
+    generator = HTMLDashboardGenerator(config)
     html_content = generator.generate_dashboard(
         analysis_results, 
         station_metadata,
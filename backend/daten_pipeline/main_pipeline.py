@@ -1,17 +1,21 @@
 import pandas as pd
 import numpy as np
+import io
 import os
 import sys
 import json
+import traceback
 from datetime import datetime
 import re
 import warnings
-from html_dashboard_generator import generate_html_dashboard
 from typing import Dict, List, Tuple
 import argparse
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
 # from config_file import CONSOLIDATION_RULES, PRECISION_RULES
-from db_config_loader import DbConfigLoader # NEU
-from config_file import PRECISION_RULES, CONSOLIDATION_RULES
+from db_config_loader import load_config_snapshot
+from db_pool import close_pool
+from config_file import PRECISION_RULES, CONSOLIDATION_RULES, ROLLUPS, VALIDATION_GRAPH, BASELINES
 
 def check_station_data_quality(station_id: str, station_config: Dict) -> None:
     """Prüft und warnt bei unverifizierten Stationsdaten"""
@@ -25,43 +29,24 @@ def check_station_data_quality(station_id: str, station_config: Dict) -> None:
 warnings.filterwarnings('ignore')
 
 # Importiere die bekannten Validierungs-Skripte
-from metadata_mapper import load_metadata, create_column_mapping, map_columns_to_names
-from validator import WaterQualityValidator
-from stuck_value_validator import check_stuck_values
-from spike_validator import check_spikes
-from multivariate_validator import check_multivariate_anomalies
-from interpolating_consolidator import interpolate_and_aggregate
+from metadata_mapper import load_metadata, create_column_mapping
+from wamo_csv_reader import read_station_files
+from flag_matrix import FlagMatrix, with_reason_texts
+from stuck_value_validator import get_stuck_rule
+from basic_validation import run_basic_validation
+from pipeline_graph import PipelineGraph, Stage
+from interpolating_consolidator import consolidate_station_frame
+from daily_sketch import build_daily_sketches, merge_daily_sketches, finalize_daily_sketches
+from rollup_store import RollupStore
+from baseline_engine import BaselineEngine
 from DatabaseLoader import DatabaseLoader
 
-# NEU - Importiere die erweiterten Validatoren
-try:
-    from enhanced_correlation_validator import EnhancedCorrelationValidator
-    CORRELATION_AVAILABLE = True
-except ImportError:
-    print("WARNUNG: enhanced_correlation_validator nicht gefunden - wird übersprungen")
-    CORRELATION_AVAILABLE = False
-
-try:
-    from agricultural_runoff_detector import AgriculturalRunoffDetector
-    AGRICULTURAL_AVAILABLE = True
-except ImportError:
-    print("WARNUNG: agricultural_runoff_detector nicht gefunden - wird übersprungen")
-    AGRICULTURAL_AVAILABLE = False
-
-try:
-    from regional_config_mv import RegionalConfigMV
-    REGIONAL_AVAILABLE = True
-except ImportError:
-    print("WARNUNG: regional_config_mv nicht gefunden - wird übersprungen")
-    REGIONAL_AVAILABLE = False
-
-# Konfiguration
-VALIDATION_MODULES = {
-    'basic': True,
-    'correlation': CORRELATION_AVAILABLE,
-    'agricultural': AGRICULTURAL_AVAILABLE,
-    'regional': REGIONAL_AVAILABLE
-}
+# Optionale Module (multivariat, Korrelation, Landwirtschaft, Regional, Dashboard)
+# werden erst bei der ersten Verwendung importiert - siehe validator_registry.py
+from validator_registry import validators
+
+# Konfiguration: aktiviert in config_file.VALIDATION_MODULES und Modul vorhanden (ohne Import geprüft)
+VALIDATION_MODULES = {'basic': True, **validators.status()}
 
 def berechne_gesamtbewertung(ergebnisse):
     """Berechnet Gesamtstatus aus allen Validierungsergebnissen"""
@@ -141,19 +126,819 @@ def erstelle_opendata_version(vollstaendige_ergebnisse):
     
     return opendata
 
-def run_validation_pipeline(input_dir: str, output_dir: str, metadata_path: str):
+class PipelineContext:
+    """
+    Zustand, der über mehrere Läufe hinweg warm bleiben kann (Worker-Modus, siehe
+    pipeline_worker.py): Konfiguration, Isolation-Forest-Modelle und Perioden-Rollups.
+    """
+
+    def __init__(self, config=None):
+        self.config = config
+        self._model_store = None
+        self.rollup_store = RollupStore()
+        self._baseline_engines = {}
+
+    @property
+    def model_store(self):
+        """Persistierte Isolation-Forest-Modelle (pro Station und Jahreszeit), erst bei Bedarf geladen."""
+        if self._model_store is None:
+            from multivariate_model_store import MultivariateModelStore
+            self._model_store = MultivariateModelStore()
+        return self._model_store
+
+    def baseline_settings(self, station_id):
+        """Fenster und Modus der Baselines einer Station (BASELINES, ggf. mit Stationsabweichung)."""
+        settings = {key: value for key, value in BASELINES.items() if key != 'stations'}
+        settings.update(BASELINES.get('stations', {}).get(station_id, {}))
+        return settings
+
+    def baseline_engine(self, station_id, df):
+        """
+        BaselineEngine der Station für die Daten dieses Laufs. Bei denselben Daten wird die
+        vorhandene Engine (mit ihren bereits berechneten Baselines) weiterverwendet.
+        """
+        engine = self._baseline_engines.get(station_id)
+        if engine is None or engine.df is not df:
+            settings = self.baseline_settings(station_id)
+            engine = BaselineEngine(df, approximate=settings['mode'] == 'approximate',
+                                    resolution_hours=settings['resolution_hours'])
+            self._baseline_engines[station_id] = engine
+        return engine
+
+    def refresh_config(self):
+        """Aktualisiert die Konfiguration (neu geladen wird nur bei geänderter config_version)."""
+        self.config = load_config_snapshot()
+        return self.config
+
+
+# --- Stufen des Ablaufgraphen einer Station (siehe STATION_GRAPH) ---
+
+def stage_basic(processed_data, validation_rules, seasonal_rules, stuck_rules, spike_rules):
+    """3. Basis-Validierungen: Range, Stuck und Spike pro Parameter."""
+    print("Führe Basis-Validierungen durch...")
+    # Flags aller Tests (Tests x Parameter x Zeitstempel) und Gründe als Bitmaske pro Parameter
+    flag_matrix = FlagMatrix(processed_data.index, processed_data.columns)
+
+    # Range, Stuck (Flat-Line mit Toleranz) und Spike pro Parameter - je nach
+    # BASIC_VALIDATION seriell oder parallel (Threads / Prozesse über shared memory)
+    basic_mode = run_basic_validation(processed_data, flag_matrix, validation_rules, seasonal_rules,
+                                      stuck_rules, spike_rules)
+    if basic_mode != 'serial':
+        print(f"  - Basis-Tests parallel ausgeführt ({basic_mode})")
+    return {'flag_matrix': flag_matrix}
+
+
+def stage_multivariate(processed_data, station_id, context):
+    """4. Multivariate Validierung der Kernparameter."""
+    cross_validation_cols = ['Wassertemp. (0.5m)', 'pH', 'Gelöster Sauerstoff', 'Leitfähigkeit', 'Trübung']
+    cols_to_check = [col for col in cross_validation_cols if col in processed_data.columns]
+
+    check_multivariate_anomalies = validators.get('multivariate') if len(cols_to_check) > 1 else None
+    if not check_multivariate_anomalies:
+        return {'multivariate_flags': None}
+
+    print("Führe multivariate Validierung durch...")
+    multi_flags_dict, multi_reasons_dict = check_multivariate_anomalies(
+        processed_data, cols_to_check, as_codes=True,
+        station_id=station_id, model_store=context.model_store
+    )
+    multivariate_flags = {col_name: (multi_flags_dict[col_name], multi_reasons_dict[col_name])
+                          for col_name in cols_to_check if col_name in multi_flags_dict}
+    return {'multivariate_flags': multivariate_flags}
+
+
+def stage_correlation(processed_data):
+    """5. Erweiterte Korrelationsvalidierung."""
+    EnhancedCorrelationValidator = validators.get('correlation')
+    if not EnhancedCorrelationValidator:
+        return {'correlation_flags': None, 'correlation_results': None}
+
+    print("Führe erweiterte Korrelationsvalidierung durch...")
+    correlation_validator = EnhancedCorrelationValidator()
+
+    # Alle Zeitstempel in einem Aufruf - Flags/Gründe pro geprüftem Parameter
+    corr_flags, corr_reasons = correlation_validator.validate_frame(processed_data, as_codes=True)
+    correlation_flags = {param: (corr_flags[param], corr_reasons[param]) for param in corr_flags.columns}
+
+    # Berechne Qualitätsmetriken
+    correlation_results = correlation_validator.calculate_correlation_quality_metrics(
+        processed_data.last('24H')
+    )
+    print(f"Korrelationsqualität: {correlation_results.get('overall_correlation_quality', 0):.1f}%")
+    return {'correlation_flags': correlation_flags, 'correlation_results': correlation_results}
+
+
+def stage_agricultural(processed_data, station_id, context):
+    """6. Landwirtschaftliche Einträge erkennen."""
+    AgriculturalRunoffDetector = validators.get('agricultural')
+    if not AgriculturalRunoffDetector:
+        return {'agricultural_flags': None, 'agricultural_results': None, 'agri_detector': None}
+
+    print("Prüfe auf landwirtschaftliche Einträge...")
+    agri_detector = AgriculturalRunoffDetector()
+    agri_flags, agri_reasons, agri_analysis = agri_detector.detect_agricultural_runoff(
+        processed_data,
+        weather_data=None,
+        lookback_hours=context.baseline_settings(station_id)['lookback_hours'],
+        as_codes=True,
+        baseline_engine=context.baseline_engine(station_id, processed_data),
+        analyze_trends=False  # nach der Validierung in stage_trends
+    )
+    print(f"Landwirtschaftlicher Risiko-Index: {agri_analysis['risk_indicators'].get('overall_agricultural_risk', 0):.1f}")
+    return {'agricultural_flags': (agri_flags, agri_reasons), 'agricultural_results': agri_analysis,
+            'agri_detector': agri_detector}
+
+
+def stage_trends(validated_data, aggregation_rules, station_id, context, agri_detector, rollups_updated):
+    """
+    Langzeittrends aus den Wochen-Rollups einschließlich der Stunden dieses Laufs.
+    Läuft nach stage_database (Eingabe rollups_updated): dort werden die Rollups
+    fortgeschrieben, Lesen und Schreiben überschneiden sich so nie. Ohne Datenbank
+    wurden sie nicht fortgeschrieben; die Stunden dieses Laufs werden dann nur für die
+    Trendanalyse in die gespeicherten Wochen eingemischt.
+    """
+    if agri_detector is None:
+        return {'long_term_trends': None}
+
+    pending = None if rollups_updated else build_daily_sketches(validated_data, aggregation_rules)
+    weekly_history = context.rollup_store.series(station_id, 'week', pending=pending).tail(ROLLUPS['trend_weeks'])
+    if len(validated_data) <= 24 * 7 and len(weekly_history) < 4:
+        return {'long_term_trends': None}
+    # validated_data enthält die Flags: aktuelle Wochen wie die Rollups nur aus GOOD-Werten
+    return {'long_term_trends': agri_detector.analyze_long_term_trends(validated_data, weekly_history)}
+
+
+def stage_regional(processed_data, station_id, rules_for_station):
+    """7. Regionale Anpassungen."""
+    RegionalConfigMV = validators.get('regional')
+    if not RegionalConfigMV:
+        return {'regional_results': None, 'current_season': None, 'regional_config': None}
+
+    print("Wende regionale Konfiguration an...")
+    # Filtere die relevanten Regeln aus dem DB-Loader
+    regional_db_rules = [r for r in rules_for_station if r['rule_type'] in ['SEASONAL_EVENT', 'RANGE_REGIONAL']]
+    # Initialisiere die Klasse mit den Datenbank-Regeln
+    regional_config = RegionalConfigMV(regional_db_rules)
+
+    # Hole saisonale Faktoren
+    current_season = regional_config.get_season_factor(processed_data.index[-1])
+    print(f"Landwirtschaftliche Phase: {current_season['aktivität']}")
+
+    # Regionale Interpretationen
+    latest_values = processed_data.iloc[-1]
+    regional_results = {}
+
+    for param in ['Nitrat', 'DOC', 'Leitfähigkeit']:
+        if param in latest_values and not pd.isna(latest_values[param]):
+            status, interpretation = regional_config.get_regional_interpretation(
+                param.lower(),
+                latest_values[param],
+                processed_data.index[-1],
+                station_id
+            )
+            regional_results[param] = {
+                "wert": float(latest_values[param]),
+                "status": status,
+                "interpretation": interpretation
+            }
+    return {'regional_results': regional_results, 'current_season': current_season,
+            'regional_config': regional_config}
+
+
+def stage_combine(processed_data, flag_matrix, multivariate_flags, correlation_flags, agricultural_flags):
+    """
+    8. Finale Flags pro Parameter aus allen Tests. Die Gründe bleiben ReasonMasks
+    (reason_masks) und werden erst an den Ausgaben gerendert (with_reason_texts).
+    """
+    # Flags der erweiterten Validierungen in fester Reihenfolge übernehmen
+    # (die Stufen selbst laufen parallel und schreiben nicht in die Matrix)
+    for col_name, (flags, reasons) in (multivariate_flags or {}).items():
+        flag_matrix.set('multivariate', col_name, flags, reasons)
+    for param, (flags, reasons) in (correlation_flags or {}).items():
+        flag_matrix.set('correlation', param, flags, reasons)
+    if agricultural_flags is not None:
+        # Zeilenbezogen, gelten für alle Parameter
+        flag_matrix.set_all_parameters('agricultural', *agricultural_flags)
+
+    print("Kombiniere alle Validierungsergebnisse...")
+
+    # Maximum über die Testachse
+    evaluated_params = flag_matrix.evaluated_parameters()
+    final_flags = flag_matrix.combine()
+
+    result_columns = {f'flag_{param_name}': final_flags[param_name] for param_name in evaluated_params}
+    validated_data = pd.concat([processed_data, pd.DataFrame(result_columns, index=processed_data.index)], axis=1)
+    reason_masks = {param_name: flag_matrix.reasons[param_name] for param_name in evaluated_params}
+    return {'validated_data': validated_data, 'reason_masks': reason_masks}
+
+
+def stage_detail_report(validated_data, reason_masks, station_id, output_dir):
+    """Validierungs-Detailbericht nach allen Validierungen."""
+    detail_report_path = None
+    try:
+        from validation_detail_report import generate_validation_details
+        detail_report_path = generate_validation_details(
+            with_reason_texts(validated_data, reason_masks), 
+            station_id, 
+            output_dir
+        )
+        print(f"Vollständiger Validierungsbericht: {detail_report_path}")
+    except Exception as e:
+        print(f"Fehler beim Erstellen des Detail-Berichts: {e}")
+    return {'detail_report_path': detail_report_path}
+
+
+def stage_hourly_measurements(validated_data, reason_masks, station_id, applied_rules, db_loader, output_dir,
+                              source_file, reserved_run_id):
+    """
+    Stundenwerte direkt per Bulk-COPY in hourly_measurements laden, markiert mit dem
+    Validierungslauf; die JSON-Datei für Node entsteht nur noch als Rückfallweg.
+    """
+    validation_run_id = reserved_run_id
+    hourly_frame = hourly_measurements_frame(with_reason_texts(validated_data, reason_masks), station_id,
+                                             applied_rules)
+    hourly_loaded = False
+    if db_loader.conn:
+        try:
+            if validation_run_id is None:
+                validation_run_id = db_loader.create_validation_run(station_id, source_file)
+            hourly_frame['validation_run_id'] = validation_run_id
+            db_loader.insert_hourly_measurements(hourly_frame)
+            hourly_frame = hourly_frame.drop(columns='validation_run_id')
+            hourly_loaded = True
+        except Exception as e:
+            print(f"Fehler beim Laden der Stundenwerte (COPY): {e}")
+            hourly_frame = hourly_frame.drop(columns='validation_run_id', errors='ignore')
+    if not hourly_loaded:
+        validation_run_id = None
+        save_hourly_data_for_db(
+            validated_data, 
+            station_id, 
+            output_dir,
+            applied_rules,
+            hourly_frame
+        )
+    return {'validation_run_id': validation_run_id}
+
+
+def stage_consolidation(validated_data, reason_masks):
+    """9. Tageskonsolidierung."""
+    print("Erstelle Tageskonsolidierung...")
+
+    # Verfügbare Parameter
+    actual_params = [col for col in validated_data.columns 
+                    if not col.startswith('flag_') and not col.startswith('reason_')]
+    print(f"\nVerfügbare Parameter: {len(actual_params)}")
+
+    aggregation_rules = {}
+    for param in actual_params:
+        # Verwende die Regeln aus config_file.py
+        if param in CONSOLIDATION_RULES:
+            aggregation_rules[param] = CONSOLIDATION_RULES[param]
+        else:
+            # Fallback auf default
+            aggregation_rules[param] = CONSOLIDATION_RULES.get('default', ['min', 'max', 'mean'])
+
+    # Tageskonsolidierung aller Tage und Parameter in einem Durchlauf
+    try:
+        daily_results = consolidate_station_frame(
+            with_reason_texts(validated_data, reason_masks),
+            parameter_rules=aggregation_rules,
+            precision_rules=PRECISION_RULES
+        )
+    except Exception as e:
+        print(f"Fehler bei Tagesaggregation: {str(e)}")
+        daily_results = pd.DataFrame()
+
+    print(f"\nTageskonsolidierung: {len(daily_results)} Tage erfolgreich aggregiert")
+
+    # Rest der Pipeline
+    if daily_results.empty:
+        print(f"\nWARNUNG: Keine validen Tageswerte gefunden!")
+    else:
+        print(f"Tageskonsolidierung erfolgreich: {len(daily_results)} Tage")
+    return {'daily_results': daily_results, 'aggregation_rules': aggregation_rules}
+
+
+def stage_results(station_id, validation_run_id, validated_data, daily_results, correlation_results,
+                  agricultural_results, agri_detector, long_term_trends, regional_results, current_season,
+                  regional_config, output_dir):
+    """10./11. Erweiterte Ergebnisse, Gesamtbewertung und Handlungsempfehlungen."""
+    if agricultural_results and long_term_trends is not None:
+        agricultural_results = {**agricultural_results, 'long_term_trends': long_term_trends}
+    erweiterte_ergebnisse = {
+        "station_id": station_id,
+        "validation_run_id": validation_run_id,
+        "zeitraum": {
+            "von": validated_data.index.min().isoformat(),
+            "bis": validated_data.index.max().isoformat()
+        },
+        "basis_validierung": {date.strftime('%Y-%m-%d'): values for date, values in daily_results.to_dict(orient='index').items()} if not daily_results.empty else {},
+
+        # "basis_validierung": {pd.to_datetime(date).strftime('%Y-%m-%d'): values for date, values in daily_results.to_dict(orient='index').items()} if not daily_results.empty else {},
+        "erweiterte_analysen": {}
+    }
+
+    # Füge erweiterte Analysen hinzu
+    if correlation_results:
+        erweiterte_ergebnisse["erweiterte_analysen"]["korrelations_qualitaet"] = {
+            "metriken": correlation_results,
+            "gesamtqualitaet": correlation_results.get('overall_correlation_quality', 0),
+            "auffaellige_korrelationen": []
+        }
+
+        # Finde auffällige Korrelationen
+        for key, value in correlation_results.items():
+            if 'actual_correlation' in key and 'quality' not in key:
+                param_pair = key.replace('_actual_correlation', '')
+                quality_key = f"{param_pair}_correlation_quality"
+                if quality_key in correlation_results and correlation_results[quality_key] < 50:
+                    erweiterte_ergebnisse["erweiterte_analysen"]["korrelations_qualitaet"]["auffaellige_korrelationen"].append({
+                        "parameter": param_pair,
+                        "korrelation": round(value, 3),
+                        "qualitaet": round(correlation_results[quality_key], 1)
+                    })
+
+    if agricultural_results:
+        erweiterte_ergebnisse["erweiterte_analysen"]["landwirtschaftliche_eintraege"] = {
+            "risiko_index": agricultural_results['risk_indicators'].get('overall_agricultural_risk', 0),
+            "erkannte_ereignisse": agricultural_results['detected_events'],
+            "risiko_indikatoren": agricultural_results['risk_indicators'],
+            "langzeit_trends": agricultural_results.get('long_term_trends', {})
+        }
+
+        # Generiere Textbericht
+        if agricultural_results['detected_events'] and VALIDATION_MODULES['agricultural']:
+            bericht = agri_detector.generate_report(
+                agricultural_results,
+                validated_data.index[0],
+                validated_data.index[-1]
+            )
+            # Speichere Bericht separat
+            bericht_path = os.path.join(output_dir, f"landwirtschaft_bericht_{station_id}_{datetime.now().strftime('%Y%m%d')}.txt")
+            with open(bericht_path, 'w', encoding='utf-8') as f:
+                f.write(bericht)
+            print(f"Landwirtschaftsbericht erstellt: {bericht_path}")
+
+    if regional_results:
+        erweiterte_ergebnisse["erweiterte_analysen"]["regionale_bewertung"] = {
+            "saison_faktoren": current_season,
+            "parameter_bewertungen": regional_results
+        }
+
+        # Füge regionale Empfehlungen hinzu
+        if VALIDATION_MODULES['regional'] and agricultural_results:
+            empfehlungen = regional_config.generate_regional_recommendations(
+                agricultural_results,
+                station_id,
+                validated_data.index[-1]
+            )
+            erweiterte_ergebnisse["erweiterte_analysen"]["regionale_bewertung"]["empfehlungen"] = empfehlungen
+
+    # 11. Zusammenfassung und Handlungsempfehlungen
+    erweiterte_ergebnisse["zusammenfassung"] = berechne_gesamtbewertung(erweiterte_ergebnisse)
+    return {'erweiterte_ergebnisse': erweiterte_ergebnisse}
+
+
+def stage_result_files(erweiterte_ergebnisse, daily_results, station_id, output_dir):
+    """12. Ergebnisdateien: vollständige Analyse, Open-Data-Version, CSV und Textzusammenfassung."""
+    gesamtbewertung = erweiterte_ergebnisse['zusammenfassung']
+    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    # Hauptergebnis-Datei (vollständig)
+    output_filename = f"erweiterte_analyse_{station_id}_{timestamp_str}.json"
+    output_filepath = os.path.join(output_dir, output_filename)
+
+    with open(output_filepath, 'w', encoding='utf-8') as f:
+        json.dump(erweiterte_ergebnisse, f, indent=4, ensure_ascii=False, default=str)
+
+    print(f"\nErweiterte Analyse gespeichert in: {output_filepath}")
+
+    # Open-Data Version (anonymisiert)
+    opendata_ergebnisse = erstelle_opendata_version(erweiterte_ergebnisse)
+    opendata_filepath = os.path.join(output_dir, f"opendata_{station_id}_{timestamp_str}.json")
+
+    with open(opendata_filepath, 'w', encoding='utf-8') as f:
+        json.dump(opendata_ergebnisse, f, indent=4, ensure_ascii=False, default=str)
+
+    print(f"Open-Data Version gespeichert in: {opendata_filepath}")
+
+    # CSV-Export für Excel-Nutzer
+    csv_filepath = os.path.join(output_dir, f"tageswerte_{station_id}_{timestamp_str}.csv")
+    daily_results.to_csv(csv_filepath, sep=';', decimal=',', encoding='utf-8-sig')
+    print(f"CSV-Export gespeichert in: {csv_filepath}")
+
+    # Textbasierte Zusammenfassung erstellen
+    zusammenfassung_filepath = os.path.join(output_dir, f"zusammenfassung_{station_id}_{timestamp_str}.txt")
+    with open(zusammenfassung_filepath, 'w', encoding='utf-8') as f:
+        f.write(f"WAMO GEWÄSSERMONITORING - ZUSAMMENFASSUNG\n")
+        f.write(f"{'=' * 50}\n\n")
+        f.write(f"Station: {station_id}\n")
+        f.write(f"Zeitraum: {erweiterte_ergebnisse['zeitraum']['von']} bis {erweiterte_ergebnisse['zeitraum']['bis']}\n")
+        f.write(f"Erstellt: {datetime.now().strftime('%d.%m.%Y %H:%M Uhr')}\n\n")
+
+        f.write(f"GESAMTSTATUS: {gesamtbewertung['status'].upper()}\n")
+        f.write(f"{'=' * 50}\n\n")
+
+        if gesamtbewertung['hauptprobleme']:
+            f.write("IDENTIFIZIERTE PROBLEME:\n")
+            for problem in gesamtbewertung['hauptprobleme']:
+                f.write(f"• {problem}\n")
+            f.write("\n")
+
+        if gesamtbewertung['sofortmassnahmen']:
+            f.write("ERFORDERLICHE SOFORTMASSNAHMEN:\n")
+            for massnahme in gesamtbewertung['sofortmassnahmen']:
+                f.write(f"→ {massnahme}\n")
+            f.write("\n")
+
+        if gesamtbewertung['meldepflichten']:
+            f.write("MELDEPFLICHTEN:\n")
+            for meldung in gesamtbewertung['meldepflichten']:
+                f.write(f"! {meldung}\n")
+            f.write("\n")
+
+        # Risiko-Indikatoren
+        f.write("RISIKO-INDIKATOREN:\n")
+        if 'landwirtschaftliche_eintraege' in erweiterte_ergebnisse['erweiterte_analysen']:
+            risk = erweiterte_ergebnisse['erweiterte_analysen']['landwirtschaftliche_eintraege']['risiko_index']
+            f.write(f"• Landwirtschaftlicher Einfluss: {risk:.1f}/100\n")
+        if 'korrelations_qualitaet' in erweiterte_ergebnisse['erweiterte_analysen']:
+            quality = erweiterte_ergebnisse['erweiterte_analysen']['korrelations_qualitaet']['gesamtqualitaet']
+            f.write(f"• Sensorplausibilität: {quality:.1f}%\n")
+        f.write("\n")
+
+        f.write("KONTAKTE FÜR RÜCKFRAGEN:\n")
+        f.write("• Untere Wasserbehörde LK VG: 03834-8760-0\n")
+        f.write("• Gesundheitsamt LK VG: 03834-8760-2301\n")
+        f.write("• StALU MS: 0395-380-0\n")
+
+    print(f"Zusammenfassung gespeichert in: {zusammenfassung_filepath}")
+
+    return {'result_files': [output_filepath, opendata_filepath, csv_filepath, zusammenfassung_filepath]}
+
+
+def stage_dashboard(erweiterte_ergebnisse, station_id, output_dir, config):
+    """HTML-Dashboard."""
+    generate_html_dashboard = validators.get('dashboard')
+    html_filepath = None
+    if generate_html_dashboard:
+        html_filepath = generate_html_dashboard(erweiterte_ergebnisse, output_dir, station_id, config)
+    return {'dashboard_path': html_filepath}
+
+
+def stage_database(validated_data, reason_masks, daily_results, aggregation_rules, station_id, db_loader, context):
+    """
+    13. Tageswerte, Tageszustände und Rollups in die Datenbank schreiben.
+
+    Returns:
+        rollups_updated: True, wenn die Stunden dieses Laufs in die Rollups eingemischt wurden
+    """
+    rollups_updated = False
+    if not daily_results.empty:
+        print("\nStarte das Laden der Daten in die Datenbank...")
+        # Debug-Ausgabe hinzufügen
+        print(f"\n=== DEBUG: Speichere Tageswerte ===")
+        for date in daily_results.index:
+            print(f"Python sendet Datum: {date.strftime('%Y-%m-%d')}")
+        print("===================================\n")
+        if db_loader.conn:
+            try:
+                # Schritt 1: Daten aufbereiten (wie zuvor)
+                wert_cols = {col: col.replace('_Mittelwert', '') for col in daily_results.columns if col.endswith('_Mittelwert')}
+                flag_cols = {col: col.replace('_Aggregat_QARTOD_Flag', '') for col in daily_results.columns if col.endswith('_Aggregat_QARTOD_Flag')}
+
+                wert_df = daily_results[list(wert_cols.keys())].rename(columns=wert_cols)
+                wert_df = wert_df.reset_index().melt(id_vars=['Datum'], var_name='parameter', value_name='wert')
+
+                flag_df = daily_results[list(flag_cols.keys())].rename(columns=flag_cols)
+                flag_df = flag_df.reset_index().melt(id_vars=['Datum'], var_name='parameter', value_name='qualitaets_flag')
+
+                merged_data = pd.merge(wert_df, flag_df, on=['Datum', 'parameter'], how='outer')
+
+                merged_data.rename(columns={'Datum': 'zeitstempel'}, inplace=True)
+                merged_data['see'] = station_id
+
+                db_data = merged_data.dropna(subset=['wert'])
+
+                # Schritt 2: Sicherstellen, dass der Zeitstempel ein Python-DateTime-Objekt ist
+                db_data['zeitstempel'] = pd.to_datetime(db_data['zeitstempel'])
+
+                # Schritt 3: DataFrame direkt an den Loader übergeben (Bulk-COPY)
+                db_loader.insert_validated_data(db_data[['zeitstempel', 'see', 'parameter', 'wert', 'qualitaets_flag']])
+
+                # NEU: Speichere auch daily_aggregations direkt (wie messwerte!)
+                # Über zusammenführbare Tageszustände: Teil-Uploads ergänzen einen
+                # gespeicherten Tag, statt ihn mit Teilstatistiken zu überschreiben
+                try:
+                    days = validated_data.index.normalize().unique()
+                    existing_sketches = db_loader.fetch_daily_sketches(station_id, list(days))
+                    new_sketches = build_daily_sketches(with_reason_texts(validated_data, reason_masks),
+                                                        aggregation_rules)
+                    changed_sketches, increments, replaced = merge_daily_sketches(existing_sketches, new_sketches)
+                    db_loader.upsert_daily_sketches(station_id, changed_sketches)
+                    # Woche/Monat/Badesaison erst nach gespeicherten Tageszuständen fortschreiben
+                    # (schlägt upsert_daily_sketches fehl, bleiben die Rollups unverändert)
+                    context.rollup_store.update(station_id, increments, db_loader, replaced=replaced)
+                    rollups_updated = True
+                    # Gleiche Strategie wie stage_consolidation (consolidate_station_frame)
+                    daily_aggregations = finalize_daily_sketches(changed_sketches, aggregation_rules, PRECISION_RULES,
+                                                                 strategy='interpolate_good')
+                except Exception as e:
+                    print(f"Tageszustände nicht verfügbar, verwende Tageskonsolidierung: {e}")
+                    db_loader.conn.rollback()
+                    daily_aggregations = daily_results
+                db_loader.insert_daily_aggregations(station_id, daily_aggregations)
+
+            except Exception as e:
+                print(f"\n[FEHLER] Bei der Aufbereitung der Daten für die Datenbank ist ein Fehler aufgetreten: {e}")
+    else:
+        print("\nKeine Tagesergebnisse zum Speichern in der Datenbank vorhanden.")
+    return {'rollups_updated': rollups_updated}
+
+
+# Ablauf einer Station: jede Stufe deklariert ihre Eingaben und Ausgaben, die Reihenfolge
+# ergibt sich daraus. Starteingaben siehe process_station.
+STATION_GRAPH = PipelineGraph([
+    Stage('basic', stage_basic,
+          inputs=['processed_data', 'validation_rules', 'seasonal_rules', 'stuck_rules', 'spike_rules'],
+          outputs=['flag_matrix']),
+    Stage('multivariate', stage_multivariate, plugin='multivariate',
+          inputs=['processed_data', 'station_id', 'context'],
+          outputs=['multivariate_flags']),
+    Stage('correlation', stage_correlation, plugin='correlation',
+          inputs=['processed_data'],
+          outputs=['correlation_flags', 'correlation_results']),
+    Stage('agricultural', stage_agricultural, plugin='agricultural',
+          inputs=['processed_data', 'station_id', 'context'],
+          outputs=['agricultural_flags', 'agricultural_results', 'agri_detector']),
+    Stage('regional', stage_regional, plugin='regional',
+          inputs=['processed_data', 'station_id', 'rules_for_station'],
+          outputs=['regional_results', 'current_season', 'regional_config']),
+    Stage('combine', stage_combine,
+          inputs=['processed_data', 'flag_matrix', 'multivariate_flags', 'correlation_flags', 'agricultural_flags'],
+          outputs=['validated_data', 'reason_masks']),
+    Stage('trends', stage_trends, plugin='agricultural',
+          inputs=['validated_data', 'aggregation_rules', 'station_id', 'context', 'agri_detector',
+                  'rollups_updated'],
+          outputs=['long_term_trends']),
+    Stage('detail_report', stage_detail_report,
+          inputs=['validated_data', 'reason_masks', 'station_id', 'output_dir'],
+          outputs=['detail_report_path']),
+    Stage('hourly', stage_hourly_measurements, resources=['db'],
+          inputs=['validated_data', 'reason_masks', 'station_id', 'applied_rules', 'db_loader', 'output_dir',
+                  'source_file', 'reserved_run_id'],
+          outputs=['validation_run_id']),
+    Stage('consolidation', stage_consolidation,
+          inputs=['validated_data', 'reason_masks'],
+          outputs=['daily_results', 'aggregation_rules']),
+    Stage('results', stage_results,
+          inputs=['station_id', 'validation_run_id', 'validated_data', 'daily_results', 'correlation_results',
+                  'agricultural_results', 'agri_detector', 'long_term_trends', 'regional_results',
+                  'current_season', 'regional_config', 'output_dir'],
+          outputs=['erweiterte_ergebnisse']),
+    Stage('result_files', stage_result_files,
+          inputs=['erweiterte_ergebnisse', 'daily_results', 'station_id', 'output_dir'],
+          outputs=['result_files']),
+    Stage('dashboard', stage_dashboard, plugin='dashboard',
+          inputs=['erweiterte_ergebnisse', 'station_id', 'output_dir', 'config'],
+          outputs=['dashboard_path']),
+    Stage('database', stage_database, resources=['db'],
+          inputs=['validated_data', 'reason_masks', 'daily_results', 'aggregation_rules', 'station_id', 'db_loader',
+                  'context'],
+          outputs=['rollups_updated']),
+])
+
+
+def process_station(station_id: str, station_files: List[str], column_mapping: Dict, output_dir: str,
+                    context: PipelineContext, db_loader: DatabaseLoader, source_file: str = None,
+                    validation_run_id: int = None) -> str:
+    """
+    Validiert, konsolidiert und speichert die Daten einer Station.
+
+    Args:
+        validation_run_id: bereits angelegter Validierungslauf (Parallelbetrieb), sonst wird einer angelegt
+
+    Returns:
+        str: 'ok' oder 'übersprungen' (keine verwertbaren Rohdaten)
+    """
+    config = context.config
+    print("-" * 60)
+    print(f"Verarbeite Daten für Station: {station_id}")
+
+    # Station-Metadaten laden und prüfen
+    # STATIONS wird jetzt aus der Datenbank geladen - siehe unten
+    # Station-Metadaten aus der Konfiguration des Laufs
+    try:
+        station_metadata = config.get_station(station_id) or {}
+    except Exception as e:
+        print(f"Fehler beim Laden der Station-Metadaten: {e}")
+        station_metadata = {}
+        check_station_data_quality(station_id, station_metadata)
+
+    try:
+        # Lade Rohdaten: nur die gemappten Messwertspalten, typisiert, Kopfzeilen verworfen
+        processed_data = read_station_files(station_files, column_mapping)
+    except Exception as e:
+        print(f"FEHLER bei Station {station_id}: {e}")
+        return 'übersprungen'
+
+    if processed_data.empty:
+        print(f"WARNUNG bei Station {station_id}: Keine validen Daten nach Bereinigung.")
+        return 'übersprungen'
+
+    # 2. Lade Konfiguration für DIESE Station aus dem ConfigLoader
+    print(f"Lade Konfiguration für Station {station_id}...")
+    station_config_db = config.get_station(station_id)
+    rules_for_station = config.get_rules_for_station(station_id)
+
+    # Baue die Regel-Dictionaries dynamisch aus den DB-Daten auf
+    validation_rules = {}
+    spike_rules = {}
+    seasonal_rules = {}
+    stuck_rules = {}  # parameter_name (None = global) -> Flat-Line-Konfiguration
+
+    for rule in rules_for_station:
+        if rule['rule_type'] == 'RANGE' or rule['rule_type'] == 'RANGE_REGIONAL':
+            validation_rules[rule['parameter_name']] = rule['config_json']
+
+            # NEU: Extrahiere saisonale Schwellenwerte falls vorhanden
+            if 'climatology_thresholds' in rule['config_json']:
+                seasonal_rules[rule['parameter_name']] = rule['config_json']['climatology_thresholds']
+
+        elif rule['rule_type'] == 'SPIKE':
+            spike_rules[rule['parameter_name']] = rule['config_json']['threshold']
+
+        elif rule['rule_type'] == 'STUCK':
+            # z.B. {"suspect_threshold": 3, "fail_threshold": 12, "epsilon": 0.01}
+            stuck_rules[rule['parameter_name']] = rule['config_json']
+
+    print(f"  - {len(validation_rules)} Range-Regeln, {len(spike_rules)} Spike-Regeln und {len(stuck_rules)} Stuck-Regeln für diese Station geladen.")        
+
+    # Speichere die tatsächlich angewendeten Regeln
+    applied_rules_dict = {
+        'validation_rules': validation_rules,
+        'spike_rules': spike_rules,
+        'stuck_rules': stuck_rules
+    }
+
+    # 3.-13. Validierungen, Konsolidierung und Ausgaben als Ablaufgraph (STATION_GRAPH):
+    # unabhängige Stufen laufen parallel, deaktivierte Module werden nicht importiert
+    graph_run = STATION_GRAPH.run({
+        'station_id': station_id,
+        'processed_data': processed_data,
+        'rules_for_station': rules_for_station,
+        'validation_rules': validation_rules,
+        'seasonal_rules': seasonal_rules,
+        'stuck_rules': stuck_rules,
+        'spike_rules': spike_rules,
+        'applied_rules': applied_rules_dict,
+        'context': context,
+        'config': config,
+        'db_loader': db_loader,
+        'output_dir': output_dir,
+        'source_file': source_file,
+        'reserved_run_id': validation_run_id
+    }, max_workers=VALIDATION_GRAPH['max_workers'])
+    gesamtbewertung = graph_run['erweiterte_ergebnisse']['zusammenfassung']
+
+    # OPTIONAL: E-Mail-Versand bei kritischen Zuständen
+    if gesamtbewertung['status'] in ['warnung', 'kritisch']:
+        print(f"\n⚠️  ACHTUNG: Status '{gesamtbewertung['status'].upper()}' erfordert Benachrichtigung!")
+
+    # Status-Zusammenfassung ausgeben
+    print(f"\n=== ZUSAMMENFASSUNG Station {station_id} ===")
+    print(f"Gesamtstatus: {gesamtbewertung['status'].upper()}")
+    if gesamtbewertung['hauptprobleme']:
+        print(f"Hauptprobleme: {', '.join(gesamtbewertung['hauptprobleme'])}")
+    if gesamtbewertung['sofortmassnahmen']:
+        print(f"Sofortmaßnahmen: {', '.join(gesamtbewertung['sofortmassnahmen'])}")
+    if gesamtbewertung['meldepflichten']:
+        print(f"Meldepflichten: {', '.join(gesamtbewertung['meldepflichten'])}")
+
+    if VALIDATION_GRAPH['timing_report']:
+        print(graph_run.report(station_id))
+
+    return 'ok'
+
+
+def process_station_safely(station_id: str, station_files: List[str], column_mapping: Dict, output_dir: str,
+                           context: PipelineContext, db_loader: DatabaseLoader, source_file: str = None,
+                           validation_run_id: int = None) -> Dict:
+    """Führt process_station aus; ein Fehler bricht nur diese Station ab, nicht den Lauf."""
+    try:
+        status = process_station(station_id, station_files, column_mapping, output_dir, context,
+                                 db_loader, source_file, validation_run_id)
+        return {'station_id': station_id, 'status': status, 'message': ''}
+    except Exception as e:
+        print(f"FEHLER bei Station {station_id}: {e}")
+        traceback.print_exc(file=sys.stdout)
+        if db_loader.conn:
+            db_loader.conn.rollback()
+        return {'station_id': station_id, 'status': 'fehler', 'message': str(e)}
+
+
+# Kontext eines Pool-Prozesses (gesetzt von _init_station_worker)
+_WORKER_CONTEXT = None
+
+
+def _init_station_worker(config):
+    """Initialisiert einen Pool-Prozess; die Konfiguration wird einmal pro Prozess übergeben."""
+    global _WORKER_CONTEXT
+    _WORKER_CONTEXT = PipelineContext(config)
+
+
+def _run_station_in_worker(station_id: str, station_files: List[str], column_mapping: Dict, output_dir: str,
+                           source_file: str = None, validation_run_id: int = None) -> Dict:
+    """Verarbeitet eine Station im Pool-Prozess und gibt Ergebnis und Ausgabe zurück."""
+    log = io.StringIO()
+    with redirect_stdout(log):
+        db_loader = DatabaseLoader()
+        try:
+            result = process_station_safely(station_id, station_files, column_mapping, output_dir,
+                                            _WORKER_CONTEXT, db_loader, source_file, validation_run_id)
+        finally:
+            db_loader.close()
+    result['log'] = log.getvalue()
+    return result
+
+
+def run_stations_parallel(station_jobs: List[Tuple[str, List[str]]], column_mapping: Dict, output_dir: str,
+                          config, source_file: str = None, workers: int = 2) -> List[Dict]:
+    """
+    Verteilt die Stationen auf einen Prozess-Pool (--workers).
+
+    Validierungsläufe werden vorab in Eingabereihenfolge angelegt; Ausgaben und
+    Ergebnisse werden ebenfalls in Eingabereihenfolge gesammelt, unabhängig davon,
+    welche Station zuerst fertig ist. Jede Station schreibt nur Zeilen ihrer eigenen
+    station_id in die Datenbank.
+    """
+    run_ids = {}
+    db_loader = DatabaseLoader()
+    if db_loader.conn:
+        try:
+            for station_id, _ in station_jobs:
+                run_ids[station_id] = db_loader.create_validation_run(station_id, source_file)
+        except Exception as e:
+            print(f"Validierungsläufe konnten nicht vorab angelegt werden: {e}")
+    db_loader.close()
+    # Offene Verbindungen nicht an die Pool-Prozesse vererben
+    close_pool()
+
+    print(f"Verarbeite {len(station_jobs)} Stationen mit {workers} Prozessen...")
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_station_worker, initargs=(config,)) as executor:
+        futures = [(station_id, executor.submit(_run_station_in_worker, station_id, station_files, column_mapping,
+                                                output_dir, source_file, run_ids.get(station_id)))
+                   for station_id, station_files in station_jobs]
+        for station_id, future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                # z.B. BrokenProcessPool, wenn ein Pool-Prozess abstürzt
+                result = {'station_id': station_id, 'status': 'fehler',
+                          'message': f"Pool-Prozess abgebrochen: {e}", 'log': ''}
+            print(result.pop('log'), end='')
+            results.append(result)
+    return results
+
+
+def print_station_results(results: List[Dict]):
+    """Gibt das Ergebnis aller Stationen aus."""
+    print("-" * 60)
+    for status in ['ok', 'übersprungen', 'fehler']:
+        stations = [result['station_id'] for result in results if result['status'] == status]
+        if stations:
+            print(f"Stationen {status}: {', '.join(stations)}")
+    for result in results:
+        if result['status'] == 'fehler':
+            print(f"  {result['station_id']}: {result['message']}")
+
+
+def run_validation_pipeline(input_dir: str, output_dir: str, metadata_path: str, source_file: str = None,
+                            context: PipelineContext = None, workers: int = 1):
     """
     Führt die vollständige Validierungspipeline aus.
     Integriert alle Basis- und erweiterten Validierungen.
+
+    Ohne `context` wird der Zustand für genau diesen Lauf angelegt und danach
+    freigegeben; der Worker-Modus übergibt einen dauerhaften Kontext.
+    Mit `workers` > 1 werden die Stationen parallel in einem Prozess-Pool verarbeitet.
+    Scheitert eine Station ('fehler'), endet der Lauf nach allen Stationen mit sys.exit
+    (Exit-Code 1; im Worker-Modus Ergebnis 'error').
     """
     print("=" * 60)
     print("Starte erweiterte Pipeline mit allen Validierungsmodulen...")
     print("=" * 60)
 
-    # 1. Lade die gesamte Konfiguration aus der Datenbank
+    owns_context = context is None
+    if owns_context:
+        context = PipelineContext()
+
+    # 1. Lade die gesamte Konfiguration einmal aus der Datenbank (unveränderlich für den ganzen Lauf)
     try:
-        config_loader = DbConfigLoader()
-    except ValueError as e:
+        config = context.refresh_config()
+    except Exception as e:
         sys.exit(f"ABBRUCH: Konnte Konfiguration nicht laden. Fehler: {e}")
 
     # 1b. Daten laden und aufbereiten (bestehende Logik)
@@ -183,574 +968,86 @@ def run_validation_pipeline(input_dir: str, output_dir: str, metadata_path: str)
 
     print(f"Gefundene Stationen zur Verarbeitung: {list(files_by_station.keys())}")
 
-    # Verarbeite jede Station
-    for station_id, station_files in files_by_station.items():
-        print("-" * 60)
-        print(f"Verarbeite Daten für Station: {station_id}")
-
-        # Station-Metadaten laden und prüfen
-        # STATIONS wird jetzt aus der Datenbank geladen - siehe unten
-        # Lade Station-Metadaten aus Datenbank
-        try:
-            from db_config_loader import load_config_from_db
-            config = load_config_from_db()
-            station_metadata = config.get('stations', {}).get(station_id, {})
-        except Exception as e:
-            print(f"Fehler beim Laden der Station-Metadaten: {e}")
-            station_metadata = {}
-            check_station_data_quality(station_id, station_metadata)
-        
-        try:
-            # Lade Rohdaten
-            df_list = [pd.read_csv(f, sep=',', header=None, index_col=0, on_bad_lines='skip', encoding='utf-8-sig') 
-                      for f in station_files]
-            raw_data = pd.concat(df_list)
-            raw_data.index = raw_data.index.str.replace(r'[+-]\d{4}$', '', regex=True)
-            
-            # Bereinige Header-Zeilen
-            if raw_data.index.dtype == 'object':
-                raw_data = raw_data[~raw_data.index.str.contains('Timestamp', na=False)]
-            
-            # Konvertiere zu lokaler Zeit und behalte diese bei
-            raw_data.index = pd.to_datetime(raw_data.index, errors='coerce')
-            if raw_data.index.tz is not None:
-                # Konvertiere zur lokalen Zeit der Zeitzone
-                raw_data.index = raw_data.index.tz_convert('Europe/Berlin').tz_localize(None)
-            else:
-                raw_data.index = raw_data.index.tz_localize(None)
-            raw_data = raw_data[raw_data.index.notna()]
-            raw_data.sort_index(inplace=True)
-        except Exception as e:
-            print(f"FEHLER bei Station {station_id}: {e}")
-            continue
-
-        if raw_data.empty:
-            print(f"WARNUNG bei Station {station_id}: Keine validen Daten nach Bereinigung.")
-            continue
-
-        # Konvertiere zu numerischen Werten und mappe Spaltennamen
-        processed_data = raw_data.apply(pd.to_numeric, errors='coerce')
-        processed_data = map_columns_to_names(processed_data, column_mapping)
-        
-        # 2. Lade Konfiguration für DIESE Station aus dem ConfigLoader
-        print(f"Lade Konfiguration für Station {station_id} aus der Datenbank...")
-        station_config_db = config_loader.get_station(station_id)
-        rules_for_station = config_loader.get_rules_for_station(station_id)
-
-        # Baue die Regel-Dictionaries dynamisch aus den DB-Daten auf
-        validation_rules = {}
-        spike_rules = {}
-        seasonal_rules = {}
-
-        for rule in rules_for_station:
-            if rule['rule_type'] == 'RANGE' or rule['rule_type'] == 'RANGE_REGIONAL':
-                validation_rules[rule['parameter_name']] = rule['config_json']
-                
-                # NEU: Extrahiere saisonale Schwellenwerte falls vorhanden
-                if 'climatology_thresholds' in rule['config_json']:
-                    seasonal_rules[rule['parameter_name']] = rule['config_json']['climatology_thresholds']
-                    
-            elif rule['rule_type'] == 'SPIKE':
-                spike_rules[rule['parameter_name']] = rule['config_json']['threshold']
-        
-        print(f"  - {len(validation_rules)} Range-Regeln und {len(spike_rules)} Spike-Regeln für diese Station geladen.")        
-    
-        # 3. Basis-Validierungen durchführen
-        print("Führe Basis-Validierungen durch...")
-        validator = WaterQualityValidator()
-        flags_per_test = pd.DataFrame(index=processed_data.index)
-        reasons_per_test = pd.DataFrame(index=processed_data.index)
-
-        # Range Validation
-        for param_name in processed_data.columns:
-            if param_name in validation_rules:
-                rules = validation_rules[param_name]
-                flags, reasons = validator.validate_range(
-                    processed_data[param_name], 
-                    rules['min'], 
-                    rules['max'],
-                    param_name=param_name,
-                    seasonal_rules=seasonal_rules
-                )
-                flags_per_test[f'flag_{param_name}_range'] = flags
-                reasons_per_test[f'reason_{param_name}_range'] = reasons
-            
-            # Stuck Values
-            flags, reasons = check_stuck_values(processed_data[param_name], tolerance=3)
-            flags_per_test[f'flag_{param_name}_stuck'] = flags
-            reasons_per_test[f'reason_{param_name}_stuck'] = reasons
-            
-            # Spike Detection
-            if param_name in spike_rules:
-                max_change = spike_rules[param_name]
-                flags, reasons = check_spikes(processed_data[param_name], max_rate_of_change=max_change)
-                flags_per_test[f'flag_{param_name}_spike'] = flags
-                reasons_per_test[f'reason_{param_name}_spike'] = reasons
-            
-        # Speichere die tatsächlich angewendeten Regeln
-        applied_rules_dict = {
-            'validation_rules': validation_rules,
-            'spike_rules': spike_rules,
-            'stuck_tolerance': 3  # aus stuck_value_validator
-        }
-
-        # 4. Multivariate Validierung
-        cross_validation_cols = ['Wassertemp. (0.5m)', 'pH', 'Gelöster Sauerstoff', 'Leitfähigkeit', 'Trübung']
-        cols_to_check = [col for col in cross_validation_cols if col in processed_data.columns]
-        
-        if len(cols_to_check) > 1:
-            print("Führe multivariate Validierung durch...")
-            multi_flags_dict, multi_reasons_dict = check_multivariate_anomalies(processed_data, cols_to_check)
-            for col_name in cols_to_check:
-                if col_name in multi_flags_dict:
-                    flags_per_test[f'flag_{col_name}_multivariate'] = multi_flags_dict[col_name]
-                    reasons_per_test[f'reason_{col_name}_multivariate'] = multi_reasons_dict[col_name]
-        
-        # 5. Erweiterte Korrelationsvalidierung (wenn verfügbar)
-        correlation_results = None
-        if VALIDATION_MODULES['correlation']:
-            print("Führe erweiterte Korrelationsvalidierung durch...")
-            correlation_validator = EnhancedCorrelationValidator()
-            
-            for timestamp in processed_data.index:
-                hour_data = processed_data.loc[[timestamp]]
-                corr_flags, corr_reasons = correlation_validator.validate_all_correlations(
-                    hour_data, timestamp
-                )
-                
-                for param in processed_data.columns:
-                    if param in hour_data.columns:
-                        if param in corr_flags.index and len(corr_flags) > 0:
-                            if corr_flags.loc[param] != 1:  # 1 = GOOD
-                                flags_per_test.loc[timestamp, f'flag_{param}_correlation'] = corr_flags.loc[param]
-                                flags_per_test.loc[timestamp, f'reason_{param}_correlation'] = corr_reasons.loc[param]
-                        else:
-                            flags_per_test.loc[timestamp, f'flag_{param}_correlation'] = 1
-                            flags_per_test.loc[timestamp, f'reason_{param}_correlation'] = ""
-            
-            # Berechne Qualitätsmetriken
-            correlation_results = correlation_validator.calculate_correlation_quality_metrics(
-                processed_data.last('24H')
-            )
-            print(f"Korrelationsqualität: {correlation_results.get('overall_correlation_quality', 0):.1f}%")
-        
-        # 6. Landwirtschaftliche Einträge erkennen (wenn verfügbar)
-        agricultural_results = None
-        if VALIDATION_MODULES['agricultural']:
-            print("Prüfe auf landwirtschaftliche Einträge...")
-            agri_detector = AgriculturalRunoffDetector()
-            agri_flags, agri_reasons, agri_analysis = agri_detector.detect_agricultural_runoff(
-                processed_data,
-                weather_data=None,
-                lookback_hours=72
-            )
-            agricultural_results = agri_analysis
-            
-            # Integriere Agricultural Flags
-            for idx in agri_flags.index:
-                if agri_flags[idx] != 1:  # Nicht GOOD
-                    for param in processed_data.columns:
-                        flags_per_test.loc[idx, f'flag_{param}_agricultural'] = agri_flags[idx]
-                        if agri_reasons[idx]:
-                            reasons_per_test.loc[idx, f'reason_{param}_agricultural'] = agri_reasons[idx]
-            
-            print(f"Landwirtschaftlicher Risiko-Index: {agri_analysis['risk_indicators'].get('overall_agricultural_risk', 0):.1f}")
-        
-        # 7. Regionale Anpassungen (wenn verfügbar)
-        regional_results = None
-        current_season = None
-        if VALIDATION_MODULES['regional']:
-            print("Wende regionale Konfiguration an...")
-            # Filtere die relevanten Regeln aus dem DB-Loader
-            regional_db_rules = [r for r in rules_for_station if r['rule_type'] in ['SEASONAL_EVENT', 'RANGE_REGIONAL']]
-            # Initialisiere die Klasse mit den Datenbank-Regeln
-            regional_config = RegionalConfigMV(regional_db_rules)
-            
-            # Hole saisonale Faktoren
-            current_season = regional_config.get_season_factor(processed_data.index[-1])
-            print(f"Landwirtschaftliche Phase: {current_season['aktivität']}")
-            
-            # Regionale Interpretationen
-            latest_values = processed_data.iloc[-1]
-            regional_results = {}
-            
-            for param in ['Nitrat', 'DOC', 'Leitfähigkeit']:
-                if param in latest_values and not pd.isna(latest_values[param]):
-                    status, interpretation = regional_config.get_regional_interpretation(
-                        param.lower(),
-                        latest_values[param],
-                        processed_data.index[-1],
-                        station_id
-                    )
-                    regional_results[param] = {
-                        "wert": float(latest_values[param]),
-                        "status": status,
-                        "interpretation": interpretation
-                    }
-        
-        # 8. Finale Flags und Gründe pro Parameter erstellen
-        print("Kombiniere alle Validierungsergebnisse...")
-
-        for param_name in processed_data.columns:
-            relevant_flag_cols = [col for col in flags_per_test.columns if f"_{param_name}_" in col]
-            relevant_reason_cols = [col for col in reasons_per_test.columns if f"_{param_name}_" in col]
-            
-            if relevant_flag_cols:
-                final_flags, final_reasons = validator.combine_flags_and_reasons(
-                    flags_per_test[relevant_flag_cols],
-                    reasons_per_test[relevant_reason_cols]
-                )
+    station_jobs = list(files_by_station.items())
+    if workers > 1 and len(station_jobs) > 1:
+        results = run_stations_parallel(station_jobs, column_mapping, output_dir, config, source_file, workers)
+    else:
+        # Eine Pool-Verbindung für alle Schreibzugriffe des Laufs
+        db_loader = DatabaseLoader()
+        results = [process_station_safely(station_id, station_files, column_mapping, output_dir,
+                                          context, db_loader, source_file)
+                   for station_id, station_files in station_jobs]
+        db_loader.close()
+    print_station_results(results)
 
-                processed_data[f'flag_{param_name}'] = final_flags
-                processed_data[f'reason_{param_name}'] = final_reasons
-
-        
-        
-        # NEU: Generiere Validierungs-Detailbericht NACH ALLEN Validierungen
-        try:
-            from validation_detail_report import generate_validation_details
-            detail_report_path = generate_validation_details(
-                processed_data, 
-                station_id, 
-                output_dir
-            )
-            print(f"Vollständiger Validierungsbericht: {detail_report_path}")
-        except Exception as e:
-            print(f"Fehler beim Erstellen des Detail-Berichts: {e}")
-
-        # Nach der Tageskonsolidierung hinzufügen:
-        hourly_filename = save_hourly_data_for_db(
-            processed_data, 
-            station_id, 
-            output_dir,
-            applied_rules_dict
-        )
-        
-        # 9. Tageskonsolidierung
-        print("Erstelle Tageskonsolidierung...")
-
-        # Verfügbare Parameter
-        actual_params = [col for col in processed_data.columns 
-                        if not col.startswith('flag_') and not col.startswith('reason_')]
-        print(f"\nVerfügbare Parameter: {len(actual_params)}")
-
-        # Erstelle Aggregationsregeln NUR für vorhandene Parameter
-        precision_rules = {
-            'Phycocyanin Abs.': 1, 
-            'Phycocyanin Abs. (comp)': 1, 
-            'TOC': 1, 
-            'Trübung': 1, 
-            'Chl-a': 1, 
-            'DOC': 1, 
-            'Nitrat': 1, 
-            'Gelöster Sauerstoff': 2, 
-            'Leitfähigkeit': 0, 
-            'pH': 2, 
-            'Redoxpotential': 0, 
-            'Wassertemp. (0.5m)': 2, 
-            'Wassertemp. (1m)': 2, 
-            'Wassertemp. (2m)': 2,
-            'Wassertemperatur': 2, 
-            'Lufttemperatur': 1, 
-            'default': 2
-        }
-        
-        aggregation_rules = {}
-        for param in actual_params:
-            # Verwende die Regeln aus config_file.py
-            if param in CONSOLIDATION_RULES:
-                aggregation_rules[param] = CONSOLIDATION_RULES[param]
-            else:
-                # Fallback auf default
-                aggregation_rules[param] = CONSOLIDATION_RULES.get('default', ['min', 'max', 'mean'])
-        
-        # Tagesweise Aggregation
-        daily_results_list = []
-        
-        for day, group_df in processed_data.groupby(processed_data.index.date):
-            day = pd.Timestamp(str(day))  # Konvertiere date zu Timestamp über String
-            # day = pd.Timestamp(str(day))  # Konvertiere date zu Timestamp über String
-            hours_in_day = len(group_df)
-            
-            if hours_in_day == 0:
-                continue
-            
-            try:
-                from interpolating_consolidator import interpolate_and_aggregate
-                
-                daily_summary = interpolate_and_aggregate(
-                    group_df,
-                    parameter_rules=aggregation_rules,
-                    precision_rules=precision_rules
-                )
-                
-                if daily_summary is not None and not daily_summary.empty:
-                    daily_summary.name = day
-                    # daily_summary.name = day.strftime('%Y-%m-%d') if hasattr(day, 'strftime') else str(day)
-                    
-                    daily_results_list.append(daily_summary)
-                    
-            except Exception as e:
-                print(f"Fehler bei Tagesaggregation für {day}: {str(e)}")
-        
-        print(f"\nTageskonsolidierung: {len(daily_results_list)} Tage erfolgreich aggregiert")
-        
-        # Rest der Pipeline
-        if not daily_results_list:
-            print(f"\nWARNUNG: Keine validen Tageswerte gefunden!")
-            daily_results = pd.DataFrame()
-        else:
-            daily_results = pd.concat(daily_results_list, axis=1).T
-            daily_results.index.name = "Datum"
-            print(f"Tageskonsolidierung erfolgreich: {len(daily_results)} Tage")
-
-        # 10. Erweiterte Ergebnisse zusammenstellen
-        erweiterte_ergebnisse = {
-            "station_id": station_id,
-            "zeitraum": {
-                "von": processed_data.index.min().isoformat(),
-                "bis": processed_data.index.max().isoformat()
-            },
-            "basis_validierung": {date.strftime('%Y-%m-%d'): values for date, values in daily_results.to_dict(orient='index').items()} if not daily_results.empty else {},
-            
-            # "basis_validierung": {pd.to_datetime(date).strftime('%Y-%m-%d'): values for date, values in daily_results.to_dict(orient='index').items()} if not daily_results.empty else {},
-            "erweiterte_analysen": {}
-        }
-        
-        # Füge erweiterte Analysen hinzu
-        if correlation_results:
-            erweiterte_ergebnisse["erweiterte_analysen"]["korrelations_qualitaet"] = {
-                "metriken": correlation_results,
-                "gesamtqualitaet": correlation_results.get('overall_correlation_quality', 0),
-                "auffaellige_korrelationen": []
-            }
-            
-            # Finde auffällige Korrelationen
-            for key, value in correlation_results.items():
-                if 'actual_correlation' in key and 'quality' not in key:
-                    param_pair = key.replace('_actual_correlation', '')
-                    quality_key = f"{param_pair}_correlation_quality"
-                    if quality_key in correlation_results and correlation_results[quality_key] < 50:
-                        erweiterte_ergebnisse["erweiterte_analysen"]["korrelations_qualitaet"]["auffaellige_korrelationen"].append({
-                            "parameter": param_pair,
-                            "korrelation": round(value, 3),
-                            "qualitaet": round(correlation_results[quality_key], 1)
-                        })
-        
-        if agricultural_results:
-            erweiterte_ergebnisse["erweiterte_analysen"]["landwirtschaftliche_eintraege"] = {
-                "risiko_index": agricultural_results['risk_indicators'].get('overall_agricultural_risk', 0),
-                "erkannte_ereignisse": agricultural_results['detected_events'],
-                "risiko_indikatoren": agricultural_results['risk_indicators'],
-                "langzeit_trends": agricultural_results.get('long_term_trends', {})
-            }
-            
-            # Generiere Textbericht
-            if agricultural_results['detected_events'] and VALIDATION_MODULES['agricultural']:
-                bericht = agri_detector.generate_report(
-                    agricultural_results,
-                    processed_data.index[0],
-                    processed_data.index[-1]
-                )
-                # Speichere Bericht separat
-                bericht_path = os.path.join(output_dir, f"landwirtschaft_bericht_{station_id}_{datetime.now().strftime('%Y%m%d')}.txt")
-                with open(bericht_path, 'w', encoding='utf-8') as f:
-                    f.write(bericht)
-                print(f"Landwirtschaftsbericht erstellt: {bericht_path}")
-        
-        if regional_results:
-            erweiterte_ergebnisse["erweiterte_analysen"]["regionale_bewertung"] = {
-                "saison_faktoren": current_season,
-                "parameter_bewertungen": regional_results
-            }
-            
-            # Füge regionale Empfehlungen hinzu
-            if VALIDATION_MODULES['regional'] and agricultural_results:
-                empfehlungen = regional_config.generate_regional_recommendations(
-                    agricultural_results,
-                    station_id,
-                    processed_data.index[-1]
-                )
-                erweiterte_ergebnisse["erweiterte_analysen"]["regionale_bewertung"]["empfehlungen"] = empfehlungen
-        
-        # 11. Zusammenfassung und Handlungsempfehlungen
-        gesamtbewertung = berechne_gesamtbewertung(erweiterte_ergebnisse)
-        erweiterte_ergebnisse["zusammenfassung"] = gesamtbewertung
-        
-        # 12. Ergebnisse speichern
-        timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Hauptergebnis-Datei (vollständig)
-        output_filename = f"erweiterte_analyse_{station_id}_{timestamp_str}.json"
-        output_filepath = os.path.join(output_dir, output_filename)
-        
-        with open(output_filepath, 'w', encoding='utf-8') as f:
-            json.dump(erweiterte_ergebnisse, f, indent=4, ensure_ascii=False, default=str)
-        
-        print(f"\nErweiterte Analyse gespeichert in: {output_filepath}")
-        
-        # Open-Data Version (anonymisiert)
-        opendata_ergebnisse = erstelle_opendata_version(erweiterte_ergebnisse)
-        opendata_filepath = os.path.join(output_dir, f"opendata_{station_id}_{timestamp_str}.json")
-        
-        with open(opendata_filepath, 'w', encoding='utf-8') as f:
-            json.dump(opendata_ergebnisse, f, indent=4, ensure_ascii=False, default=str)
-        
-        print(f"Open-Data Version gespeichert in: {opendata_filepath}")
-        
-        # CSV-Export für Excel-Nutzer
-        csv_filepath = os.path.join(output_dir, f"tageswerte_{station_id}_{timestamp_str}.csv")
-        daily_results.to_csv(csv_filepath, sep=';', decimal=',', encoding='utf-8-sig')
-        print(f"CSV-Export gespeichert in: {csv_filepath}")
-
-        # HTML-Dashboard generieren
-        html_filepath = generate_html_dashboard(erweiterte_ergebnisse, output_dir, station_id)
-        
-        # Textbasierte Zusammenfassung erstellen
-        zusammenfassung_filepath = os.path.join(output_dir, f"zusammenfassung_{station_id}_{timestamp_str}.txt")
-        with open(zusammenfassung_filepath, 'w', encoding='utf-8') as f:
-            f.write(f"WAMO GEWÄSSERMONITORING - ZUSAMMENFASSUNG\n")
-            f.write(f"{'=' * 50}\n\n")
-            f.write(f"Station: {station_id}\n")
-            f.write(f"Zeitraum: {erweiterte_ergebnisse['zeitraum']['von']} bis {erweiterte_ergebnisse['zeitraum']['bis']}\n")
-            f.write(f"Erstellt: {datetime.now().strftime('%d.%m.%Y %H:%M Uhr')}\n\n")
-            
-            f.write(f"GESAMTSTATUS: {gesamtbewertung['status'].upper()}\n")
-            f.write(f"{'=' * 50}\n\n")
-            
-            if gesamtbewertung['hauptprobleme']:
-                f.write("IDENTIFIZIERTE PROBLEME:\n")
-                for problem in gesamtbewertung['hauptprobleme']:
-                    f.write(f"• {problem}\n")
-                f.write("\n")
-            
-            if gesamtbewertung['sofortmassnahmen']:
-                f.write("ERFORDERLICHE SOFORTMASSNAHMEN:\n")
-                for massnahme in gesamtbewertung['sofortmassnahmen']:
-                    f.write(f"→ {massnahme}\n")
-                f.write("\n")
-            
-            if gesamtbewertung['meldepflichten']:
-                f.write("MELDEPFLICHTEN:\n")
-                for meldung in gesamtbewertung['meldepflichten']:
-                    f.write(f"! {meldung}\n")
-                f.write("\n")
-            
-            # Risiko-Indikatoren
-            f.write("RISIKO-INDIKATOREN:\n")
-            if 'landwirtschaftliche_eintraege' in erweiterte_ergebnisse['erweiterte_analysen']:
-                risk = erweiterte_ergebnisse['erweiterte_analysen']['landwirtschaftliche_eintraege']['risiko_index']
-                f.write(f"• Landwirtschaftlicher Einfluss: {risk:.1f}/100\n")
-            if 'korrelations_qualitaet' in erweiterte_ergebnisse['erweiterte_analysen']:
-                quality = erweiterte_ergebnisse['erweiterte_analysen']['korrelations_qualitaet']['gesamtqualitaet']
-                f.write(f"• Sensorplausibilität: {quality:.1f}%\n")
-            f.write("\n")
-            
-            f.write("KONTAKTE FÜR RÜCKFRAGEN:\n")
-            f.write("• Untere Wasserbehörde LK VG: 03834-8760-0\n")
-            f.write("• Gesundheitsamt LK VG: 03834-8760-2301\n")
-            f.write("• StALU MS: 0395-380-0\n")
-        
-        print(f"Zusammenfassung gespeichert in: {zusammenfassung_filepath}")
-
-
-        # 13. DATEN IN DIE DATENBANK SCHREIBEN (Korrigierte, robuste Version)
-        if not daily_results.empty:
-            print("\nStarte das Laden der Daten in die Datenbank...")
-            # Debug-Ausgabe hinzufügen
-            print(f"\n=== DEBUG: Speichere Tageswerte ===")
-            for date_key in erweiterte_ergebnisse["basis_validierung"]:
-                print(f"Python sendet Datum: {date_key}")
-            print("===================================\n")
-            db_loader = DatabaseLoader()
-            if db_loader.conn:
-                try:
-                    # Schritt 1: Daten aufbereiten (wie zuvor)
-                    wert_cols = {col: col.replace('_Mittelwert', '') for col in daily_results.columns if col.endswith('_Mittelwert')}
-                    flag_cols = {col: col.replace('_Aggregat_QARTOD_Flag', '') for col in daily_results.columns if col.endswith('_Aggregat_QARTOD_Flag')}
-
-                    wert_df = daily_results[list(wert_cols.keys())].rename(columns=wert_cols)
-                    wert_df = wert_df.reset_index().melt(id_vars=['Datum'], var_name='parameter', value_name='wert')
-
-                    flag_df = daily_results[list(flag_cols.keys())].rename(columns=flag_cols)
-                    flag_df = flag_df.reset_index().melt(id_vars=['Datum'], var_name='parameter', value_name='qualitaets_flag')
-
-                    merged_data = pd.merge(wert_df, flag_df, on=['Datum', 'parameter'], how='outer')
-                    
-                    merged_data.rename(columns={'Datum': 'zeitstempel'}, inplace=True)
-                    merged_data['see'] = station_id
-                    
-                    db_data = merged_data.dropna(subset=['wert'])
-                    
-                    # Schritt 2: Sicherstellen, dass der Zeitstempel ein Python-DateTime-Objekt ist
-                    db_data['zeitstempel'] = pd.to_datetime(db_data['zeitstempel'])
-
-                    # Schritt 3: Daten in eine Liste von Tupeln umwandeln - das ist der sicherste Weg
-                    records_to_insert = [tuple(x) for x in db_data[['zeitstempel', 'see', 'parameter', 'wert', 'qualitaets_flag']].to_numpy()]
-
-                    # Schritt 4: Die fertige Liste an den Loader übergeben
-                    db_loader.insert_validated_data(records_to_insert)
-
-                    # NEU: Speichere auch daily_aggregations direkt (wie messwerte!)
-                    db_loader.insert_daily_aggregations(station_id, daily_results)
-
-                except Exception as e:
-                    print(f"\n[FEHLER] Bei der Aufbereitung der Daten für die Datenbank ist ein Fehler aufgetreten: {e}")
-        else:
-            print("\nKeine Tagesergebnisse zum Speichern in der Datenbank vorhanden.")
-        # =====================================================================        
-        
-        # OPTIONAL: E-Mail-Versand bei kritischen Zuständen
-        if gesamtbewertung['status'] in ['warnung', 'kritisch']:
-            print(f"\n⚠️  ACHTUNG: Status '{gesamtbewertung['status'].upper()}' erfordert Benachrichtigung!")
-
-        # Status-Zusammenfassung ausgeben
-        print(f"\n=== ZUSAMMENFASSUNG Station {station_id} ===")
-        print(f"Gesamtstatus: {gesamtbewertung['status'].upper()}")
-        if gesamtbewertung['hauptprobleme']:
-            print(f"Hauptprobleme: {', '.join(gesamtbewertung['hauptprobleme'])}")
-        if gesamtbewertung['sofortmassnahmen']:
-            print(f"Sofortmaßnahmen: {', '.join(gesamtbewertung['sofortmassnahmen'])}")
-        if gesamtbewertung['meldepflichten']:
-            print(f"Meldepflichten: {', '.join(gesamtbewertung['meldepflichten'])}")
+    if owns_context:
+        close_pool()
 
     print("\n" + "=" * 60)
     print("Pipeline-Durchlauf abgeschlossen.")
     print("=" * 60)
 
-def save_hourly_data_for_db(processed_data, station_id, output_dir, applied_rules=None):
+    failed = [result['station_id'] for result in results if result['status'] == 'fehler']
+    if failed:
+        sys.exit(f"FEHLER: {len(failed)} von {len(results)} Stationen fehlgeschlagen: {', '.join(failed)}")
+
+def hourly_measurements_frame(processed_data, station_id, applied_rules=None):
     """
-    Speichert stündliche Roh- und validierte Daten für die Datenbank
+    Baut die Zeilen für hourly_measurements spaltenweise (eine Zeile pro Stunde und Parameter).
+    applied_rules wird pro Parameter einmal als JSON-Text serialisiert.
     """
-    hourly_data = []
-    
     # Sammle alle Parameter (ohne flag_ und reason_ Spalten)
     parameters = [col for col in processed_data.columns 
                  if not col.startswith('flag_') and not col.startswith('reason_')]
-    
+    if not parameters:
+        return pd.DataFrame()
+
     # Extrahiere die Regeln aus applied_rules, falls vorhanden
     validation_rules = applied_rules.get('validation_rules', {}) if applied_rules else {}
     spike_rules = applied_rules.get('spike_rules', {}) if applied_rules else {}
-    
-    for timestamp, row in processed_data.iterrows():
-        for param in parameters:
-            hourly_entry = {
-                'station_id': station_id,
-                'timestamp': timestamp.isoformat(),
-                'parameter': param,
-                'raw_value': float(row[param]) if pd.notna(row[param]) else None,
-                'validated_value': float(row[param]) if pd.notna(row[param]) else None,
-                'validation_flag': int(row[f'flag_{param}']) if f'flag_{param}' in row else 1,
-                'validation_reason': str(row[f'reason_{param}']) if f'reason_{param}' in row and pd.notna(row[f'reason_{param}']) else '',
-                'applied_rules': {
-                    'range': validation_rules.get(param, {}),
-                    'spike': spike_rules.get(param),
-                    'stuck_tolerance': 3
-                }
-            }
-            hourly_data.append(hourly_entry)
-    
-    # Rest der Funktion bleibt gleich...
+    stuck_rules = applied_rules.get('stuck_rules', {}) if applied_rules else {}
+
+    parts = []
+    for param in parameters:
+        values = pd.to_numeric(processed_data[param], errors='coerce').to_numpy(dtype=float)
+        flag_col, reason_col = f'flag_{param}', f'reason_{param}'
+        flags = (pd.to_numeric(processed_data[flag_col], errors='coerce').fillna(1).astype(int).to_numpy()
+                 if flag_col in processed_data.columns else 1)
+        reasons = (processed_data[reason_col].fillna('').astype(str).to_numpy()
+                   if reason_col in processed_data.columns else '')
+        rules = json.dumps({
+            'range': validation_rules.get(param, {}),
+            'spike': spike_rules.get(param),
+            'stuck': get_stuck_rule(stuck_rules, param)
+        }, ensure_ascii=False, default=str)
+        parts.append(pd.DataFrame({
+            'station_id': station_id,
+            'timestamp': processed_data.index,
+            'parameter': param,
+            'raw_value': values,
+            'validated_value': values,
+            'validation_flag': flags,
+            'validation_reason': reasons,
+            'applied_rules': rules
+        }))
+    return pd.concat(parts, ignore_index=True)
+
+def save_hourly_data_for_db(processed_data, station_id, output_dir, applied_rules=None, hourly_frame=None):
+    """
+    Speichert stündliche Roh- und validierte Daten als JSON-Datei.
+    Nur noch Rückfallweg, wenn die Stundenwerte nicht direkt in die Datenbank geladen werden konnten.
+    """
+    if hourly_frame is None:
+        hourly_frame = hourly_measurements_frame(processed_data, station_id, applied_rules)
+
+    hourly_data = []
+    if not hourly_frame.empty:
+        records = hourly_frame.copy()
+        records['timestamp'] = [ts.isoformat() for ts in records['timestamp']]
+        rules_by_text = {text: json.loads(text) for text in records['applied_rules'].unique()}
+        records['applied_rules'] = records['applied_rules'].map(rules_by_text)
+        records = records.astype(object).where(records.notna(), None)
+        hourly_data = records.to_dict(orient='records')
     
     # Speichere als JSON
     timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -773,20 +1070,39 @@ def save_hourly_data_for_db(processed_data, station_id, output_dir, applied_rule
 if __name__ == '__main__':
     # Argument-Parser einrichten, um die Pfade von Node.js zu empfangen
     parser = argparse.ArgumentParser(description='Führt die Wasserqualitäts-Validierungspipeline aus.')
-    parser.add_argument('--input-dir', required=True, help='Verzeichnis mit den Eingabe-CSV-Dateien.')
-    parser.add_argument('--output-dir', required=True, help='Verzeichnis, in dem die Ergebnisdateien gespeichert werden.')
-    parser.add_argument('--metadata-path', required=True, help='Pfad zur Metadaten-JSON-Datei.')
+    parser.add_argument('--input-dir', help='Verzeichnis mit den Eingabe-CSV-Dateien.')
+    parser.add_argument('--output-dir', help='Verzeichnis, in dem die Ergebnisdateien gespeichert werden.')
+    parser.add_argument('--metadata-path', help='Pfad zur Metadaten-JSON-Datei.')
+    parser.add_argument('--source-file', help='Name der hochgeladenen ZIP-Datei (für validation_runs).')
+    parser.add_argument('--serve', action='store_true',
+                        help='Als dauerhafter Worker auf einem Unix-Socket auf Aufträge warten (siehe pipeline_worker.py).')
+    parser.add_argument('--socket-path', help='Socket des Workers (Standard: PIPELINE_WORKER in config_file.py).')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Anzahl paralleler Prozesse für die Stationen (Standard: 1 = nacheinander).')
     
     args = parser.parse_args()
-
-    # Erstelle Output-Verzeichnis falls nicht vorhanden (wird vom Node-Server gemacht, aber sicher ist sicher)
-    os.makedirs(args.output_dir, exist_ok=True)
+    if not args.serve and not (args.input_dir and args.output_dir and args.metadata_path):
+        parser.error('--input-dir, --output-dir und --metadata-path sind erforderlich (außer mit --serve).')
 
     # Zeige aktive Module
     print("\nAktive Validierungsmodule:")
     for module, active in VALIDATION_MODULES.items():
         status = "✓" if active else "✗"
         print(f"  {status} {module}")
+
+    if args.serve:
+        from pipeline_worker import serve
+        # Bibliotheken sind importiert; Konfiguration vorab laden, damit schon der erste Auftrag warm startet
+        worker_context = PipelineContext()
+        try:
+            worker_context.refresh_config()
+        except Exception as e:
+            print(f"Konfiguration konnte beim Start nicht geladen werden ({e}), erneuter Versuch pro Auftrag.")
+        serve(run_validation_pipeline, worker_context, args.socket_path)
+        sys.exit(0)
+
+    # Erstelle Output-Verzeichnis falls nicht vorhanden (wird vom Node-Server gemacht, aber sicher ist sicher)
+    os.makedirs(args.output_dir, exist_ok=True)
     
     print(f"\nVerwende Metadaten-Datei: {args.metadata_path}")
 
@@ -794,5 +1110,7 @@ if __name__ == '__main__':
     run_validation_pipeline(
         input_dir=args.input_dir,
         output_dir=args.output_dir,
-        metadata_path=args.metadata_path
-    )
\ No newline at end of file
+        metadata_path=args.metadata_path,
+        source_file=args.source_file,
+        workers=args.workers
+    )
@@ -0,0 +1,300 @@
+# multivariate_model_store.py
+"""
+Modellspeicher für die multivariate Anomalieerkennung.
+
+Pro Station, Jahreszeit und Merkmalsliste wird ein Isolation-Forest-Modell auf
+einer begrenzten, deterministischen Stichprobe validierter Historie trainiert und
+zusammen mit Merkmalsliste, Trainingsmedianen und Quantilgrenzen auf der Festplatte
+abgelegt. Neue Daten werden nur noch mit `predict` bewertet - ohne Trainingskosten
+und unabhängig davon, wie viele Daten eine ZIP-Datei enthält.
+
+Aktualisierung:
+- explizit:  python multivariate_model_store.py --retrain --station wamo00019
+- automatisch: liegt die Anomalierate neuer Daten deutlich über der erwarteten
+  (Drift), wird das Modell aus der validierten Historie neu trainiert - höchstens
+  einmal je 'drift_cooldown_hours' nach dem letzten Training.
+
+Gibt es noch keine ausreichende Historie (Kaltstart), wird wie früher ein vorläufiges
+Modell auf den aktuellen, noch nicht validierten Daten trainiert - auch bei einem
+einzelnen Tag (ab 'min_cold_start_samples' Zeilen, Standard 1). Es gilt nur für diesen Aufruf und
+wird nicht gespeichert; dauerhafte Modelle entstehen erst aus mindestens
+'min_training_samples' Zeilen validierter Historie. Die Historie wird pro Jahreszeit
+nur für deren Monate geladen.
+
+Gespeicherte Modelle werden im Speicher gehalten; ein langlebiger Prozess (Worker,
+main_pipeline.py --serve) lädt ein Modell neu, sobald sich die Datei geändert hat
+(Neutraining über die Kommandozeile oder durch Drift in einem anderen Prozess).
+"""
+
+import os
+import sys
+import pickle
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from pyod.models.iforest import IForest
+from config_file import MULTIVARIATE_MODELS
+
+SEASONS = ['winter', 'spring', 'summer', 'autumn']
+
+# Monat -> Jahreszeit (wie WaterQualityValidator._get_season)
+SEASON_BY_MONTH = {12: 'winter', 1: 'winter', 2: 'winter',
+                   3: 'spring', 4: 'spring', 5: 'spring',
+                   6: 'summer', 7: 'summer', 8: 'summer',
+                   9: 'autumn', 10: 'autumn', 11: 'autumn'}
+
+
+def load_validated_history(station_id: str, features: List[str],
+                           months: Optional[List[int]] = None) -> pd.DataFrame:
+    """
+    Lädt die validierte Stundenhistorie (nur GOOD) einer Station aus der Datenbank
+    als DataFrame mit einer Spalte pro Parameter (optional nur für die angegebenen Monate).
+    """
+    from DatabaseLoader import DatabaseLoader
+    db_loader = DatabaseLoader()
+    try:
+        return db_loader.fetch_validated_hourly_history(station_id, features, months)
+    finally:
+        db_loader.close()  # Verbindung sofort an den Pool zurückgeben
+
+
+class MultivariateModelStore:
+    """
+    Lädt, trainiert und speichert Isolation-Forest-Modelle pro (Station, Jahreszeit, Merkmale).
+    """
+
+    def __init__(self, model_dir: Optional[str] = None,
+                 history_loader: Optional[Callable[[str, List[str], Optional[List[int]]], pd.DataFrame]] = load_validated_history,
+                 max_training_samples: Optional[int] = None,
+                 min_training_samples: Optional[int] = None,
+                 min_cold_start_samples: Optional[int] = None,
+                 contamination: Optional[float] = None):
+        """
+        Args:
+            model_dir: Ablageverzeichnis der Modelle
+            history_loader: Funktion (station_id, features, months) -> validierte Historie;
+                            None = nur vorläufige Modelle aus den aktuellen Daten
+            max_training_samples: Obergrenze der Trainingsstichprobe
+            min_training_samples: Mindestgröße der Trainingsstichprobe (gespeicherte Modelle)
+            min_cold_start_samples: Mindestgröße für vorläufige Modelle aus den aktuellen Daten
+            contamination: Erwarteter Anomalieanteil des Isolation Forest
+        """
+        self.model_dir = model_dir or MULTIVARIATE_MODELS['model_dir']
+        self.history_loader = history_loader
+        self.max_training_samples = max_training_samples or MULTIVARIATE_MODELS['max_training_samples']
+        self.min_training_samples = min_training_samples or MULTIVARIATE_MODELS['min_training_samples']
+        self.min_cold_start_samples = min_cold_start_samples or MULTIVARIATE_MODELS['min_cold_start_samples']
+        self.contamination = contamination or MULTIVARIATE_MODELS['contamination']
+        # Pfad -> (Änderungszeit der Datei, Modell)
+        self._models: Dict[str, Tuple[int, Dict]] = {}
+        os.makedirs(self.model_dir, exist_ok=True)
+
+    def model_path(self, station_id: str, season: str, features: List[str]) -> str:
+        """Dateipfad eines Modells; die Merkmalsliste geht als Kurz-Hash in den Namen ein."""
+        feature_hash = hashlib.sha1("|".join(features).encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.model_dir, f"{station_id}_{season}_{feature_hash}.pkl")
+
+    def load(self, station_id: str, season: str, features: List[str]) -> Optional[Dict]:
+        """
+        Lädt ein gespeichertes Modell oder None. Der Cache im Speicher gilt nur, solange
+        die Datei unverändert ist (von einem anderen Prozess neu trainiert -> neu laden).
+        """
+        path = self.model_path(station_id, season, features)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            self._models.pop(path, None)
+            return None
+        cached = self._models.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path, 'rb') as f:
+                cached = (mtime, pickle.load(f))
+            self._models[path] = cached
+        return cached[1]
+
+    def save(self, station_id: str, season: str, payload: Dict) -> str:
+        """Speichert ein Modell atomar (erst temporäre Datei, dann umbenennen)."""
+        path = self.model_path(station_id, season, payload['features'])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._models[path] = (os.stat(path).st_mtime_ns, payload)
+        return path
+
+    def _training_sample(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Begrenzte, deterministische Stichprobe: gleichmäßig über die Zeit verteilte Zeilen."""
+        data = data.dropna(how='all').sort_index()
+        if len(data) > self.max_training_samples:
+            positions = np.linspace(0, len(data) - 1, self.max_training_samples).astype(int)
+            data = data.iloc[positions]
+        return data
+
+    def train(self, station_id: str, season: str, data: pd.DataFrame, features: List[str],
+              persist: bool = True) -> Optional[Dict]:
+        """
+        Trainiert ein Modell auf den übergebenen Daten.
+
+        Args:
+            persist: True = validierte Historie, Modell wird gespeichert;
+                     False = vorläufiges Modell (Kaltstart), nur für den aktuellen Aufruf
+
+        Returns:
+            Dict: Modell mit Merkmalsliste, Trainingsmedianen und Quantilgrenzen (oder None)
+        """
+        sample = self._training_sample(data[features])
+        if len(sample) < (self.min_training_samples if persist else self.min_cold_start_samples):
+            print(f"  - Zu wenige Daten für Modell {station_id}/{season} ({len(sample)} Zeilen).")
+            return None
+
+        medians = sample.median()
+        filled = sample.fillna(medians).fillna(0)
+
+        model = IForest(contamination=self.contamination, random_state=42)
+        model.fit(filled)
+
+        payload = {
+            'model': model,
+            'features': list(features),
+            'medians': medians.fillna(0),
+            'lower_quantile': filled.quantile(0.05),
+            'upper_quantile': filled.quantile(0.95),
+            'contamination': self.contamination,
+            'n_training_samples': len(sample),
+            'training_period': (str(sample.index.min()), str(sample.index.max())),
+            'trained_at': datetime.now().isoformat(),
+            'drift_detected': False,
+            'provisional': not persist
+        }
+        if not persist:
+            print(f"  - Vorläufiges Modell {station_id}/{season} aus den aktuellen Daten ({len(sample)} Zeilen, nicht gespeichert)")
+            return payload
+        path = self.save(station_id, season, payload)
+        print(f"  - Multivariates Modell trainiert: {os.path.basename(path)} ({len(sample)} Zeilen)")
+        return payload
+
+    def retrain_from_history(self, station_id: str, features: List[str],
+                             seasons: Optional[List[str]] = None) -> Dict[str, Optional[Dict]]:
+        """Trainiert die Modelle einer Station aus der validierten Historie neu."""
+        if self.history_loader is None:
+            raise ValueError("Kein history_loader konfiguriert - Neutraining aus Historie nicht möglich.")
+
+        results = {}
+        for season in seasons or SEASONS:
+            # Nur die Monate der Jahreszeit aus der Datenbank lesen
+            months = [month for month, name in SEASON_BY_MONTH.items() if name == season]
+            history = self.history_loader(station_id, features, months)
+            if len(history):
+                history = history[history.index.month.map(SEASON_BY_MONTH) == season]
+            results[season] = self.train(station_id, season, history.reindex(columns=features), features)
+        return results
+
+    def _get_or_train(self, station_id: str, season: str, features: List[str],
+                      fallback_data: pd.DataFrame) -> Optional[Dict]:
+        """Vorhandenes Modell, sonst Training aus Historie, sonst vorläufig aus den aktuellen Daten."""
+        payload = self.load(station_id, season, features)
+        if payload is not None:
+            return payload
+
+        if self.history_loader is not None:
+            try:
+                payload = self.retrain_from_history(station_id, features, [season])[season]
+            except Exception as e:
+                print(f"  - Historie für {station_id}/{season} nicht verfügbar: {e}")
+        if payload is None:
+            # Kaltstart: nicht validierte Daten - nur für diesen Aufruf, nicht speichern
+            payload = self.train(station_id, season, fallback_data, features, persist=False)
+        return payload
+
+    def _check_drift(self, station_id: str, season: str, payload: Dict,
+                     predictions: np.ndarray, features: List[str]) -> Dict:
+        """Drift-Trigger: Anomalierate neuer Daten deutlich über der erwarteten Rate."""
+        if payload.get('provisional') or len(predictions) < MULTIVARIATE_MODELS['drift_min_rows']:
+            return payload
+
+        anomaly_rate = float(np.mean(predictions))
+        if anomaly_rate <= MULTIVARIATE_MODELS['drift_factor'] * payload['contamination']:
+            return payload
+
+        print(f"  - Drift im Modell {station_id}/{season}: Anomalierate {anomaly_rate:.1%}")
+        # Cooldown ab dem letzten Training bzw. dem letzten fehlgeschlagenen Neutraining
+        last_attempt = max(payload['trained_at'], payload.get('drift_detected_at') or '')
+        cooldown = timedelta(hours=MULTIVARIATE_MODELS['drift_cooldown_hours'])
+        if datetime.now() - datetime.fromisoformat(last_attempt) < cooldown:
+            print(f"  - Letztes Neutraining am {last_attempt[:16]} - kein erneuter Versuch")
+            return payload
+
+        if self.history_loader is not None:
+            try:
+                refreshed = self.retrain_from_history(station_id, features, [season])[season]
+                if refreshed is not None:
+                    return refreshed
+            except Exception as e:
+                print(f"  - Neutraining fehlgeschlagen: {e}")
+
+        payload['drift_detected'] = True
+        payload['drift_detected_at'] = datetime.now().isoformat()
+        self.save(station_id, season, payload)
+        return payload
+
+    def predict(self, station_id: str, data: pd.DataFrame) -> Tuple[np.ndarray, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Bewertet neue Daten mit den Modellen der jeweiligen Jahreszeit.
+
+        Returns:
+            Tuple: (Vorhersagen 0/1, mit Trainingsmedianen gefüllte Daten,
+                    untere und obere Quantilgrenze je Zeile)
+        """
+        features = list(data.columns)
+        predictions = np.zeros(len(data), dtype=int)
+        filled = data.astype(float)
+        lower = pd.DataFrame(np.nan, index=data.index, columns=features)
+        upper = pd.DataFrame(np.nan, index=data.index, columns=features)
+
+        seasons = np.asarray(data.index.month.map(SEASON_BY_MONTH))
+        for season in SEASONS:
+            rows = seasons == season
+            if not rows.any():
+                continue
+
+            season_data = data[rows]
+            payload = self._get_or_train(station_id, season, features, season_data)
+            if payload is None:
+                continue
+
+            season_filled = season_data.fillna(payload['medians']).fillna(0)
+            season_predictions = np.asarray(payload['model'].predict(season_filled), dtype=int)
+            refreshed = self._check_drift(station_id, season, payload, season_predictions, features)
+            if refreshed is not payload:
+                # Neu trainiertes Modell: Daten mit dessen Medianen füllen und erneut bewerten
+                payload = refreshed
+                season_filled = season_data.fillna(payload['medians']).fillna(0)
+                season_predictions = np.asarray(payload['model'].predict(season_filled), dtype=int)
+
+            predictions[rows] = season_predictions
+            filled.loc[rows] = season_filled.to_numpy()
+            lower.loc[rows] = payload['lower_quantile'][features].to_numpy()
+            upper.loc[rows] = payload['upper_quantile'][features].to_numpy()
+
+        return predictions, filled, lower, upper
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Trainiert die multivariaten Anomaliemodelle neu.')
+    parser.add_argument('--retrain', action='store_true', required=True, help='Modelle aus der validierten Historie neu trainieren.')
+    parser.add_argument('--station', required=True, help='Stations-ID, z.B. wamo00019.')
+    parser.add_argument('--season', choices=SEASONS, help='Nur diese Jahreszeit neu trainieren.')
+    parser.add_argument('--features', nargs='+',
+                        default=['Wassertemp. (0.5m)', 'pH', 'Gelöster Sauerstoff', 'Leitfähigkeit', 'Trübung'],
+                        help='Merkmalsliste (Standard wie in main_pipeline).')
+    parser.add_argument('--model-dir', help='Ablageverzeichnis der Modelle.')
+    args = parser.parse_args()
+
+    store = MultivariateModelStore(model_dir=args.model_dir)
+    results = store.retrain_from_history(args.station, args.features, [args.season] if args.season else None)
+    trained = [season for season, payload in results.items() if payload is not None]
+    print(f"Neu trainiert: {', '.join(trained) if trained else 'keine'}")
+    sys.exit(0 if trained else 1)
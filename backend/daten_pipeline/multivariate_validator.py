@@ -3,74 +3,87 @@
 import pandas as pd
 import numpy as np
 from pyod.models.iforest import IForest
+from reason_codes import ReasonCodes, ReasonMask
 
 class QartodFlags:
     """Definiert die standardisierten QARTOD-Flag-Werte."""
     GOOD = 1
     SUSPECT = 3
 
-def check_multivariate_anomalies(df: pd.DataFrame, columns_to_check: list):
-    """Identifiziert multivariate Anomalien..."""
+def check_multivariate_anomalies(df: pd.DataFrame, columns_to_check: list, as_codes: bool = False,
+                                 station_id: str = None, model_store=None):
+    """Identifiziert multivariate Anomalien...
+    
+    Mit as_codes=True werden die Gründe als ReasonMask pro Parameter zurückgegeben.
+    Mit station_id und model_store (MultivariateModelStore) werden gespeicherte Modelle
+    pro Station und Jahreszeit nur noch zur Vorhersage genutzt; ohne Store wird wie
+    bisher auf den übergebenen Daten trainiert.
+    """
     # Erstelle individuelle Flags für JEDEN Parameter
     all_flags = {}
     all_reasons = {}
     
     for col in columns_to_check:
         all_flags[col] = pd.Series(QartodFlags.GOOD, index=df.index)
-        all_reasons[col] = pd.Series("", index=df.index)
-    
-    data_subset = df[columns_to_check].copy()
-    
-    # Robuste Methode zum Füllen von NaN-Werten vor der Analyse
-    medians = data_subset.median()
-    data_subset.fillna(medians, inplace=True)
-    data_subset.fillna(0, inplace=True) 
-
-    anomaly_detector = IForest(contamination=0.02, random_state=42)
+        all_reasons[col] = ReasonMask(df.index)
     
-    if not data_subset.empty:
+    if not df.empty:
         try:
-            predictions = anomaly_detector.fit_predict(data_subset)
+            if model_store is not None and station_id is not None:
+                # Gespeichertes Modell: keine Trainingskosten, Grenzen aus den Trainingsdaten
+                predictions, data_subset, lower_quantile, upper_quantile = model_store.predict(
+                    station_id, df[columns_to_check]
+                )
+            else:
+                data_subset = df[columns_to_check].copy()
+                
+                # Robuste Methode zum Füllen von NaN-Werten vor der Analyse
+                medians = data_subset.median()
+                data_subset.fillna(medians, inplace=True)
+                data_subset.fillna(0, inplace=True) 
+
+                anomaly_detector = IForest(contamination=0.02, random_state=42)
+                predictions = anomaly_detector.fit_predict(data_subset)
+                
+                # Berechne die Schwellenwerte für "extrem hohe" und "extrem niedrige" Werte
+                lower_quantile = data_subset.quantile(0.05)
+                upper_quantile = data_subset.quantile(0.95)
+            
             anomaly_flags = pd.Series(predictions, index=data_subset.index).map({0: QartodFlags.GOOD, 1: QartodFlags.SUSPECT})
             
             is_anomaly = anomaly_flags == QartodFlags.SUSPECT
             
             # --- VERBESSERTE LOGIK: SPURENSUCHE BEI ANOMALIEN ---
             if is_anomaly.any():
-                # Berechne die Schwellenwerte für "extrem hohe" und "extrem niedrige" Werte
-                lower_quantile = data_subset.quantile(0.05)
-                upper_quantile = data_subset.quantile(0.95)
+                # Attribution als boolesche Matrix (Zeilen x Parameter); Grenzen je Zeile
+                # (gespeicherte Modelle haben saisonale Grenzen)
+                values = data_subset.to_numpy(dtype=float)
+                anomaly = is_anomaly.to_numpy()[:, np.newaxis]
+                lower_bounds = np.broadcast_to(np.asarray(lower_quantile, dtype=float), values.shape)
+                upper_bounds = np.broadcast_to(np.asarray(upper_quantile, dtype=float), values.shape)
                 
-                # Finde die Zeilen, die als Anomalie geflaggt wurden
-                anomaly_indices = df.index[is_anomaly]
+                # Ist der Wert extrem niedrig bzw. (sonst) extrem hoch?
+                low = anomaly & (values < lower_bounds)
+                high = anomaly & ~low & (values > upper_bounds)
                 
-                for idx in anomaly_indices:
-                    problem_params = []
-                    for col in columns_to_check:
-                        value = data_subset.loc[idx, col]
-                        
-                        # Ist der Wert extrem niedrig?
-                        if value < lower_quantile[col]:
-                            all_flags[col].loc[idx] = QartodFlags.SUSPECT
-                            all_reasons[col].loc[idx] = f"Multivariate Anomalie: {col} ungewöhnlich niedrig"
-                            problem_params.append(f"{col} (niedrig)")
-                            
-                        # Ist der Wert extrem hoch?
-                        elif value > upper_quantile[col]:
-                            all_flags[col].loc[idx] = QartodFlags.SUSPECT
-                            all_reasons[col].loc[idx] = f"Multivariate Anomalie: {col} ungewöhnlich hoch"
-                            problem_params.append(f"{col} (hoch)")
-                    
-                    # Falls keine spezifischen Parameter identifiziert wurden, 
-                    # aber trotzdem eine Anomalie vorliegt
-                    if not problem_params and is_anomaly[idx]:
-                        # Markiere alle Parameter dieser Anomalie
-                        for col in columns_to_check:
-                            all_flags[col].loc[idx] = QartodFlags.SUSPECT
-                            all_reasons[col].loc[idx] = "Unplausible Parameterkombination"
+                # Falls keine spezifischen Parameter identifiziert wurden,
+                # aber trotzdem eine Anomalie vorliegt: alle Parameter markieren
+                combination = anomaly[:, 0] & ~(low | high).any(axis=1)
+                flagged = low | high | combination[:, np.newaxis]
+                
+                for j, col in enumerate(columns_to_check):
+                    all_flags[col] = pd.Series(
+                        np.where(flagged[:, j], QartodFlags.SUSPECT, QartodFlags.GOOD), index=df.index
+                    )
+                    all_reasons[col].add(low[:, j], ReasonCodes.MULTIVARIATE_LOW, param=col)
+                    all_reasons[col].add(high[:, j], ReasonCodes.MULTIVARIATE_HIGH, param=col)
+                    all_reasons[col].add(combination, ReasonCodes.MULTIVARIATE_COMBINATION)
 
         except Exception as e:
             print(f"FEHLER bei der multivariaten Anomalie-Erkennung: {e}")
     
+    if not as_codes:
+        all_reasons = {col: mask.render() for col, mask in all_reasons.items()}
+    
     # WICHTIG: Gib die Dictionaries zurück, nicht die aggregierten flags/reasons!
     return all_flags, all_reasons
\ No newline at end of file
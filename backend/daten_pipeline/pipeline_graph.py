@@ -0,0 +1,250 @@
+# pipeline_graph.py
+"""
+Deklarativer Ablaufgraph für die Verarbeitung einer Station.
+
+Jede Stufe (Validator oder Ausgabe) deklariert, welche Daten sie liest (inputs) und
+welche sie erzeugt (outputs); die Reihenfolge ergibt sich aus diesen Abhängigkeiten.
+Der Scheduler startet eine Stufe, sobald alle Eingaben vorliegen, unabhängige Stufen
+laufen parallel in einem Thread-Pool. Stufen mit derselben Ressource (z.B. der einen
+Datenbankverbindung des Laufs) laufen nie gleichzeitig.
+
+Stufen eines Plugins (validator_registry), das in VALIDATION_MODULES deaktiviert oder
+nicht installiert ist, werden übersprungen, ohne das Modul zu importieren; ihre
+Ausgaben sind None.
+
+Nach dem Lauf liegen pro Stufe Start, Ende und Dauer vor, dazu der kritische Pfad
+(die Kette von Abhängigkeiten, die die Gesamtdauer bestimmt hat).
+"""
+
+import io
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class Stage:
+    """
+    Eine Stufe des Graphen.
+
+    Args:
+        name: eindeutiger Name (für Zeitmessung und Fehlermeldungen)
+        func: wird mit den Eingaben als Schlüsselwortargumenten aufgerufen und gibt
+              ein Dictionary mit genau den deklarierten Ausgaben zurück
+        inputs: gelesene Daten (Ausgaben anderer Stufen oder Starteingaben des Graphen)
+        outputs: erzeugte Daten
+        plugin: Name in validator_registry; ist das Plugin nicht verfügbar, wird die Stufe übersprungen
+        resources: exklusive Ressourcen (z.B. 'db')
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: Iterable[str] = (), outputs: Iterable[str] = (),
+                 plugin: Optional[str] = None, resources: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.plugin = plugin
+        self.resources = set(resources)
+
+    def __repr__(self):
+        return f"Stage({self.name}: {self.inputs} -> {self.outputs})"
+
+
+class _StageOutput(io.TextIOBase):
+    """
+    Sammelt die Ausgabe jeder Stufe (pro Thread) und gibt sie am Stufenende am Stück
+    aus, damit sich die Zeilen parallel laufender Stufen nicht vermischen.
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def begin(self):
+        self._local.buffer = []
+
+    def end(self):
+        buffer, self._local.buffer = self._local.buffer, None
+        with self._lock:
+            self.target.write(''.join(buffer))
+            self.target.flush()
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            with self._lock:
+                self.target.write(text)
+        else:
+            buffer.append(text)
+        return len(text)
+
+    def flush(self):
+        self.target.flush()
+
+
+class GraphRun:
+    """Ergebnis eines Laufs: alle erzeugten Daten und die Zeitmessung pro Stufe."""
+
+    def __init__(self, graph: 'PipelineGraph', data: Dict, timings: Dict[str, Dict]):
+        self.graph = graph
+        self.data = data
+        # Name -> {'start', 'end' (Sekunden seit Laufbeginn), 'skipped'}
+        self.timings = timings
+
+    def __getitem__(self, key: str):
+        return self.data[key]
+
+    @property
+    def wall_time(self) -> float:
+        return max((t['end'] for t in self.timings.values()), default=0.0)
+
+    def critical_path(self) -> List[str]:
+        """
+        Kritischer Pfad: ausgehend von der zuletzt beendeten Stufe jeweils die
+        Vorgängerstufe (Datenabhängigkeit), die als letzte fertig wurde.
+        """
+        if not self.timings:
+            return []
+        current = max(self.timings, key=lambda name: self.timings[name]['end'])
+        path = [current]
+        while True:
+            predecessors = [dep for dep in self.graph.dependencies(current) if dep in self.timings]
+            if not predecessors:
+                break
+            current = max(predecessors, key=lambda name: self.timings[name]['end'])
+            path.append(current)
+        return path[::-1]
+
+    def report(self, title: str = '') -> str:
+        """Zeitaufschlüsselung aller Stufen mit Markierung des kritischen Pfads."""
+        critical = self.critical_path()
+        busy = sum(t['end'] - t['start'] for t in self.timings.values())
+        wall = self.wall_time
+        lines = [f"Zeitplan{' ' + title if title else ''}: {wall:.2f} s Laufzeit, {busy:.2f} s in Stufen"
+                 f" (Parallelität {busy / wall if wall > 0 else 1.0:.1f}x)"]
+        for name in self.graph.order:
+            if name not in self.timings:
+                continue
+            t = self.timings[name]
+            if t['skipped']:
+                lines.append(f"  {name:<16} übersprungen")
+                continue
+            marker = ' *' if name in critical else ''
+            lines.append(f"  {name:<16} {t['start']:7.2f} - {t['end']:7.2f} s  {t['end'] - t['start']:7.2f} s{marker}")
+        critical_time = sum(self.timings[name]['end'] - self.timings[name]['start'] for name in critical)
+        lines.append(f"Kritischer Pfad (*): {' → '.join(critical)} ({critical_time:.2f} s)")
+        return '\n'.join(lines)
+
+
+class PipelineGraph:
+    """Stufen mit ihren Datenabhängigkeiten; run() führt sie abhängigkeitsgesteuert aus."""
+
+    def __init__(self, stages: Iterable[Stage]):
+        self.stages: Dict[str, Stage] = {}
+        self.producers: Dict[str, str] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Stufe '{stage.name}' ist doppelt definiert")
+            self.stages[stage.name] = stage
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"'{output}' wird von '{self.producers[output]}' und '{stage.name}' erzeugt")
+                self.producers[output] = stage.name
+        self.order = self._topological_order()
+
+    def dependencies(self, name: str) -> List[str]:
+        """Stufen, deren Ausgaben die Stufe liest."""
+        return list(dict.fromkeys(self.producers[key] for key in self.stages[name].inputs if key in self.producers))
+
+    def external_inputs(self) -> List[str]:
+        """Eingaben, die keine Stufe erzeugt (müssen beim Start übergeben werden)."""
+        return list(dict.fromkeys(key for stage in self.stages.values()
+                                  for key in stage.inputs if key not in self.producers))
+
+    def _topological_order(self) -> List[str]:
+        """Ausführbare Reihenfolge; bei Gleichstand gilt die Definitionsreihenfolge."""
+        order, done = [], set()
+        while len(order) < len(self.stages):
+            ready = [name for name in self.stages
+                     if name not in done and all(dep in done for dep in self.dependencies(name))]
+            if not ready:
+                cycle = [name for name in self.stages if name not in done]
+                raise ValueError(f"Zyklische Abhängigkeit zwischen den Stufen: {cycle}")
+            order.append(ready[0])
+            done.add(ready[0])
+        return order
+
+    def run(self, inputs: Dict, max_workers: int = 1, registry=None) -> GraphRun:
+        """
+        Führt alle Stufen aus. Mit max_workers=1 laufen sie nacheinander in
+        topologischer Reihenfolge. Eine Ausnahme in einer Stufe bricht den Lauf ab
+        (bereits laufende Stufen werden noch beendet) und wird weitergereicht.
+
+        Args:
+            inputs: Starteingaben (siehe external_inputs)
+            registry: ValidatorRegistry für Stufen mit Plugin (Standard: validator_registry.validators)
+        """
+        missing = [key for key in self.external_inputs() if key not in inputs]
+        if missing:
+            raise ValueError(f"Fehlende Eingaben für den Ablaufgraphen: {missing}")
+        if registry is None:
+            from validator_registry import validators as registry
+
+        data = dict(inputs)
+        timings: Dict[str, Dict] = {}
+        pending = list(self.order)
+        done, busy_resources = set(), set()
+        running = {}
+        started = time.perf_counter()
+        output = _StageOutput(sys.stdout)
+
+        def execute(stage: Stage, kwargs: Dict):
+            output.begin()
+            start = time.perf_counter() - started
+            try:
+                result = stage.func(**kwargs) or {}
+            finally:
+                end = time.perf_counter() - started
+                output.end()
+            return result, start, end
+
+        previous_stdout, sys.stdout = sys.stdout, output
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                while pending or running:
+                    for name in list(pending):
+                        if len(running) >= max_workers:
+                            break
+                        stage = self.stages[name]
+                        if not all(dep in done for dep in self.dependencies(name)) or stage.resources & busy_resources:
+                            continue
+                        pending.remove(name)
+                        if stage.plugin and not registry.is_available(stage.plugin):
+                            now = time.perf_counter() - started
+                            timings[name] = {'start': now, 'end': now, 'skipped': True}
+                            data.update({key: None for key in stage.outputs})
+                            done.add(name)
+                            continue
+                        busy_resources |= stage.resources
+                        kwargs = {key: data[key] for key in stage.inputs}
+                        running[executor.submit(execute, stage, kwargs)] = stage
+
+                    if not running:
+                        # Übersprungene Stufen können weitere Stufen freigegeben haben
+                        continue
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        stage = running.pop(future)
+                        busy_resources -= stage.resources
+                        result, start, end = future.result()
+                        missing_outputs = [key for key in stage.outputs if key not in result]
+                        if missing_outputs:
+                            raise ValueError(f"Stufe '{stage.name}' hat {missing_outputs} nicht geliefert")
+                        data.update({key: result[key] for key in stage.outputs})
+                        timings[stage.name] = {'start': start, 'end': end, 'skipped': False}
+                        done.add(stage.name)
+        finally:
+            sys.stdout = previous_stdout
+        return GraphRun(self, data, timings)
@@ -0,0 +1,170 @@
+# pipeline_worker.py
+"""
+Dauerhaft laufender Pipeline-Worker (main_pipeline.py --serve).
+
+Statt pro Upload einen neuen Python-Prozess zu starten (Interpreter, pandas, numpy,
+scikit-learn, pyod, Konfiguration), wartet der Worker auf einem lokalen Unix-Socket
+auf Aufträge und führt sie mit derselben run_validation_pipeline-Logik aus.
+Bibliotheken, Konfiguration, Modelle und Rollups bleiben zwischen den Aufträgen geladen.
+
+Es läuft immer nur ein Auftrag (die Ausgabe wird über sys.stdout umgeleitet, der
+PipelineContext ist nicht für parallele Läufe gedacht). Verbindungen, die währenddessen
+eintreffen, werden sofort mit "busy" beantwortet, statt in der Warteschlange des
+Sockets zu liegen; der Node-Server startet dann wie ohne Worker einen eigenen Prozess.
+
+Protokoll (eine Verbindung pro Auftrag, JSON-Zeilen):
+    Anfrage:  {"input_dir": ..., "output_dir": ..., "metadata_path": ..., "source_file": ...}
+    Antwort:  {"type": "accepted"}                              (Auftrag angenommen)
+              {"type": "log", "line": ...}                      (Ausgabe des Laufs, fortlaufend)
+              {"type": "result", "status": "ok" | "error", "message": ...}
+    Belegt:   {"type": "result", "status": "busy", "message": ...}
+"""
+
+import io
+import os
+import sys
+import json
+import socket
+import threading
+import traceback
+from contextlib import redirect_stdout
+from typing import Callable
+from config_file import PIPELINE_WORKER
+
+
+class _SocketLineWriter(io.TextIOBase):
+    """
+    Leitet die Ausgabe eines Laufs zeilenweise an den Client weiter und spiegelt sie
+    in die Konsole des Workers. Trennt der Client die Verbindung, läuft der Auftrag weiter.
+    """
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self.connected = True
+        self._buffer = ''
+
+    def write(self, text: str) -> int:
+        sys.__stdout__.write(text)
+        self._buffer += text
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            self.send({'type': 'log', 'line': line})
+        return len(text)
+
+    def flush(self):
+        sys.__stdout__.flush()
+        if self._buffer:
+            self.send({'type': 'log', 'line': self._buffer})
+            self._buffer = ''
+
+    def send(self, message: dict):
+        if not self.connected:
+            return
+        try:
+            self.conn.sendall((json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8'))
+        except OSError:
+            self.connected = False
+
+
+def _read_request(conn: socket.socket) -> dict:
+    """Liest die Auftragszeile einer Verbindung."""
+    data = b''
+    while not data.endswith(b'\n'):
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return json.loads(data.decode('utf-8'))
+
+
+def handle_job(conn: socket.socket, run_pipeline: Callable, context) -> str:
+    """Führt einen Auftrag aus und meldet das Ergebnis; gibt den Status zurück."""
+    writer = _SocketLineWriter(conn)
+    try:
+        job = _read_request(conn)
+        writer.send({'type': 'accepted'})
+        os.makedirs(job['output_dir'], exist_ok=True)
+        with redirect_stdout(writer):
+            run_pipeline(
+                input_dir=job['input_dir'],
+                output_dir=job['output_dir'],
+                metadata_path=job['metadata_path'],
+                source_file=job.get('source_file'),
+                context=context
+            )
+        result = {'type': 'result', 'status': 'ok', 'message': ''}
+    except SystemExit as e:
+        # Abbrüche der Pipeline (sys.exit) beenden nur den Auftrag, nicht den Worker
+        result = {'type': 'result', 'status': 'error', 'message': str(e.code)}
+    except Exception:
+        result = {'type': 'result', 'status': 'error', 'message': traceback.format_exc()}
+    writer.flush()
+    writer.send(result)
+    return result['status']
+
+
+def _run_job(conn: socket.socket, run_pipeline: Callable, context, busy: threading.Lock):
+    """Auftrag im Hintergrund-Thread; gibt den Worker danach wieder frei."""
+    try:
+        with conn:
+            status = handle_job(conn, run_pipeline, context)
+        print(f"Auftrag beendet: {status}")
+    finally:
+        busy.release()
+
+
+def _reject_busy(conn: socket.socket):
+    """Beantwortet eine Verbindung während eines laufenden Auftrags sofort."""
+    with conn:
+        try:
+            conn.settimeout(5)
+            _read_request(conn)  # Anfrage abnehmen, sonst sieht der Client nur einen Verbindungsabbruch
+            conn.sendall((json.dumps({'type': 'result', 'status': 'busy',
+                                      'message': 'Pipeline-Worker ist mit einem anderen Auftrag belegt.'},
+                                     ensure_ascii=False) + '\n').encode('utf-8'))
+        except (OSError, ValueError):
+            pass
+
+
+def serve(run_pipeline: Callable, context, socket_path: str = None):
+    """
+    Nimmt Aufträge auf dem Unix-Socket entgegen, bis der Prozess beendet wird. Ein
+    Auftrag läuft in einem eigenen Thread; weitere Verbindungen erhalten währenddessen
+    sofort "busy".
+
+    Args:
+        run_pipeline: run_validation_pipeline aus main_pipeline.py
+        context: dauerhafter PipelineContext (Konfiguration, Modelle, Rollups)
+        socket_path: Pfad des Sockets (Standard: PIPELINE_WORKER['socket_path'])
+    """
+    socket_path = socket_path or PIPELINE_WORKER['socket_path']
+    if os.path.exists(socket_path):
+        os.remove(socket_path)  # Überbleibsel eines beendeten Workers
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    os.chmod(socket_path, 0o660)
+    server.listen()
+    print(f"Pipeline-Worker bereit: {socket_path}")
+
+    busy = threading.Lock()
+    job_thread = None
+    try:
+        while True:
+            conn, _ = server.accept()
+            if not busy.acquire(blocking=False):
+                _reject_busy(conn)
+                print("Auftrag abgelehnt: Worker belegt", file=sys.__stdout__)  # stdout gehört dem laufenden Auftrag
+                continue
+            job_thread = threading.Thread(target=_run_job, args=(conn, run_pipeline, context, busy),
+                                          name='pipeline-job', daemon=True)
+            job_thread.start()
+    except KeyboardInterrupt:
+        print("Pipeline-Worker wird beendet.")
+        if job_thread is not None and job_thread.is_alive():
+            print("Warte auf den laufenden Auftrag...")
+            job_thread.join()
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
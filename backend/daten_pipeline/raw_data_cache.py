@@ -0,0 +1,229 @@
+# raw_data_cache.py
+"""
+Zwischenspeicher der eingelesenen WAMO-CSV-Dateien (siehe wamo_csv_reader.py).
+
+Pro CSV-Datei wird das fertig gemappte und typisierte Ergebnis abgelegt. Der Schlüssel
+ist inhaltsbasiert: SHA-256 des Dateiinhalts zusammen mit einem Hash des Spalten-Mappings
+aus den Metadaten und der Einlese-Einstellungen (CSV_INGEST). Dieselbe Datei in einer
+erneut hochgeladenen ZIP-Datei oder bei einer Nachberechnung mit geänderten Regeln wird
+daher nicht noch einmal geparst; geänderte Metadaten ergeben automatisch neue Einträge.
+
+Formate (CSV_CACHE['format']):
+    'arrow'   Arrow IPC, unkomprimiert; wird per Speicherabbild (memory map) gelesen, die
+              Spalten werden ohne Kopie als NumPy-Arrays übernommen (benötigt pyarrow,
+              sonst Rückfall auf 'pickle'). Solche Frames sind schreibgeschützt.
+    'pickle'  pickle des DataFrames
+
+Größe: Nach jedem Einlesen werden Einträge entfernt, die länger als 'max_age_days' nicht
+gelesen wurden, danach die am längsten ungenutzten, bis 'max_size_mb' eingehalten ist
+(Zeitpunkt der letzten Nutzung = Änderungszeit der Datei, wird beim Lesen gesetzt).
+
+Aufruf:
+    python raw_data_cache.py            # Anzahl und Größe der Einträge
+    python raw_data_cache.py --evict    # Alters- und Größengrenze jetzt anwenden
+    python raw_data_cache.py --clear    # Zwischenspeicher leeren
+"""
+
+import os
+import json
+import time
+import pickle
+import hashlib
+import argparse
+import importlib.util
+import multiprocessing
+import pandas as pd
+from typing import Dict, List, Optional
+from config_file import CSV_CACHE, CSV_INGEST
+
+# Bei Änderungen am Einlesen oder am Ablageformat erhöhen (macht alte Einträge ungültig)
+CACHE_VERSION = 2
+
+EXTENSIONS = {'arrow': '.arrow', 'pickle': '.pkl'}
+
+_arrow_available = None
+
+
+def _resolve_format() -> str:
+    """Konfiguriertes Format; 'arrow' nur, wenn pyarrow installiert ist (einmal geprüft)."""
+    global _arrow_available
+    cache_format = CSV_CACHE['format']
+    if cache_format not in EXTENSIONS:
+        raise ValueError(f"Unbekanntes Format für den CSV-Zwischenspeicher: {cache_format}")
+    if cache_format == 'arrow':
+        if _arrow_available is None:
+            _arrow_available = importlib.util.find_spec('pyarrow') is not None
+            # Einmal im Hauptprozess melden, nicht in jedem Pool-Prozess
+            if not _arrow_available and multiprocessing.parent_process() is None:
+                print("WARNUNG: pyarrow nicht installiert - CSV-Zwischenspeicher verwendet pickle")
+        if not _arrow_available:
+            return 'pickle'
+    return cache_format
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 des Dateiinhalts."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def mapping_hash(column_mapping: Dict) -> str:
+    """Hash des Spalten-Mappings und der Einstellungen, die das Einleseergebnis bestimmen."""
+    settings = [CACHE_VERSION, CSV_INGEST['value_dtype'], CSV_INGEST['timestamp_format'],
+                sorted(column_mapping.items())]
+    return hashlib.sha256(repr(settings).encode('utf-8')).hexdigest()
+
+
+def cache_path(path: str, column_mapping: Dict) -> str:
+    """Ablagepfad des Eintrags einer CSV-Datei."""
+    key = hashlib.sha256(f"{file_hash(path)}:{mapping_hash(column_mapping)}".encode('ascii'))
+    cache_format = _resolve_format()
+    return os.path.join(CSV_CACHE['cache_dir'], f"{key.hexdigest()}{EXTENSIONS[cache_format]}")
+
+
+def load(path: str) -> Optional[pd.DataFrame]:
+    """Lädt einen Eintrag oder gibt None zurück (nicht vorhanden oder unlesbar)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        if path.endswith(EXTENSIONS['arrow']):
+            frame = _load_arrow(path)
+        else:
+            with open(path, 'rb') as f:
+                frame = pickle.load(f)
+    except Exception as e:
+        print(f"WARNUNG: Zwischenspeicher-Eintrag {os.path.basename(path)} unlesbar ({e}) - lese CSV")
+        return None
+    try:
+        os.utime(path)  # letzte Nutzung für evict()
+    except OSError:
+        pass
+    return frame
+
+
+def store(frame: pd.DataFrame, path: str):
+    """Speichert einen Eintrag atomar; Fehler beim Schreiben brechen das Einlesen nicht ab."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Eindeutige temporäre Datei: parallel einlesende Prozesse können denselben Eintrag schreiben
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if path.endswith(EXTENSIONS['arrow']):
+            _store_arrow(frame, tmp_path)
+        else:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"WARNUNG: Zwischenspeicher-Eintrag {os.path.basename(path)} nicht geschrieben ({e})")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _store_arrow(frame: pd.DataFrame, path: str):
+    """
+    Zeitindex und Spalten als Arrow-Arrays. NaN bleibt ein Wert (from_pandas=False) statt
+    einer Null-Maske, damit die Spalten beim Lesen ohne Kopie übernommen werden können.
+    Ein zeitzonenbewusster Index wird in UTC abgelegt, die Zeitzone in den Metadaten.
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    index = frame.index
+    timezone = str(index.tz) if index.tz is not None else None
+    if timezone:
+        index = index.tz_convert('UTC').tz_localize(None)
+    arrays = [pa.array(index.to_numpy())]
+    arrays += [pa.array(frame.iloc[:, pos].to_numpy(), from_pandas=False) for pos in range(frame.shape[1])]
+    # Spaltennamen über die Position, doppelte Parameternamen bleiben so erhalten
+    table = pa.Table.from_arrays(arrays, names=['index'] + [str(pos) for pos in range(frame.shape[1])])
+    # Spalten- und Indexnamen können NumPy-Skalare sein (.item() -> Python-Typ)
+    labels = json.dumps({'columns': list(frame.columns), 'index': frame.index.name, 'tz': timezone},
+                        default=lambda value: value.item())
+    table = table.replace_schema_metadata({'labels': labels})
+    with ipc.new_file(path, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _load_arrow(path: str) -> pd.DataFrame:
+    """Liest einen Eintrag per Speicherabbild; die Spalten verweisen direkt auf die Datei."""
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    table = ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    columns = [column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+               for column in table.columns]
+    values = [column.to_numpy(zero_copy_only=False) for column in columns]
+    labels = json.loads(table.schema.metadata[b'labels'])
+    index = pd.DatetimeIndex(values[0], name=labels['index'])
+    if labels.get('tz'):
+        index = index.tz_localize('UTC').tz_convert(labels['tz'])
+    frame = pd.DataFrame(dict(enumerate(values[1:])), copy=False, index=index)
+    frame.columns = pd.Index(labels['columns'], dtype=object)
+    return frame
+
+
+def _entries() -> List[str]:
+    """Pfade aller Einträge."""
+    cache_dir = CSV_CACHE['cache_dir']
+    if not os.path.isdir(cache_dir):
+        return []
+    return [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+            if name.endswith(tuple(EXTENSIONS.values()))]
+
+
+def cache_summary() -> Dict:
+    """Anzahl und Gesamtgröße der Einträge."""
+    entries = _entries()
+    return {'entries': len(entries), 'size_mb': sum(os.path.getsize(p) for p in entries) / 1e6}
+
+
+def evict() -> int:
+    """
+    Entfernt Einträge, die länger als 'max_age_days' nicht gelesen wurden, danach die am
+    längsten ungenutzten, bis die Gesamtgröße höchstens 'max_size_mb' beträgt.
+
+    Returns:
+        int: Anzahl entfernter Einträge
+    """
+    entries = []
+    for path in _entries():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue  # von einem anderen Prozess entfernt
+        entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort()  # älteste Nutzung zuerst
+
+    max_age = CSV_CACHE['max_age_days'] * 86400
+    max_size = CSV_CACHE['max_size_mb'] * 1e6
+    total_size = sum(size for _, size, _ in entries)
+    now = time.time()
+    removed = 0
+    for used_at, size, path in entries:
+        if now - used_at <= max_age and total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue  # z.B. unter Windows noch per Speicherabbild geöffnet
+        total_size -= size
+        removed += 1
+    return removed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Zwischenspeicher der eingelesenen CSV-Dateien.')
+    parser.add_argument('--evict', action='store_true', help='Alters- und Größengrenze anwenden.')
+    parser.add_argument('--clear', action='store_true', help='Alle Einträge löschen.')
+    args = parser.parse_args()
+
+    summary = cache_summary()
+    print(f"{CSV_CACHE['cache_dir']}: {summary['entries']} Einträge, {summary['size_mb']:.1f} MB")
+    if args.evict:
+        print(f"{evict()} Einträge entfernt.")
+    if args.clear and summary['entries']:
+        for name in os.listdir(CSV_CACHE['cache_dir']):
+            if name.endswith(tuple(EXTENSIONS.values())):
+                os.remove(os.path.join(CSV_CACHE['cache_dir'], name))
+        print("Zwischenspeicher geleert.")
@@ -0,0 +1,300 @@
+# reason_codes.py
+"""
+Registry der Validierungsgründe.
+
+Jeder Grund ist ein Bit in einer uint64-Maske pro Parameter und Zeitstempel.
+Zusatzangaben (Grenzwert, Saison, Lauflänge, Messwerte ...) werden strukturiert
+gespeichert und erst beim Rendern - also nur für Zeilen, die in Berichte,
+Dashboards oder die Datenbank gelangen - in deutschen Text übersetzt.
+Das Kombinieren mehrerer Tests ist ein bitweises ODER.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional
+
+
+class ReasonCodes:
+    """
+    Bitpositionen der Gründe. Die Reihenfolge bestimmt auch die Reihenfolge
+    der Texte beim Rendern (Basis-Tests, Multivariat, Korrelation, Landwirtschaft).
+    """
+    MISSING = 0
+    RANGE_HIGH = 1
+    RANGE_LOW = 2
+    STUCK = 3
+    SPIKE = 4
+
+    MULTIVARIATE_LOW = 5
+    MULTIVARIATE_HIGH = 6
+    MULTIVARIATE_COMBINATION = 7
+
+    # Korrelationsprüfungen (in der Reihenfolge der Prüfungen)
+    PH_O2_DAY_HIGH_PH = 8
+    PH_O2_DAY_LOW_PH = 9
+    PH_O2_NIGHT = 10
+    O2_SATURATION_EXTREME = 11
+    O2_SATURATION_HIGH = 12
+    O2_SATURATION_CRITICAL = 13
+    O2_SATURATION_LOW = 14
+    STRATIFICATION_INVERSE_SUMMER = 15
+    STRATIFICATION_INVERSE = 16
+    STRATIFICATION_EXTREME = 17
+    STRATIFICATION_UNSTABLE = 18
+    ALGAE_BLOOM_STRONG = 19
+    ALGAE_BLOOM_POSSIBLE = 20
+    CONDUCTIVITY_LOW = 21
+    CONDUCTIVITY_HIGH = 22
+    CONDUCTIVITY_IMPLAUSIBLE = 23
+    REDOX_HIGH_LOW_O2 = 24
+    REDOX_NEGATIVE_HIGH_O2 = 25
+    REDOX_REDUCING = 26
+    NUTRIENT_LIMITED = 27
+    NUTRIENT_CYANOBACTERIA = 28
+    NUTRIENT_PHYCO_RATIO = 29
+
+    # Landwirtschaftliche Einträge (in der Reihenfolge der runoff_patterns)
+    AGRI_FERTILIZER = 30
+    AGRI_EROSION = 31
+    AGRI_MANURE = 32
+    AGRI_PESTICIDE = 33
+
+
+# Bits für die Algenblüten-Indikatoren (Argument 'indicators')
+ALGAE_CHL_HIGH = 1
+ALGAE_PH_HIGH = 2
+ALGAE_O2_HIGH = 4
+ALGAE_O2_LOW_NIGHT = 8
+ALGAE_TURBIDITY = 16
+
+# Bits für die landwirtschaftlichen Indikatoren (Argument 'indicators')
+AGRI_NITRATE = 1
+AGRI_TURBIDITY = 2
+AGRI_DOC = 4
+AGRI_OXYGEN = 8
+
+SEASON_INFO = {0: "", 1: " (Winter)", 2: " (Frühling)", 3: " (Sommer)", 4: " (Herbst)"}
+
+
+def _render_stuck(args: Dict) -> str:
+    text = f"Wert seit {args['run_length']} Stunden unverändert"
+    if 'start' in args:
+        # Anzeigezeiten (bereits +2h korrigiert, siehe stuck_value_validator)
+        text += f" ({pd.Timestamp(args['start']):%H:%M}-{pd.Timestamp(args['end']):%H:%M})"
+    return text
+
+
+def _render_algae(args: Dict, prefix: str) -> str:
+    indicators = int(args['indicators'])
+    details = []
+    if indicators & ALGAE_CHL_HIGH:
+        details.append(f"Chl-a hoch ({args['chl_a']:.1f})")
+    if indicators & ALGAE_PH_HIGH:
+        details.append(f"pH erhöht ({args['ph']:.2f})")
+    if indicators & ALGAE_O2_HIGH:
+        details.append(f"O2 erhöht ({args['o2']:.1f})")
+    elif indicators & ALGAE_O2_LOW_NIGHT:
+        details.append(f"O2 kritisch niedrig nachts ({args['o2']:.1f})")
+    if indicators & ALGAE_TURBIDITY:
+        details.append("Trübung algenbedingt")
+    return f"{prefix}: {', '.join(details)}"
+
+
+def _render_agricultural(args: Dict, prefix: str) -> str:
+    indicators = int(args['indicators'])
+    parts = [prefix]
+    param_changes = []
+    if indicators & AGRI_NITRATE:
+        param_changes.append(f"Nitrat ↑{args['nitrate_increase']:.1f} mg/L")
+    if indicators & AGRI_TURBIDITY:
+        param_changes.append("Trübung erhöht")
+    if indicators & AGRI_DOC:
+        param_changes.append("DOC erhöht")
+    if indicators & AGRI_OXYGEN:
+        param_changes.append("O₂-Zehrung")
+    if param_changes:
+        parts.append(f"({', '.join(param_changes)})")
+    if args.get('post_rain'):
+        parts.append("nach Niederschlag")
+    return " - ".join(parts)
+
+
+# Code -> konstanter Text oder Funktion(args) -> Text
+REASON_TEXTS = {
+    ReasonCodes.MISSING: "Fehlender Wert",
+    # threshold: Grenzwert als Text, wie er in der Regel steht (siehe validator._build_seasonal_tables)
+    ReasonCodes.RANGE_HIGH: lambda a: f"Wert > Max ({a['threshold']}){SEASON_INFO[int(a.get('season', 0))]}",
+    ReasonCodes.RANGE_LOW: lambda a: f"Wert < Min ({a['threshold']}){SEASON_INFO[int(a.get('season', 0))]}",
+    ReasonCodes.STUCK: _render_stuck,
+    ReasonCodes.SPIKE: "Unrealistischer Sprung zum Vorwert",
+
+    ReasonCodes.MULTIVARIATE_LOW: lambda a: f"Multivariate Anomalie: {a['param']} ungewöhnlich niedrig",
+    ReasonCodes.MULTIVARIATE_HIGH: lambda a: f"Multivariate Anomalie: {a['param']} ungewöhnlich hoch",
+    ReasonCodes.MULTIVARIATE_COMBINATION: "Unplausible Parameterkombination",
+
+    ReasonCodes.PH_O2_DAY_HIGH_PH: "Hoher pH bei niedrigem O2 tagsüber (untypisch für Photosynthese)",
+    ReasonCodes.PH_O2_DAY_LOW_PH: "Niedriger pH bei hohem O2 tagsüber (untypisch)",
+    ReasonCodes.PH_O2_NIGHT: "Hoher pH und O2 nachts (keine Photosynthese erwartet)",
+    ReasonCodes.O2_SATURATION_EXTREME: lambda a: f"Extreme O2-Übersättigung ({a['saturation']:.0f}%) - mögliche starke Algenblüte",
+    ReasonCodes.O2_SATURATION_HIGH: lambda a: f"O2-Übersättigung ({a['saturation']:.0f}%) - aktive Photosynthese",
+    ReasonCodes.O2_SATURATION_CRITICAL: lambda a: f"Kritisch niedriger O2 ({a['saturation']:.0f}% Sättigung)",
+    ReasonCodes.O2_SATURATION_LOW: lambda a: f"Niedrige O2-Sättigung ({a['saturation']:.0f}%) - mögliche Belastung",
+    ReasonCodes.STRATIFICATION_INVERSE_SUMMER: "Inverse Temperaturschichtung im Sommer (physikalisch unplausibel)",
+    ReasonCodes.STRATIFICATION_INVERSE: "Inverse Temperaturschichtung - für Jahreszeit prüfen",
+    ReasonCodes.STRATIFICATION_EXTREME: f"Extreme Temperatursprungschicht (>{3}°C/0.5m)",
+    ReasonCodes.STRATIFICATION_UNSTABLE: "Instabile Temperaturschichtung detektiert",
+    ReasonCodes.ALGAE_BLOOM_STRONG: lambda a: _render_algae(a, "Starke Algenblüte wahrscheinlich"),
+    ReasonCodes.ALGAE_BLOOM_POSSIBLE: lambda a: _render_algae(a, "Algenblüte möglich"),
+    ReasonCodes.CONDUCTIVITY_LOW: lambda a: f"Sehr niedrige Leitfähigkeit ({a['cond_25']:.0f} µS/cm bei 25°C)",
+    ReasonCodes.CONDUCTIVITY_HIGH: lambda a: f"Hohe Leitfähigkeit ({a['cond_25']:.0f} µS/cm bei 25°C) - Verschmutzung?",
+    ReasonCodes.CONDUCTIVITY_IMPLAUSIBLE: "Leitfähigkeit-Temperatur-Beziehung unplausibel",
+    ReasonCodes.REDOX_HIGH_LOW_O2: "Hohes Redoxpotential bei niedrigem O2 (ungewöhnlich)",
+    ReasonCodes.REDOX_NEGATIVE_HIGH_O2: "Negatives Redoxpotential bei hohem O2 (widersprüchlich)",
+    ReasonCodes.REDOX_REDUCING: "Stark reduzierende Bedingungen - anaerobe Zone?",
+    ReasonCodes.NUTRIENT_LIMITED: "Hohes Chl-a trotz Nitrat-Limitierung",
+    ReasonCodes.NUTRIENT_CYANOBACTERIA: "Hoher Phycocyanin bei niedrigem Chl-a - Cyanobakterien-Dominanz",
+    ReasonCodes.NUTRIENT_PHYCO_RATIO: lambda a: f"Hohes Phycocyanin/Chl-a Verhältnis ({a['ratio']:.2f}) - Blaualgen",
+
+    ReasonCodes.AGRI_FERTILIZER: lambda a: _render_agricultural(a, "Verdacht auf Düngemitteleintrag"),
+    ReasonCodes.AGRI_EROSION: lambda a: _render_agricultural(a, "Verdacht auf Erosionseintrag"),
+    ReasonCodes.AGRI_MANURE: lambda a: _render_agricultural(a, "Verdacht auf Gülleeintrag"),
+    ReasonCodes.AGRI_PESTICIDE: lambda a: _render_agricultural(a, "Verdacht auf Pestizideintrag"),
+}
+
+
+class ReasonMask:
+    """
+    Gründe einer Zeitreihe als uint64-Bitmaske plus strukturierte Argumente.
+
+    `args[code]` enthält pro Argumentname entweder einen Skalar (gilt für alle
+    Zeilen) oder ein Array in voller Länge (nur an gesetzten Bits gültig).
+    """
+
+    def __init__(self, index: pd.Index):
+        self.index = index
+        self.bits = np.zeros(len(index), dtype=np.uint64)
+        self.args: Dict[int, Dict[str, object]] = {}
+        self._texts: Optional[pd.Series] = None  # zuletzt gerenderte Texte aller Zeilen
+
+    def add(self, mask: np.ndarray, code: int, **args) -> 'ReasonMask':
+        """
+        Setzt das Bit `code` für alle Zeilen in `mask`.
+        Argumente sind Skalare oder Arrays mit einem Wert pro markierter Zeile
+        bzw. pro Zeile der gesamten Reihe.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        if not mask.any():
+            return self
+        self.bits[mask] |= np.uint64(1 << code)
+        self._texts = None
+
+        code_args = self.args.setdefault(code, {})
+        for name, value in args.items():
+            target = code_args.get(name)
+            if np.ndim(value) == 0:
+                if target is None or (np.ndim(target) == 0 and target == value):
+                    code_args[name] = value
+                    continue
+                value = np.full(int(mask.sum()), value)
+            value = np.asarray(value)
+            if len(value) == len(self.bits):
+                value = value[mask]
+            if target is None or np.ndim(target) == 0:
+                target = self._full_array(target, value.dtype)
+                code_args[name] = target
+            elif target.dtype != value.dtype and target.dtype != object:
+                target = target.astype(np.result_type(target.dtype, value.dtype))
+                code_args[name] = target
+            target[mask] = value
+        return self
+
+    def _full_array(self, fill, dtype) -> np.ndarray:
+        """Argument-Array in voller Länge, vorbelegt mit einem bisherigen Skalar."""
+        if fill is None:
+            fill = np.datetime64('NaT') if dtype.kind == 'M' else ("" if dtype.kind in 'OUS' else 0)
+        if dtype.kind in 'US':
+            dtype = object
+        return np.full(len(self.bits), fill, dtype=dtype)
+
+    def has(self, code: int) -> np.ndarray:
+        """Boolesche Maske der Zeilen, in denen `code` gesetzt ist."""
+        return (self.bits & np.uint64(1 << code)) != 0
+
+    def any(self) -> np.ndarray:
+        """Boolesche Maske der Zeilen mit mindestens einem Grund."""
+        return self.bits != 0
+
+    def __or__(self, other: 'ReasonMask') -> 'ReasonMask':
+        result = ReasonMask(self.index)
+        result.bits = self.bits.copy()
+        result.args = {code: dict(code_args) for code, code_args in self.args.items()}
+        result |= other
+        return result
+
+    def __ior__(self, other: 'ReasonMask') -> 'ReasonMask':
+        """Kombiniert zwei Masken (bitweises ODER, Argumente von `other` für dessen Bits)."""
+        self.bits |= other.bits
+        self._texts = None
+        for code, code_args in other.args.items():
+            self.args.setdefault(code, {})
+            rows = other.has(code)
+            for name, value in code_args.items():
+                self.add(rows, code, **{name: value if np.ndim(value) == 0 else value[rows]})
+        return self
+
+    def render(self, rows: Optional[np.ndarray] = None, separator: str = "; ") -> pd.Series:
+        """
+        Rendert die deutschen Begründungstexte. Die Texte aller Zeilen werden bis zur
+        nächsten Änderung der Maske gespeichert: mehrere Ausgaben (Bericht, Datenbank,
+        JSON) rendern sie nur einmal.
+
+        Args:
+            rows: Optionale boolesche Maske der zu rendernden Zeilen
+                  (Standard: alle Zeilen mit mindestens einem Grund).
+            separator: Trennzeichen zwischen mehreren Gründen einer Zeile.
+
+        Returns:
+            pd.Series: Texte (leer für Zeilen ohne Grund bzw. nicht angefragte Zeilen).
+        """
+        cacheable = rows is None and separator == "; "
+        if cacheable and self._texts is not None:
+            return self._texts.copy()
+
+        texts = np.full(len(self.bits), "", dtype=object)
+        selected = self.any() if rows is None else (np.asarray(rows, dtype=bool) & self.any())
+        if not selected.any():
+            return pd.Series(texts, index=self.index)
+
+        for code in sorted(self.args):
+            positions = np.flatnonzero(selected & self.has(code))
+            if len(positions) == 0:
+                continue
+            code_texts = np.asarray(render_reason(code, self.args[code], positions), dtype=object)
+            current = texts[positions]
+            texts[positions] = np.where(current == "", code_texts, current + separator + code_texts)
+
+        result = pd.Series(texts, index=self.index)
+        if cacheable:
+            self._texts = result
+            return result.copy()
+        return result
+
+
+def render_reason(code: int, code_args: Dict[str, object], positions: Iterable[int]) -> list:
+    """Rendert den Text eines Codes für die angegebenen Zeilenpositionen."""
+    template = REASON_TEXTS[code]
+    if isinstance(template, str):
+        return [template] * len(positions)
+    texts = []
+    for pos in positions:
+        row_args = {name: value if np.ndim(value) == 0 else value[pos] for name, value in code_args.items()}
+        texts.append(template(row_args))
+    return texts
+
+
+def combine_reason_masks(masks: Iterable[ReasonMask], index: pd.Index) -> ReasonMask:
+    """Kombiniert beliebig viele Masken per bitweisem ODER."""
+    combined = ReasonMask(index)
+    for mask in masks:
+        combined |= mask
+    return combined
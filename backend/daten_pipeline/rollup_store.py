@@ -0,0 +1,204 @@
+# rollup_store.py
+"""
+Verdichtete Zeitreihen pro Station und Parameter: Woche, Monat und Badesaison.
+
+Die Perioden werden nicht aus Stundenwerten neu berechnet, sondern inkrementell
+aus den Tageszuständen (DailySketch, siehe daily_sketch.py) fortgeschrieben:
+Die in einem Lauf neu hinzugekommenen Stunden werden in die Zustände ihrer Woche,
+ihres Monats und ggf. ihrer Badesaison eingemischt. Wurden bereits gespeicherte
+Stunden neu validiert, werden die betroffenen Perioden aus den gespeicherten
+Tageszuständen (daily_sketches) neu zusammengesetzt. Gespeichert wird lokal
+(eine JSON-Datei pro Station) und - falls verbunden - in der Tabelle period_rollups.
+Die Kennwerte beruhen auf den GOOD-Stundenwerten (ohne Interpolation).
+
+Fortgeschrieben wird in stage_database, also nur mit Datenbankverbindung (die
+Tageszustände werden dort gelesen und gespeichert). Gelesen werden die Wochenmittel
+derzeit von der Langzeittrend-Analyse (stage_trends) - wenige hundert Zeilen statt
+zehntausender Stundenwerte; `series` steht weiteren Auswertungen ebenso offen.
+Die Zustände sind nicht gegen gleichzeitigen Zugriff geschützt: stage_trends liest
+sie erst nach stage_database (Datenabhängigkeit über rollups_updated).
+"""
+
+import os
+import json
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+from config_file import ROLLUPS
+from daily_sketch import DailySketch, SketchKey
+
+# Schlüssel einer Periode: (Periodentyp, Periodenbeginn, Parameter)
+RollupKey = Tuple[str, pd.Timestamp, str]
+
+
+def period_start(day: pd.Timestamp, period: str) -> Optional[pd.Timestamp]:
+    """Beginn der Periode, zu der ein Tag gehört (None = Tag liegt außerhalb, z.B. der Badesaison)."""
+    day = pd.Timestamp(day).normalize()
+    if period == 'week':
+        return day - pd.Timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    if period == 'bathing_season':
+        (start_month, start_day), (end_month, end_day) = ROLLUPS['bathing_season']
+        if (start_month, start_day) <= (day.month, day.day) <= (end_month, end_day):
+            return pd.Timestamp(year=day.year, month=start_month, day=start_day)
+        return None
+    raise ValueError(f"Unbekannter Periodentyp: {period}")
+
+
+def period_days(start: pd.Timestamp, period: str) -> pd.DatetimeIndex:
+    """Alle Tage einer Periode."""
+    start = pd.Timestamp(start)
+    if period == 'week':
+        end = start + pd.Timedelta(days=6)
+    elif period == 'month':
+        end = start + pd.offsets.MonthEnd(0)
+    elif period == 'bathing_season':
+        _, (end_month, end_day) = ROLLUPS['bathing_season']
+        end = pd.Timestamp(year=start.year, month=end_month, day=end_day)
+    else:
+        raise ValueError(f"Unbekannter Periodentyp: {period}")
+    return pd.date_range(start, end, freq='D')
+
+
+class RollupStore:
+    """
+    Hält die Perioden-Zustände der Stationen und schreibt sie fort.
+    """
+
+    def __init__(self, local_dir: Optional[str] = None, periods: Optional[List[str]] = None):
+        self.local_dir = local_dir or ROLLUPS['local_dir']
+        self.periods = periods or ROLLUPS['periods']
+        self._states: Dict[str, Dict[RollupKey, DailySketch]] = {}
+        os.makedirs(self.local_dir, exist_ok=True)
+
+    def _path(self, station_id: str) -> str:
+        return os.path.join(self.local_dir, f"{station_id}_rollups.json")
+
+    def load(self, station_id: str) -> Dict[RollupKey, DailySketch]:
+        """Lädt die lokal gespeicherten Perioden einer Station (mit Cache im Speicher)."""
+        if station_id not in self._states:
+            states = {}
+            path = self._path(station_id)
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    for record in json.load(f):
+                        key = (record['period'], pd.Timestamp(record['period_start']), record['parameter'])
+                        states[key] = DailySketch.from_record(record)
+            self._states[station_id] = states
+        return self._states[station_id]
+
+    def save(self, station_id: str) -> str:
+        """Speichert die Perioden einer Station atomar als JSON."""
+        records = []
+        for (period, start, param), state in sorted(self.load(station_id).items(), key=lambda item: (item[0][0], item[0][1], item[0][2])):
+            record = state.to_record()
+            record.update({'period': period, 'period_start': start.strftime('%Y-%m-%d'), 'parameter': param})
+            records.append(record)
+
+        path = self._path(station_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+    def _period_keys(self, day: pd.Timestamp, param: str) -> List[RollupKey]:
+        """Perioden, zu denen ein Tag gehört."""
+        keys = []
+        for period in self.periods:
+            start = period_start(day, period)
+            if start is not None:
+                keys.append((period, start, param))
+        return keys
+
+    def update(self, station_id: str, new_sketches: Dict[SketchKey, DailySketch],
+               db_loader=None, replaced: Iterable[SketchKey] = ()) -> Dict[RollupKey, DailySketch]:
+        """
+        Mischt neu hinzugekommene Stunden in die Perioden ein.
+
+        `new_sketches` sind die Zuwächse eines Laufs (siehe merge_daily_sketches),
+        nicht die zusammengeführten Tage - sonst würden Stunden doppelt gezählt.
+        Perioden mit Tagen aus `replaced` (neu validierte Stunden) werden aus den
+        gespeicherten Tageszuständen neu berechnet; dafür wird db_loader benötigt,
+        und die Tageszustände müssen bereits gespeichert sein.
+
+        Returns:
+            Dict: die geänderten Perioden-Zustände
+        """
+        states = self.load(station_id)
+        changed = {}
+        rebuild = {key for day, param in replaced for key in self._period_keys(day, param)}
+        if rebuild:
+            changed.update(self._rebuild(station_id, rebuild, db_loader))
+            states.update(changed)
+
+        for (day, param), sketch in new_sketches.items():
+            for key in self._period_keys(day, param):
+                if key in rebuild:
+                    continue  # enthält den Zuwachs bereits
+                state = states.setdefault(key, DailySketch())
+                state.merge(sketch)
+                state.hour_mask = 0  # Stundenmaske ist nur für einzelne Tage sinnvoll
+                changed[key] = state
+
+        if changed:
+            self.save(station_id)
+            if db_loader is not None and db_loader.conn:
+                db_loader.upsert_period_rollups(station_id, changed)
+        return changed
+
+    def _rebuild(self, station_id: str, keys: Iterable[RollupKey], db_loader) -> Dict[RollupKey, DailySketch]:
+        """Setzt Perioden aus den gespeicherten Tageszuständen neu zusammen."""
+        if db_loader is None or not db_loader.conn:
+            raise ConnectionError("Neuberechnung der Rollups benötigt die Datenbank (daily_sketches).")
+        keys = list(keys)
+        days = sorted({day for period, start, _ in keys for day in period_days(start, period)})
+        stored = db_loader.fetch_daily_sketches(station_id, days)
+
+        states = {key: DailySketch() for key in keys}
+        for (day, param), sketch in stored.items():
+            for key in self._period_keys(day, param):
+                if key in states:
+                    states[key].merge(sketch)
+                    states[key].hour_mask = 0
+        return states
+
+    def series(self, station_id: str, period: str, statistic: str = 'mean',
+               parameters: Optional[Iterable[str]] = None,
+               pending: Optional[Dict[SketchKey, DailySketch]] = None) -> pd.DataFrame:
+        """
+        Zeitreihe einer Kennzahl (mean, min, max, median, std, good_ratio) pro Periode.
+
+        Args:
+            pending: Tageszustände, die (noch) nicht fortgeschrieben wurden, z.B. eines
+                     Laufs ohne Datenbank; sie werden nur für diese Abfrage in Kopien der
+                     gespeicherten Perioden eingemischt
+
+        Returns:
+            pd.DataFrame: Index = Periodenbeginn, eine Spalte pro Parameter
+        """
+        states = self.load(station_id)
+        if pending:
+            states = dict(states)
+            for (day, param), sketch in pending.items():
+                key = (period, period_start(day, period), param) if period in self.periods else None
+                if key is None or key[1] is None:
+                    continue
+                state = DailySketch()
+                if key in states:
+                    state.merge(states[key])
+                states[key] = state.merge(sketch)
+                state.hour_mask = 0
+
+        values: Dict[str, Dict[pd.Timestamp, float]] = {}
+        for (state_period, start, param), state in states.items():
+            if state_period != period or (parameters is not None and param not in parameters):
+                continue
+            if state.good_count == 0:
+                continue
+            values.setdefault(param, {})[start] = state.finalize()[statistic]
+
+        frame = pd.DataFrame(values).sort_index()
+        if parameters is not None:
+            frame = frame.reindex(columns=list(parameters))
+        return frame
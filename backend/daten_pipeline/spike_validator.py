@@ -1,11 +1,12 @@
 import pandas as pd
+from reason_codes import ReasonCodes, ReasonMask
 
 class QartodFlags:
     """Definiert die standardisierten QARTOD-Flag-Werte."""
     GOOD = 1
     BAD = 4
 
-def check_spikes(series: pd.Series, max_rate_of_change: float):
+def check_spikes(series: pd.Series, max_rate_of_change: float, as_codes: bool = False):
     """
     Identifiziert unrealistische Sprünge (Spikes) in einer Zeitreihe und gibt Flags und Gründe zurück.
 
@@ -13,20 +14,22 @@ def check_spikes(series: pd.Series, max_rate_of_change: float):
         series (pd.Series): Die Zeitreihe der Messwerte.
         max_rate_of_change (float): Die maximal erlaubte Änderung von einer Stunde
                                     zur nächsten.
+        as_codes (bool): Gründe als ReasonMask statt als Texte zurückgeben.
 
     Returns:
         tuple[pd.Series, pd.Series]: Ein Tupel, das (Flags, Gründe) enthält.
     """
     # Erstelle eine Serie, die standardmäßig alle Werte als "GOOD" markiert.
     flags = pd.Series(QartodFlags.GOOD, index=series.index)
-    # Erstelle eine leere Serie für die Gründe.
-    reasons = pd.Series("", index=series.index)
+    # Erstelle eine leere Bitmaske für die Gründe.
+    reasons = ReasonMask(series.index)
     
     # Berechne die absolute Änderung zum vorherigen Wert.
     rate_of_change = series.diff().abs()
     
     # Markiere alle Werte, bei denen die Änderung größer als der erlaubte Schwellenwert ist, als "BAD".
-    flags[rate_of_change > max_rate_of_change] = QartodFlags.BAD
-    reasons[rate_of_change > max_rate_of_change] = "Unrealistischer Sprung zum Vorwert"
+    is_spike = rate_of_change > max_rate_of_change
+    flags[is_spike] = QartodFlags.BAD
+    reasons.add(is_spike.to_numpy(), ReasonCodes.SPIKE)
     
-    return flags, reasons
\ No newline at end of file
+    return flags, (reasons if as_codes else reasons.render())
\ No newline at end of file
@@ -1,46 +1,141 @@
 import pandas as pd
+import numpy as np
+from reason_codes import ReasonCodes, ReasonMask
 
 class QartodFlags:
     """Definiert die standardisierten QARTOD-Flag-Werte."""
     GOOD = 1
     SUSPECT = 3
+    BAD = 4
 
-def check_stuck_values(series: pd.Series, tolerance: int = 3):
+# Standardwerte, falls für einen Parameter keine STUCK-Regel in config_rules existiert
+DEFAULT_STUCK_RULE = {
+    'suspect_threshold': 3,   # Stunden - ab dieser Lauflänge SUSPECT
+    'fail_threshold': None,   # Stunden - ab dieser Lauflänge BAD (None = nie)
+    'epsilon': 0.0            # Max. Spannweite (max - min) innerhalb eines "flachen" Fensters
+}
+
+def check_stuck_values(series: pd.Series, tolerance: int = 3, epsilon: float = 0.0,
+                       fail_threshold: int = None, as_codes: bool = False):
     """
     Identifiziert "feststeckende" Werte in einer Zeitreihe und gibt Flags und Gründe zurück.
+
+    QARTOD Flat-Line-Test: Ein Fenster von `tolerance` aufeinanderfolgenden Werten gilt
+    als flach, wenn seine Spannweite (max - min) höchstens `epsilon` beträgt. Alle Werte in
+    flachen Fenstern werden zu Läufen zusammengefasst (Lauflängenkodierung); ein Lauf
+    endet, sobald die Spannweite seit Laufbeginn `epsilon` übersteigt. Eine langsame
+    Drift (kleine Schritte, die sich aufsummieren) ergibt so nur kurze Läufe.
+    Die Berechnung erfolgt mit NumPy in linearer Zeit; nur Läufe, deren Gesamtspannweite
+    `epsilon` übersteigt, werden Wert für Wert neu aufgeteilt.
+
+    Args:
+        series (pd.Series): Die Zeitreihe der Messwerte.
+        tolerance (int): Lauflänge ab der ein Lauf als SUSPECT markiert wird.
+        epsilon (float): Toleranz für Sensorrauschen (0 = exakte Gleichheit).
+        fail_threshold (int): Lauflänge ab der ein Lauf als BAD markiert wird (optional).
+        as_codes (bool): Gründe als ReasonMask statt als Texte zurückgeben.
+
+    Returns:
+        tuple[pd.Series, pd.Series]: Ein Tupel, das (Flags, Gründe) enthält.
+    """
+    n = len(series)
+    flags = np.full(n, QartodFlags.GOOD, dtype=int)
+    reasons = ReasonMask(series.index)
+    
+    def result():
+        return pd.Series(flags, index=series.index), (reasons if as_codes else reasons.render())
+    
+    if n == 0 or tolerance < 1 or n < tolerance:
+        return result()
+    
+    values = series.to_numpy(dtype=float)
+    
+    # 1. Endpunkte flacher Fenster: Spannweite der letzten `tolerance` Werte <= epsilon
+    #    (rolling max/min sind linear; Fenster mit NaN gelten nie als flach)
+    rolling = pd.Series(values).rolling(window=tolerance, min_periods=tolerance)
+    with np.errstate(invalid='ignore'):
+        flat_end = (rolling.max() - rolling.min()).to_numpy() <= epsilon
+    
+    # 2. Jeder Wert, der in mindestens einem flachen Fenster liegt, ist betroffen
+    #    (Fensterende im Bereich [i, i + tolerance - 1], über kumulierte Summen)
+    flat_count = np.concatenate(([0], np.cumsum(flat_end)))
+    window_end = np.minimum(np.arange(n) + tolerance, n)
+    in_flat_window = (flat_count[window_end] - flat_count[np.arange(n)]) > 0
+    
+    if not in_flat_window.any():
+        return result()
+    
+    # 3. Lauflängenkodierung: neuer Lauf, wenn der Vorgänger nicht betroffen ist
+    #    oder der Sprung zum Vorgänger größer als epsilon ist
+    with np.errstate(invalid='ignore'):
+        close_to_previous = np.concatenate(([False], np.abs(np.diff(values)) <= epsilon))
+    previous_in_window = np.concatenate(([False], in_flat_window[:-1]))
+    run_start = in_flat_window & ~(previous_in_window & close_to_previous)
+    if epsilon > 0:
+        run_start = _split_drifting_runs(values, run_start, in_flat_window, epsilon)
+    
+    starts = np.flatnonzero(run_start)
+    run_id = np.cumsum(run_start) - 1
+    run_lengths = np.bincount(run_id[in_flat_window], minlength=len(starts))
+    ends = starts + run_lengths - 1
+    
+    # Ein Lauf kann durch die epsilon-Trennung kürzer als `tolerance` werden
+    flagged_runs = run_lengths >= tolerance
+    is_flagged = in_flat_window & flagged_runs[run_id]
+    flags[is_flagged] = QartodFlags.SUSPECT
+    if fail_threshold is not None:
+        failed_runs = run_lengths >= fail_threshold
+        flags[in_flat_window & failed_runs[run_id]] = QartodFlags.BAD
+    
+    # 4. Gründe mit Lauflänge und Zeitspanne des jeweiligen Laufs (Text erst beim Rendern)
+    flagged_run_id = run_id[is_flagged]
+    run_args = {'run_length': run_lengths[flagged_run_id]}
+    if isinstance(series.index, pd.DatetimeIndex):
+        # KORREKTUR: Die Zeiten sind bereits lokal, werden aber als UTC behandelt
+        # Daher müssen wir 2 Stunden ADDIEREN für die korrekte Anzeige
+        display_index = (series.index + pd.Timedelta(hours=2)).to_numpy()
+        run_args['start'] = display_index[starts[flagged_run_id]]
+        run_args['end'] = display_index[ends[flagged_run_id]]
+    reasons.add(is_flagged, ReasonCodes.STUCK, **run_args)
+    
+    return result()
+
+def _split_drifting_runs(values: np.ndarray, run_start: np.ndarray, in_run: np.ndarray,
+                         epsilon: float) -> np.ndarray:
+    """
+    Teilt Läufe, deren Spannweite insgesamt größer als `epsilon` ist (Nachbarschritte
+    jeweils <= epsilon, aber aufsummiert mehr): ab dem Laufbeginn wird max - min
+    mitgeführt, beim Überschreiten beginnt mit diesem Wert ein neuer Lauf.
+    """
+    starts = np.flatnonzero(run_start)
+    run_id = np.cumsum(run_start) - 1
+    lengths = np.bincount(run_id[in_run], minlength=len(starts))
+    
+    # Spannweite je Lauf über die zusammenhängenden Laufwerte (Läufe enthalten kein NaN)
+    run_values = values[in_run]
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    spread = np.maximum.reduceat(run_values, offsets) - np.minimum.reduceat(run_values, offsets)
+    drifting = np.flatnonzero(spread > epsilon)
+    if drifting.size == 0:
+        return run_start
+    
+    run_start = run_start.copy()
+    for run in drifting:
+        start = starts[run]
+        low = high = values[start]
+        for pos, value in enumerate(values[start + 1:start + lengths[run]].tolist(), start=start + 1):
+            low, high = min(low, value), max(high, value)
+            if high - low > epsilon:
+                run_start[pos] = True
+                low = high = value
+    return run_start
+
+def get_stuck_rule(stuck_rules: dict, param_name: str) -> dict:
+    """
+    Liefert die Flat-Line-Regel für einen Parameter: parameterspezifische Regel,
+    sonst die globale Regel (Schlüssel None), sonst DEFAULT_STUCK_RULE.
     """
-    # Erstelle eine Serie, die standardmäßig alle Werte als "GOOD" markiert.
-    flags = pd.Series(QartodFlags.GOOD, index=series.index)
-    # Erstelle eine leere Serie für die Gründe.
-    reasons = pd.Series("", index=series.index)
-    
-    # Finde zusammenhängende Gruppen von gleichen Werten
-    # Erstelle eine Maske für Wertänderungen
-    value_changed = series.diff() != 0
-    # Erste Wert ist immer eine neue Gruppe
-    value_changed.iloc[0] = True
-    
-    # Gruppiere zusammenhängende gleiche Werte
-    groups = value_changed.cumsum()
-    
-    # Für jede Gruppe prüfen
-    for group_id, group_data in series.groupby(groups):
-        if len(group_data) >= tolerance:
-            # Hole Start- und Endzeit der Stuck-Periode
-            start_time = group_data.index[0]
-            end_time = group_data.index[-1]
-            
-            # KORREKTUR: Die Zeiten sind bereits lokal, werden aber als UTC behandelt
-            # Daher müssen wir 2 Stunden ADDIEREN für die korrekte Anzeige
-            start_display = start_time + pd.Timedelta(hours=2)
-            end_display = end_time + pd.Timedelta(hours=2)
-            
-            # Formatiere die Zeiten (nur Uhrzeit)
-            start_str = start_display.strftime('%H:%M')
-            end_str = end_display.strftime('%H:%M')
-            
-            # Setze Flags und Gründe für alle Werte in dieser Gruppe
-            flags[group_data.index] = QartodFlags.SUSPECT
-            reasons[group_data.index] = f"Wert seit {len(group_data)} Stunden unverändert ({start_str}-{end_str})"
-    
-    return flags, reasons
\ No newline at end of file
+    rule = dict(DEFAULT_STUCK_RULE)
+    rule.update(stuck_rules.get(None, {}))
+    rule.update(stuck_rules.get(param_name, {}))
+    return rule
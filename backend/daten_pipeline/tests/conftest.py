@@ -0,0 +1,17 @@
+# conftest.py
+"""
+Gemeinsame Einstellungen der Regressionstests.
+
+Die Pipeline-Module liegen flach in daten_pipeline/ und importieren sich gegenseitig
+über ihren Modulnamen; das Verzeichnis kommt daher an den Anfang von sys.path.
+
+Aufruf (im Verzeichnis daten_pipeline):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PIPELINE_DIR not in sys.path:
+    sys.path.insert(0, PIPELINE_DIR)
@@ -0,0 +1,192 @@
+# test_agricultural_runoff_detector.py
+"""
+Regressionstests der vektorisierten Eintragserkennung (agricultural_runoff_detector.py).
+
+Referenz ist die frühere Umsetzung in kompakter Form: gleitender Median über '72h' mit
+Gesamtmedian als Auffüllwert, Spikes und Sauerstoffzehrung Zeile für Zeile, Gründe als
+Texte pro Zeitpunkt. Flags, gerenderte Gründe, erkannte Ereignisse und Risikoindikatoren
+müssen übereinstimmen. Die Langzeittrends sind nicht Teil des Vergleichs (Steigung jetzt
+pro Woche Abstand, siehe analyze_long_term_trends).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agricultural_runoff_detector import AgriculturalRunoffDetector, QartodFlags
+
+PATTERN_REASONS = {
+    'fertilizer_runoff': "Verdacht auf Düngemitteleintrag",
+    'erosion_runoff': "Verdacht auf Erosionseintrag",
+    'manure_runoff': "Verdacht auf Gülleeintrag",
+    'pesticide_runoff': "Verdacht auf Pestizideintrag",
+}
+INDICATOR_COLUMNS = {
+    'nitrate_spike': ('nitrate', 'Nitrat', 'nitrate_spike'),
+    'conductivity_increase': ('conductivity', 'Leitfähigkeit', 'conductivity_spike'),
+    'turbidity_spike': ('turbidity', 'Trübung', 'turbidity_spike'),
+    'doc_spike': ('doc', 'DOC', 'doc_spike'),
+    'oxygen_depletion': ('oxygen', 'Gelöster Sauerstoff', None),
+}
+
+
+def _spike_positions(series, baseline, threshold):
+    positions = []
+    for i in range(len(series)):
+        value, base = series.iloc[i], baseline.iloc[i]
+        if pd.isna(value) or pd.isna(base):
+            continue
+        rel_change = (value - base) / base if base > 0 else 0
+        if value - base >= threshold['absolute_increase'] or rel_change >= threshold['relative_increase']:
+            positions.append(i)
+    return positions
+
+
+def _depletion_positions(series, baseline):
+    positions = []
+    for i in range(len(series)):
+        value, base = series.iloc[i], baseline.iloc[i]
+        if pd.isna(value) or pd.isna(base) or not base > 0:
+            continue
+        if (base - value) / base >= 0.3 or value < 4.0:
+            positions.append(i)
+    return positions
+
+
+def _risk_indicators(df, baselines):
+    indicators = {}
+    if 'Nitrat' in df.columns:
+        peaks = (df['Nitrat'] > df['Nitrat'].quantile(0.9)).sum()
+        indicators['nutrient_load_index'] = min(100, df['Nitrat'].mean() / 10 * 50 + peaks / len(df) * 500)
+    spike_count = sum(len(_spike_positions(df[param], baselines[param],
+                                           {'relative_increase': 0.2, 'absolute_increase': 0}))
+                      for param in ['Nitrat', 'DOC', 'Trübung', 'Leitfähigkeit'] if param in df.columns)
+    indicators['runoff_frequency_index'] = min(100, spike_count / len(df) * 1000)
+    stress = 0
+    if 'Gelöster Sauerstoff' in df.columns:
+        stress += (df['Gelöster Sauerstoff'] < 6).sum() / len(df) * 30
+    if 'pH' in df.columns:
+        stress += ((df['pH'] < 6.5) | (df['pH'] > 9)).sum() / len(df) * 20
+    if 'Chl-a' in df.columns:
+        stress += (df['Chl-a'] > 50).sum() / len(df) * 25
+    indicators['water_stress_index'] = min(100, stress * 100)
+    indicators['overall_agricultural_risk'] = np.mean(list(indicators.values()))
+    return indicators
+
+
+def reference_detect(detector, df, rain_ends=(), lookback_hours=72):
+    """Früher detect_agricultural_runoff (ohne Langzeittrends)."""
+    baselines = {param: df[param].rolling(window=f'{lookback_hours}h', min_periods=int(lookback_hours * 0.5))
+                 .median().fillna(df[param].median()) for param in df.columns}
+    flags = pd.Series(QartodFlags.GOOD, index=df.index)
+    reasons = pd.Series("", index=df.index)
+    events = []
+    for runoff_type, pattern in detector.runoff_patterns.items():
+        found = {}
+        for indicator in pattern['indicators']:
+            if indicator not in INDICATOR_COLUMNS or INDICATOR_COLUMNS[indicator][1] not in df.columns:
+                continue
+            key, column, threshold_key = INDICATOR_COLUMNS[indicator]
+            if threshold_key is None:
+                positions = _depletion_positions(df[column], baselines[column])
+            else:
+                positions = _spike_positions(df[column], baselines[column], detector.thresholds[threshold_key])
+            if positions:
+                found[key] = positions
+        if len(found) < 2:
+            continue
+        affected = sorted(set().union(*found.values()))
+        for i in affected:
+            parts = [PATTERN_REASONS[runoff_type]]
+            changes = []
+            for key, positions in found.items():
+                if i not in positions:
+                    continue
+                if key == 'nitrate':
+                    changes.append(f"Nitrat ↑{df['Nitrat'].iloc[i] - baselines['Nitrat'].iloc[i]:.1f} mg/L")
+                elif key in ('turbidity', 'doc', 'oxygen'):
+                    changes.append({'turbidity': "Trübung erhöht", 'doc': "DOC erhöht", 'oxygen': "O₂-Zehrung"}[key])
+            if changes:
+                parts.append(f"({', '.join(changes)})")
+            hours_since = [(df.index[i] - end).total_seconds() / 3600 for end in rain_ends]
+            if any(0 <= h <= pattern['post_rain_delay'] + 12 for h in hours_since):
+                parts.append("nach Niederschlag")
+            reason = " - ".join(parts)
+            flags.iloc[i] = QartodFlags.SUSPECT
+            reasons.iloc[i] = f"{reasons.iloc[i]}; {reason}" if reasons.iloc[i] else reason
+        severity = 'high' if len(found) >= 4 else 'medium' if len(found) >= 3 else 'low'
+        events.append({'type': runoff_type, 'start_time': df.index[affected[0]], 'duration_hours': len(affected),
+                       'severity': severity, 'affected_parameters': list(found)})
+    return flags, reasons, events, _risk_indicators(df, baselines)
+
+
+@pytest.fixture(scope='module')
+def sensor_frame():
+    """Zwei Wochen Stundenwerte mit Lücken und einem Eintragsereignis nach Regen."""
+    rng = np.random.default_rng(2)
+    n = 24 * 14
+    data = pd.DataFrame({
+        'Nitrat': rng.gamma(8, 0.5, n), 'Leitfähigkeit': rng.normal(400, 30, n), 'Trübung': rng.gamma(4, 1, n),
+        'DOC': rng.gamma(6, 0.5, n), 'Gelöster Sauerstoff': rng.normal(8, 1, n), 'pH': rng.normal(8, 0.3, n),
+        'Chl-a': rng.gamma(2, 5, n),
+    }, index=pd.date_range('2024-03-01', periods=n, freq='h'))
+    for param in ('Nitrat', 'DOC', 'Gelöster Sauerstoff'):
+        data.loc[rng.random(n) < 0.03, param] = np.nan
+    event = slice('2024-03-08 06:00', '2024-03-08 20:00')
+    data.loc[event, 'Nitrat'] += 8
+    data.loc[event, 'Leitfähigkeit'] += 150
+    data.loc[event, 'DOC'] += 3
+    data.loc[event, 'Gelöster Sauerstoff'] -= 5
+    return data
+
+
+@pytest.fixture(scope='module')
+def weather():
+    precipitation = pd.Series(0.0, index=pd.date_range('2024-03-01', periods=24 * 14, freq='h'))
+    precipitation['2024-03-08 02:00':'2024-03-08 04:00'] = 12.0
+    return pd.DataFrame({'precipitation': precipitation})
+
+
+def assert_matches_reference(df, weather=None, rain_ends=()):
+    detector = AgriculturalRunoffDetector()
+    expected_flags, expected_reasons, expected_events, expected_risk = reference_detect(detector, df, rain_ends)
+    flags, reasons, details = detector.detect_agricultural_runoff(df, weather, analyze_trends=False)
+
+    assert flags.tolist() == expected_flags.tolist()
+    assert reasons.tolist() == expected_reasons.tolist()
+    assert details['detected_events'] == expected_events
+    assert details['risk_indicators'].keys() == expected_risk.keys()
+    for key, value in expected_risk.items():
+        assert details['risk_indicators'][key] == pytest.approx(value, rel=1e-12)
+    return flags, reasons
+
+
+def test_matches_reference(sensor_frame):
+    flags, _ = assert_matches_reference(sensor_frame)
+    assert (flags == QartodFlags.SUSPECT).any()
+
+
+def test_matches_reference_after_rain(sensor_frame, weather):
+    _, reasons = assert_matches_reference(sensor_frame, weather, rain_ends=[pd.Timestamp('2024-03-08 04:00')])
+    assert reasons.str.contains("nach Niederschlag").any()
+
+
+def test_matches_reference_without_oxygen_and_doc(sensor_frame):
+    """Fehlende Parameter lassen einzelne Muster aus (weniger als zwei Indikatoren)."""
+    assert_matches_reference(sensor_frame.drop(columns=['Gelöster Sauerstoff', 'DOC']))
+
+
+def test_trends_keep_stored_weeks_touched_by_the_upload():
+    """Ein Upload von einem Tag ersetzt nicht das gespeicherte Mittel seiner Woche."""
+    weeks = pd.date_range('2024-04-01', periods=6, freq='7D')
+    weekly_history = pd.DataFrame({'Nitrat': 10.0 + 0.5 * np.arange(6)}, index=weeks)
+    upload = pd.DataFrame({'Nitrat': 40.0, 'flag_Nitrat': QartodFlags.GOOD},
+                          index=pd.date_range(weeks[-1], periods=24, freq='h'))
+
+    trends = AgriculturalRunoffDetector().analyze_long_term_trends(upload, weekly_history)
+    assert trends['Nitrat']['slope'] == pytest.approx(0.5)
+
+    # Wochen ohne gespeichertes Mittel kommen aus den Stundenwerten
+    later = upload.set_axis(upload.index + pd.Timedelta(weeks=1))
+    trends = AgriculturalRunoffDetector().analyze_long_term_trends(later, weekly_history)
+    assert trends['Nitrat']['slope'] > 0.5
@@ -0,0 +1,66 @@
+# test_basic_validation.py
+"""
+Tests der Basis-Validierung (basic_validation.run_basic_validation): seriell, im
+Thread-Pool und im Prozess-Pool (shared memory) müssen Flags und Gründe identisch sein.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import basic_validation
+from basic_validation import resolve_mode, run_basic_validation
+from flag_matrix import FlagMatrix
+
+VALIDATION_RULES = {'pH': {'min': 6.5, 'max': 9.0}, 'Trübung': {'min': 0.0, 'max': 40},
+                    'Wassertemp. (1m)': {'min': 0.0, 'max': 28.0}}
+SEASONAL_RULES = {'Wassertemp. (1m)': {'winter': {'max': 8.0}, 'summer': {'min': 12.0, 'max': 26.0}}}
+SPIKE_RULES = {'pH': 0.5, 'Trübung': 10.0}
+STUCK_RULES = {'Trübung': {'suspect_threshold': 3, 'fail_threshold': 6, 'epsilon': 0.0}}
+
+
+@pytest.fixture(scope='module')
+def station_data():
+    """Ein halbes Jahr Stundenwerte mit Ausreißern, Sprüngen, Lücken und hängenden Werten."""
+    rng = np.random.default_rng(21)
+    index = pd.date_range('2024-01-15', periods=24 * 180, freq='h')
+    data = pd.DataFrame({'pH': rng.normal(8, 0.5, len(index)), 'Trübung': rng.gamma(3, 4, len(index)),
+                         'Wassertemp. (1m)': rng.normal(12, 7, len(index)),
+                         'Leitfähigkeit': rng.normal(400, 20, len(index))}, index=index)
+    data.loc[rng.random(len(index)) < 0.02, 'pH'] = np.nan
+    data.iloc[100:110, 1] = 5.0
+    data.iloc[500:504, 3] = 401.0
+    return data
+
+
+def run_mode(data, mode):
+    matrix = FlagMatrix(data.index, data.columns)
+    used = run_basic_validation(data, matrix, VALIDATION_RULES, SEASONAL_RULES, STUCK_RULES, SPIKE_RULES,
+                                mode=mode, max_workers=2)
+    return used, matrix
+
+
+@pytest.fixture
+def parallel_for_small_data(monkeypatch):
+    monkeypatch.setitem(basic_validation.BASIC_VALIDATION, 'min_values', 0)
+
+
+def test_threads_and_processes_match_serial(station_data, parallel_for_small_data):
+    _, serial = run_mode(station_data, 'serial')
+    assert (serial.flags > 1).any()
+    for mode in ('threads', 'processes'):
+        used, matrix = run_mode(station_data, mode)
+        assert used == mode
+        np.testing.assert_array_equal(matrix.flags, serial.flags)
+        np.testing.assert_array_equal(matrix.evaluated, serial.evaluated)
+        for param in station_data.columns:
+            assert matrix.reasons[param].bits.tolist() == serial.reasons[param].bits.tolist(), (mode, param)
+            assert matrix.reasons[param].render().tolist() == serial.reasons[param].render().tolist(), (mode, param)
+
+
+def test_small_stations_run_serially(station_data):
+    used, _ = run_mode(station_data, 'processes')
+    assert used == 'serial'  # unter BASIC_VALIDATION['min_values']
+    assert resolve_mode(10_000, 300, 'threads') == 'threads'
+    with pytest.raises(ValueError):
+        resolve_mode(10, 1, 'gpu')
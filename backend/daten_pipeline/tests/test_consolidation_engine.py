@@ -0,0 +1,204 @@
+# test_consolidation_engine.py
+"""
+Regressionstests der Tageskonsolidierung (consolidation_engine.py).
+
+Referenz sind die früheren Tagesfunktionen - aggregate_daily_values (strict_good),
+interpolate_and_aggregate (interpolate_good) und flexible_daily_aggregate (flexible) -
+in kompakter Form, aufgerufen wie früher einmal pro Tag. Einzige gewollte Abweichung:
+'flexible' berechnet den Anteil guter Werte nur noch über vorhandene Werte (früher
+zählten GOOD-Flags auf fehlenden Werten mit, der Anteil konnte über 100 % liegen).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import consolidation_engine as ce
+from config_file import QARTOD_AGGREGATION
+from consolidation_engine import QartodFlags
+from interpolating_consolidator import consolidate_station_frame
+
+RULES = {'pH': ['mean', 'min', 'max'],
+         'Trübung': ['mean', 'median', 'std', 'min', 'max'],
+         'Leitfähigkeit': ['mean', 'std']}
+PRECISION = {'pH': 2, 'Trübung': 1, 'Leitfähigkeit': 0, 'default': 2}
+METHOD_NAMES = {'mean': 'Mittelwert', 'min': 'Min', 'max': 'Max', 'median': 'Median', 'std': 'StdAbw'}
+
+
+def _aggregation_flag(good_ratio):
+    if good_ratio >= QARTOD_AGGREGATION['GOOD_THRESHOLD']:
+        return QartodFlags.GOOD
+    if good_ratio >= QARTOD_AGGREGATION['SUSPECT_THRESHOLD']:
+        return QartodFlags.SUSPECT
+    return QartodFlags.BAD
+
+
+def _rounded(value, precision):
+    return None if pd.isna(value) else round(float(value), precision)
+
+
+def _statistics(series, methods, precision, skip_single_std=False):
+    result = {}
+    for method in methods:
+        if method == 'std' and skip_single_std and len(series) < 2:
+            continue
+        value = getattr(series, method)()
+        if skip_single_std and pd.isna(value):
+            continue
+        result[METHOD_NAMES[method]] = _rounded(value, precision)
+    return result
+
+
+def reference_strict_good(day, rules, precision_rules):
+    """Früher consolidator.aggregate_daily_values."""
+    aggregates = {}
+    for param, methods in rules.items():
+        series, flags, reasons = day[param], day[f'flag_{param}'], day[f'reason_{param}']
+        bad_reasons = set(r for r in reasons if r is not None and r != '')
+        reason_text = '; '.join(sorted(bad_reasons)) if bad_reasons else "Alle Werte plausibel"
+        good_ratio = (flags == QartodFlags.GOOD).sum() / len(flags) * 100 if len(flags) else 0
+        agg_flag = _aggregation_flag(good_ratio)
+        valid = series[flags == QartodFlags.GOOD]
+        values = {}
+        if agg_flag != QartodFlags.BAD and not valid.empty:
+            values = _statistics(valid, methods, precision_rules.get(param, 2))
+        values.update({'Anteil_Guter_Werte_Prozent': _rounded(good_ratio, 1), 'Aggregat_QARTOD_Flag': agg_flag,
+                       'Aggregat_Gruende': reason_text})
+        aggregates[param] = values
+    return aggregates
+
+
+def reference_interpolate_good(day, rules, precision_rules):
+    """Früher interpolating_consolidator.interpolate_and_aggregate."""
+    aggregates = {}
+    for param, methods in rules.items():
+        series, flags, reasons = day[param], day[f'flag_{param}'], day[f'reason_{param}']
+        unique_reasons = []
+        for reason in reasons:
+            if reason and reason not in unique_reasons:
+                unique_reasons.append(reason)
+        reason_text = '; '.join(unique_reasons) if unique_reasons else "Alle Werte plausibel"
+        present = series.notna()
+        good_ratio = (flags[present] == QartodFlags.GOOD).sum() / present.sum() * 100 if present.sum() else 0
+        agg_flag = _aggregation_flag(good_ratio)
+        if agg_flag == QartodFlags.GOOD:
+            calc = series.copy()
+            calc[flags.isin([QartodFlags.BAD, QartodFlags.SUSPECT])] = np.nan
+            calc = calc.interpolate(method='linear', limit_direction='both', limit=3)
+        else:
+            calc = series[flags == QartodFlags.GOOD]
+        calc = calc.dropna()
+        if calc.empty:
+            continue
+        values = _statistics(calc, methods, precision_rules.get(param, 2))
+        values.update({'Anteil_Guter_Werte_Prozent': _rounded(good_ratio, 1), 'Aggregat_QARTOD_Flag': agg_flag,
+                       'Aggregat_Gruende': reason_text})
+        aggregates[param] = values
+    return aggregates
+
+
+def reference_flexible(day, rules, precision_rules):
+    """Früher flexible_consolidator.flexible_daily_aggregate (Anteil nur über vorhandene Werte)."""
+    aggregates = {}
+    for param, methods in rules.items():
+        series, flags, reasons = day[param], day[f'flag_{param}'], day[f'reason_{param}']
+        all_reasons = set(str(r) for r in reasons if pd.notna(r) and r != '')
+        reason_text = '; '.join(sorted(all_reasons)) if all_reasons else "Alle Werte plausibel"
+        present = series.notna()
+        if present.sum() == 0:
+            continue
+        good_ratio = (flags[present] == QartodFlags.GOOD).sum() / present.sum() * 100
+        agg_flag = _aggregation_flag(good_ratio)
+        if agg_flag == QartodFlags.BAD:
+            valid = series[present]
+        else:
+            valid = series[flags.isin([QartodFlags.GOOD, QartodFlags.NOT_EVALUATED]) & present]
+        if valid.empty:
+            continue
+        precision = precision_rules.get(param, precision_rules.get('default', 2))
+        values = _statistics(valid, methods, precision, skip_single_std=True)
+        values.update({'Anzahl_Stunden': len(valid), 'Anteil_Guter_Werte_Prozent': round(good_ratio, 1),
+                       'Aggregat_QARTOD_Flag': int(agg_flag), 'Aggregat_Gruende': reason_text})
+        aggregates[param] = values
+    return aggregates
+
+
+def per_day(reference, data):
+    """Referenz wie früher einmal pro Tag aufrufen und zu einem Frame zusammensetzen."""
+    rows = {}
+    for day, group in data.groupby(data.index.date):
+        aggregates = reference(group, RULES, PRECISION)
+        if aggregates:
+            rows[pd.Timestamp(day)] = {f'{param}_{name}': value
+                                       for param, values in aggregates.items() for name, value in values.items()}
+    return pd.DataFrame(list(rows.values()), index=pd.DatetimeIndex(list(rows), name='Datum'))
+
+
+def assert_same_cells(expected, actual):
+    """Gleiche Spalten und Tage; Zahlen bis 1e-9 gleich, Flags und Gründe exakt (None == NaN)."""
+    assert set(expected.columns) == set(actual.columns)
+    assert list(expected.index) == list(actual.index)
+    actual = actual[expected.columns]
+    for column in expected.columns:
+        a, b = expected[column], actual[column]
+        if column.endswith(('Gruende', 'Flag')):
+            same = (a == b) | (a.isna() & b.isna())
+        else:
+            a, b = pd.to_numeric(a), pd.to_numeric(b)
+            same = (a.isna() == b.isna()) & ~((a - b).abs() > 1e-9)
+        assert same.all(), f"{column}: {a[~same].head(3).tolist()} != {b[~same].head(3).tolist()}"
+
+
+@pytest.fixture(scope='module')
+def station_frame():
+    """Zwei Monate Stundenwerte mit Lücken, SUSPECT/BAD/NOT_EVALUATED-Flags und Fehlertagen."""
+    rng = np.random.default_rng(5)
+    n = 24 * 60
+    data = pd.DataFrame(index=pd.date_range('2023-03-01', periods=n, freq='h'))
+    for param in RULES:
+        values = rng.normal(10, 2, n)
+        values[rng.random(n) < 0.03] = np.nan
+        flags = np.ones(n, dtype=int)
+        r = rng.random(n)
+        flags[r < 0.05] = QartodFlags.SUSPECT
+        flags[r < 0.02] = QartodFlags.BAD
+        flags[r > 0.99] = QartodFlags.NOT_EVALUATED
+        flags[np.repeat(rng.random(n // 24) < 0.15, 24) & (rng.random(n) < 0.4)] = QartodFlags.BAD
+        data[param] = values
+        data[f'flag_{param}'] = flags
+        data[f'reason_{param}'] = np.where(flags > 2, np.where(flags == 4, 'Ausreißer', 'Spike'), '')
+    data.loc['2023-03-05', 'pH'] = np.nan           # Tag ohne Werte
+    data.loc['2023-03-07', 'Trübung'] = np.nan      # Tag mit einem einzigen Wert
+    data.loc['2023-03-07 05:00', 'Trübung'] = 3.0
+    data.loc['2023-03-07', 'flag_Trübung'] = QartodFlags.GOOD
+    return data
+
+
+@pytest.mark.parametrize('strategy, reference', [
+    ('strict_good', reference_strict_good),
+    ('interpolate_good', reference_interpolate_good),
+    ('flexible', reference_flexible),
+])
+def test_strategies_match_per_day_reference(station_frame, strategy, reference):
+    expected = per_day(reference, station_frame)
+    actual = ce.consolidate(station_frame, RULES, strategy, PRECISION)
+    assert_same_cells(expected, actual)
+
+
+def test_station_frame_matches_per_day_interpolation(station_frame):
+    """Pipeline-Weg (ein Durchlauf über alle Tage) gegen die frühere Schleife über Tage."""
+    expected = per_day(reference_interpolate_good, station_frame)
+    assert_same_cells(expected, consolidate_station_frame(station_frame, RULES, PRECISION))
+
+
+def test_per_day_wrappers_match_engine(station_frame):
+    """Die Tagesfunktionen bleiben als dünne Hüllen über der Engine erhalten."""
+    from consolidator import aggregate_daily_values
+    from interpolating_consolidator import interpolate_and_aggregate
+
+    day = station_frame.loc['2023-03-10']
+    for wrapper, reference in [(aggregate_daily_values, reference_strict_good),
+                               (interpolate_and_aggregate, reference_interpolate_good)]:
+        expected = per_day(reference, day)
+        actual = wrapper(day, parameter_rules=RULES, precision_rules=PRECISION)
+        assert_same_cells(expected, actual.to_frame(expected.index[0]).T.rename_axis('Datum'))
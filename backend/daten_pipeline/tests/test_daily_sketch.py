@@ -0,0 +1,104 @@
+# test_daily_sketch.py
+"""
+Tests der zusammenführbaren Tageszustände (daily_sketch.py): Ein Tag aus mehreren
+Teil-Uploads muss dieselbe Tageskonsolidierung liefern wie consolidate() über den
+ganzen Tag, erneut validierte Stunden ersetzen ihren früheren Beitrag, und der Tag der
+Zeitumstellung im Oktober hat 25 Stunden.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config_file import PRECISION_RULES
+from consolidation_engine import QartodFlags, consolidate
+from daily_sketch import DailySketch, build_daily_sketches, finalize_daily_sketches, merge_daily_sketches
+
+RULES = {'Nitrat': ['min', 'max', 'mean', 'median', 'std'], 'pH': ['min', 'max', 'mean']}
+
+
+def validated_day(index, seed=0):
+    """Stundenwerte mit einzelnen SUSPECT/BAD-Werten, Gründen und einer Lücke."""
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({'Nitrat': rng.uniform(1, 3, len(index)), 'pH': rng.normal(8, 0.2, len(index))}, index=index)
+    for param in data.columns:
+        flags = np.full(len(index), QartodFlags.GOOD)
+        flags[rng.random(len(index)) < 0.2] = QartodFlags.SUSPECT
+        flags[3] = QartodFlags.BAD
+        data[f'flag_{param}'] = flags
+        data[f'reason_{param}'] = np.where(flags == QartodFlags.GOOD, '', f'{param} auffällig')
+    data.iloc[7, 0] = np.nan
+    return data
+
+
+def merged_in_parts(data, parts):
+    """Speichert den Tag Teil für Teil wie aufeinanderfolgende Uploads."""
+    stored = {}
+    for part in parts:
+        changed, _, _ = merge_daily_sketches(stored, build_daily_sketches(data.iloc[part], RULES))
+        stored.update(changed)
+    return stored
+
+
+def assert_same_consolidation(sketches, data):
+    expected = consolidate(data, RULES, 'interpolate_good', PRECISION_RULES)
+    actual = finalize_daily_sketches(sketches, RULES, PRECISION_RULES)
+    pd.testing.assert_frame_equal(actual, expected[actual.columns], check_freq=False)
+
+
+def test_partial_day_merged_with_the_rest_matches_consolidate():
+    data = validated_day(pd.date_range('2024-06-10', periods=24, freq='h'))
+    sketches = merged_in_parts(data, [slice(0, 9), slice(9, 24)])
+    assert_same_consolidation(sketches, data)
+
+    sketch = sketches[(pd.Timestamp('2024-06-10'), 'Nitrat')]
+    good = data['Nitrat'][(data['flag_Nitrat'] == QartodFlags.GOOD)].dropna()
+    assert sketch.finalize()['mean'] == pytest.approx(good.mean())
+    assert sketch.hour_mask == (1 << 24) - 1
+
+
+def test_new_hours_are_increments_and_unchanged_hours_change_nothing():
+    data = validated_day(pd.date_range('2024-06-10', periods=24, freq='h'))
+    stored = merged_in_parts(data, [slice(0, 12)])
+    changed, increments, replaced = merge_daily_sketches(stored, build_daily_sketches(data.iloc[6:18], RULES))
+
+    key = (pd.Timestamp('2024-06-10'), 'pH')
+    assert not replaced
+    assert increments[key].count == 6 and increments[key].hour_mask == sum(1 << h for h in range(12, 18))
+    assert len(changed[key].slots) == 18
+    # Derselbe Ausschnitt noch einmal: nichts zu speichern
+    stored.update(changed)
+    assert merge_daily_sketches(stored, build_daily_sketches(data.iloc[6:18], RULES)) == ({}, {}, set())
+
+
+def test_revalidated_hour_lands_in_replaced():
+    data = validated_day(pd.date_range('2024-06-10', periods=24, freq='h'))
+    stored = merged_in_parts(data, [slice(0, 24)])
+    revalidated = data.iloc[[5]].copy()
+    revalidated['flag_pH'] = QartodFlags.BAD
+    revalidated['reason_pH'] = 'pH nachträglich verworfen'
+
+    changed, increments, replaced = merge_daily_sketches(stored, build_daily_sketches(revalidated, RULES))
+    key = (pd.Timestamp('2024-06-10'), 'pH')
+    assert replaced == {key} and key not in increments
+    assert changed[key].slots == DailySketch.from_slots({**stored[key].slots, **build_daily_sketches(
+        revalidated, RULES)[key].slots}).slots
+    assert len(changed[key].slots) == 24
+
+    stored.update(changed)
+    data.loc[revalidated.index, ['flag_pH', 'reason_pH']] = revalidated[['flag_pH', 'reason_pH']].to_numpy()
+    assert_same_consolidation(stored, data)
+
+
+def test_october_day_has_25_slots():
+    """26.10.2025 in Ortszeit: 02:00 kommt zweimal vor (Sommer- und Winterzeit)."""
+    index = pd.date_range('2025-10-26', periods=25, freq='h', tz='Europe/Berlin').tz_localize(None)
+    assert (index == pd.Timestamp('2025-10-26 02:00')).sum() == 2
+    data = validated_day(index, seed=1)
+
+    # Beide 02:00 im selben Upload: ohne UTC-Versatz ist die zweite allein nicht zu unterscheiden
+    sketches = merged_in_parts(data, [slice(0, 6), slice(6, 25)])
+    key = (pd.Timestamp('2025-10-26'), 'Nitrat')
+    assert len(sketches[key].slots) == 25
+    assert sketches[key].count == 24  # eine Lücke
+    assert_same_consolidation(sketches, data)
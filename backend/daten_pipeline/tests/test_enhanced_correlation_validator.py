@@ -0,0 +1,66 @@
+# test_enhanced_correlation_validator.py
+"""
+Regressionstests für EnhancedCorrelationValidator.validate_frame.
+
+Referenz ist der frühere Pipeline-Weg: validate_all_correlations für jede Stunde
+einzeln, mit einem einzeiligen DataFrame und deren Zeitstempel. validate_frame muss
+pro Zeile dieselben Flags (Maximum über die Parameter) und dieselben Gründe liefern.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from enhanced_correlation_validator import EnhancedCorrelationValidator
+from reason_codes import combine_reason_masks
+
+PARAMETER_RANGES = {
+    'pH': (6, 10), 'Gelöster Sauerstoff': (0, 16),
+    'Wassertemp. (0.5m)': (0, 28), 'Wassertemp. (1m)': (0, 28), 'Wassertemp. (2m)': (0, 28),
+    'Chl-a': (0, 150), 'Trübung': (0, 40), 'Leitfähigkeit': (20, 1500),
+    'Redoxpotential': (-200, 500), 'Nitrat': (0, 3), 'Phycocyanin Abs.': (0, 80),
+}
+
+
+@pytest.fixture(scope='module')
+def sensor_frame():
+    """Zufällige Werte über alle Tageszeiten und zwei Jahreszeiten, mit Lücken und Schichtung."""
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2024-05-28', periods=24 * 8, freq='h')
+    data = pd.DataFrame({param: rng.uniform(low, high, len(index))
+                         for param, (low, high) in PARAMETER_RANGES.items()}, index=index)
+    for param in data.columns:
+        data.loc[rng.random(len(index)) < 0.05, param] = np.nan
+    # Nahezu gleiche Temperaturen in allen Tiefen (Schichtungsprüfung)
+    data.iloc[:40, 3] = data.iloc[:40, 2] + 0.1
+    data.iloc[:40, 4] = data.iloc[:40, 3] + 0.1
+    return data
+
+
+def test_frame_matches_per_row_validation(sensor_frame):
+    validator = EnhancedCorrelationValidator()
+    frame_flags, frame_masks = validator.validate_frame(sensor_frame, as_codes=True)
+    combined = combine_reason_masks(frame_masks.values(), sensor_frame.index)
+    combined_texts = combined.render()
+
+    for position, timestamp in enumerate(sensor_frame.index):
+        row_flags, row_reasons = validator.validate_all_correlations(sensor_frame.iloc[[position]], timestamp,
+                                                                     as_codes=True)
+        assert frame_flags.iloc[position].max() == row_flags.iloc[0], timestamp
+        assert combined.bits[position] == row_reasons.bits[0], timestamp
+        assert combined_texts.iloc[position] == row_reasons.render().iloc[0], timestamp
+
+
+def test_frame_flags_something(sensor_frame):
+    """Die Zufallsdaten lösen Prüfungen aus - sonst wäre der Vergleich oben wertlos."""
+    flags, reasons = EnhancedCorrelationValidator().validate_frame(sensor_frame)
+    assert (flags > 1).any().any()
+    assert (reasons != '').any().any()
+
+
+def test_flags_only_on_parameters_read_by_a_check(sensor_frame):
+    """Ohne Redoxpotential und Nährstoffe entfallen deren Prüfungen und Spalten."""
+    subset = sensor_frame.drop(columns=['Redoxpotential', 'Nitrat', 'Phycocyanin Abs.'])
+    flags, _ = EnhancedCorrelationValidator().validate_frame(subset)
+    assert 'Redoxpotential' not in flags.columns
+    assert set(flags.columns) <= set(subset.columns)
@@ -0,0 +1,75 @@
+# test_flag_matrix.py
+"""
+Tests der Flag-Matrix (flag_matrix.py). Referenz für die Flags ist das frühere
+Kombinieren über einen DataFrame mit einer Spalte pro Test: Maximum pro Zeile ohne
+nicht gesetzte Zellen (NaN), GOOD, wenn kein Test einen Wert gesetzt hat.
+"""
+
+import numpy as np
+import pandas as pd
+
+from consolidation_engine import QartodFlags
+from flag_matrix import NOT_SET, FlagMatrix, with_reason_texts
+from reason_codes import ReasonCodes, ReasonMask
+
+PARAMETERS = ['pH', 'Wassertemp. (1m)', 'Nitrat']
+FLAG_VALUES = [QartodFlags.GOOD, QartodFlags.SUSPECT, QartodFlags.BAD, QartodFlags.MISSING]
+
+
+def reference_combine(flags_per_test):
+    """Früher combine_flags_and_reasons (nur Flags)."""
+    if flags_per_test.empty:
+        return pd.Series(QartodFlags.GOOD, index=flags_per_test.index)
+    return flags_per_test.max(axis=1, skipna=True).fillna(QartodFlags.GOOD).astype(int)
+
+
+def test_combine_matches_per_test_columns():
+    rng = np.random.default_rng(5)
+    index = pd.date_range('2024-06-01', periods=50, freq='h')
+    matrix = FlagMatrix(index, PARAMETERS)
+    columns = {param: {} for param in PARAMETERS}
+    for test in matrix.tests:
+        for param in PARAMETERS:
+            if rng.random() < 0.4:
+                continue  # Test hat den Parameter nicht bewertet
+            flags = rng.choice(FLAG_VALUES, len(index)).astype(float)
+            # Nur einzelne Zeitpunkte bewertet (z.B. Korrelation): übrige Zellen nicht gesetzt
+            flags[rng.random(len(index)) < 0.3] = np.nan
+            matrix.set(test, param, np.nan_to_num(flags, nan=NOT_SET))
+            columns[param][test] = flags
+
+    combined = matrix.combine()
+    for param in PARAMETERS:
+        expected = reference_combine(pd.DataFrame(columns[param], index=index))
+        assert combined[param].tolist() == expected.tolist(), param
+    assert matrix.evaluated_parameters() == [param for param in PARAMETERS if columns[param]]
+
+
+def test_row_flags_apply_to_all_parameters():
+    index = pd.date_range('2024-06-01', periods=3, freq='h')
+    matrix = FlagMatrix(index, PARAMETERS)
+    matrix.set('range', 'pH', [QartodFlags.GOOD, QartodFlags.BAD, QartodFlags.GOOD])
+    agri_reasons = ReasonMask(index).add(np.array([False, False, True]), ReasonCodes.AGRI_EROSION, indicators=0)
+    matrix.set_all_parameters('agricultural', [QartodFlags.GOOD, QartodFlags.GOOD, QartodFlags.SUSPECT], agri_reasons)
+
+    combined = matrix.combine()
+    assert combined['pH'].tolist() == [QartodFlags.GOOD, QartodFlags.BAD, QartodFlags.SUSPECT]
+    assert combined['Nitrat'].tolist() == [QartodFlags.GOOD, QartodFlags.GOOD, QartodFlags.SUSPECT]
+    assert matrix.test_flags('agricultural', 'Nitrat').tolist() == [1, 1, 3]
+    assert all(matrix.reasons[param].render().iloc[2] == "Verdacht auf Erosionseintrag" for param in PARAMETERS)
+
+
+def test_reason_texts_are_added_behind_their_flags():
+    index = pd.date_range('2024-06-01', periods=3, freq='h')
+    matrix = FlagMatrix(index, PARAMETERS)
+    matrix.set('spike', 'pH', [1, 3, 1], ReasonMask(index).add(np.array([False, True, False]), ReasonCodes.SPIKE))
+    matrix.set('stuck', 'Nitrat', [1, 1, 1])
+    evaluated = matrix.evaluated_parameters()
+    combined = matrix.combine()
+    data = pd.DataFrame({param: [7.0, 9.5, 7.1] for param in PARAMETERS}, index=index)
+    validated = pd.concat([data, pd.DataFrame({f'flag_{p}': combined[p] for p in evaluated}, index=index)], axis=1)
+
+    with_texts = with_reason_texts(validated, {p: matrix.reasons[p] for p in evaluated})
+    assert list(with_texts.columns) == PARAMETERS + ['flag_pH', 'reason_pH', 'flag_Nitrat', 'reason_Nitrat']
+    assert with_texts['reason_pH'].tolist() == ["", "Unrealistischer Sprung zum Vorwert", ""]
+    assert list(validated.columns) == PARAMETERS + ['flag_pH', 'flag_Nitrat']  # Eingabe unverändert
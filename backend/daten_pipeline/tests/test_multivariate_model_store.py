@@ -0,0 +1,118 @@
+# test_multivariate_model_store.py
+"""
+Tests des Modellspeichers der multivariaten Anomalieerkennung
+(multivariate_model_store.py): Kaltstart, Historie pro Jahreszeit, Neuladen geänderter
+Modelldateien und Drift-Cooldown.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from multivariate_model_store import MultivariateModelStore
+
+FEATURES = ['pH', 'Leitfähigkeit', 'Trübung']
+
+
+def hourly_frame(start, hours, seed=0, shift=0.0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'pH': rng.normal(8, 0.2, hours) + shift,
+                         'Leitfähigkeit': rng.normal(400, 20, hours) + 100 * shift,
+                         'Trübung': rng.gamma(4, 1, hours) + 10 * shift},
+                        index=pd.date_range(start, periods=hours, freq='h'))
+
+
+class RecordingLoader:
+    """history_loader, der die angefragten Monate mitschreibt."""
+
+    def __init__(self, history):
+        self.history = history
+        self.calls = []
+
+    def __call__(self, station_id, features, months=None):
+        self.calls.append(months)
+        rows = self.history.index.month.isin(months) if months else slice(None)
+        return self.history[rows].reindex(columns=features)
+
+
+def test_cold_start_uses_a_daily_upload_without_saving(tmp_path):
+    store = MultivariateModelStore(model_dir=str(tmp_path), history_loader=RecordingLoader(hourly_frame('2024-01-01', 0)))
+    upload = hourly_frame('2024-07-01', 24)
+    predictions, filled, _, _ = store.predict('st', upload[FEATURES])
+
+    assert len(predictions) == 24 and not filled.isna().any().any()
+    assert os.listdir(tmp_path) == []  # vorläufig, nicht gespeichert
+
+
+def test_history_is_loaded_per_season_months(tmp_path):
+    loader = RecordingLoader(hourly_frame('2024-01-01', 24 * 366))
+    store = MultivariateModelStore(model_dir=str(tmp_path), history_loader=loader)
+    store.predict('st', hourly_frame('2025-07-01', 48)[FEATURES])
+
+    assert loader.calls == [[6, 7, 8]]
+    payload = store.load('st', 'summer', FEATURES)
+    assert not payload['provisional'] and payload['n_training_samples'] >= store.min_training_samples
+    assert set(pd.DatetimeIndex(payload['training_period']).month) <= {6, 7, 8}
+
+
+def test_too_little_history_is_not_persisted(tmp_path):
+    loader = RecordingLoader(hourly_frame('2024-07-01', 100))
+    store = MultivariateModelStore(model_dir=str(tmp_path), history_loader=loader)
+    assert store.retrain_from_history('st', FEATURES, ['summer'])['summer'] is None
+    assert store.load('st', 'summer', FEATURES) is None
+
+
+def test_load_picks_up_a_model_rewritten_by_another_process(tmp_path):
+    loader = RecordingLoader(hourly_frame('2024-06-01', 24 * 60))
+    worker = MultivariateModelStore(model_dir=str(tmp_path), history_loader=loader)
+    cli = MultivariateModelStore(model_dir=str(tmp_path), history_loader=loader)
+
+    first = cli.retrain_from_history('st', FEATURES, ['summer'])['summer']
+    assert worker.load('st', 'summer', FEATURES)['trained_at'] == first['trained_at']
+
+    path = cli.model_path('st', 'summer', FEATURES)
+    second = cli.retrain_from_history('st', FEATURES, ['summer'])['summer']
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))  # grobe Zeitauflösung des Dateisystems
+    assert worker.load('st', 'summer', FEATURES)['trained_at'] == second['trained_at']
+
+
+def test_drift_retrains_at_most_once_per_cooldown(tmp_path):
+    loader = RecordingLoader(hourly_frame('2024-06-01', 24 * 60))
+    store = MultivariateModelStore(model_dir=str(tmp_path), history_loader=loader)
+    payload = store.retrain_from_history('st', FEATURES, ['summer'])['summer']
+    payload['trained_at'] = (pd.Timestamp.now() - pd.Timedelta(days=2)).isoformat()
+    store.save('st', 'summer', payload)
+    loader.calls.clear()
+
+    drifted = hourly_frame('2025-07-01', 48, seed=1, shift=3.0)[FEATURES]
+    store.predict('st', drifted)
+    assert len(loader.calls) == 1          # Drift -> Neutraining aus der Historie
+    store.predict('st', drifted)
+    assert len(loader.calls) == 1          # innerhalb des Cooldowns kein weiteres Neutraining
+
+
+def test_drift_without_retrain_is_recorded(tmp_path):
+    loader = RecordingLoader(hourly_frame('2024-06-01', 24 * 60))
+    store = MultivariateModelStore(model_dir=str(tmp_path), history_loader=loader)
+    payload = store.retrain_from_history('st', FEATURES, ['summer'])['summer']
+    payload['trained_at'] = (pd.Timestamp.now() - pd.Timedelta(days=2)).isoformat()
+    store.save('st', 'summer', payload)
+    loader.history = loader.history.iloc[:0]  # Historie nicht mehr verfügbar
+
+    drifted = hourly_frame('2025-07-01', 48, seed=1, shift=3.0)[FEATURES]
+    store.predict('st', drifted)
+    marked = store.load('st', 'summer', FEATURES)
+    assert marked['drift_detected'] and marked['drift_detected_at']
+    calls = len(loader.calls)
+    store.predict('st', drifted)
+    assert len(loader.calls) == calls      # Cooldown ab dem fehlgeschlagenen Versuch
+
+
+@pytest.mark.parametrize('hours', [1, 5])
+def test_cold_start_with_very_few_rows(tmp_path, hours):
+    store = MultivariateModelStore(model_dir=str(tmp_path), history_loader=None)
+    predictions, _, _, _ = store.predict('st', hourly_frame('2024-07-01', hours)[FEATURES])
+    assert len(predictions) == hours
@@ -0,0 +1,121 @@
+# test_pipeline_graph.py
+"""
+Tests des Ablaufgraphen (pipeline_graph.py): Datenfluss, übersprungene Plugins,
+exklusive Ressourcen, Fehlerweitergabe und kritischer Pfad.
+"""
+
+import sys
+import threading
+import time
+
+import pytest
+
+from pipeline_graph import GraphRun, PipelineGraph, Stage
+
+
+class FakeRegistry:
+    """Registry mit fest vorgegebenen verfügbaren Plugins."""
+
+    def __init__(self, available=()):
+        self.available = set(available)
+
+    def is_available(self, name):
+        return name in self.available
+
+
+def test_stages_run_in_dependency_order_serial_and_parallel():
+    graph = PipelineGraph([
+        Stage('total', lambda doubled, squared: {'total': doubled + squared},
+              inputs=['doubled', 'squared'], outputs=['total']),
+        Stage('double', lambda x: {'doubled': 2 * x}, inputs=['x'], outputs=['doubled']),
+        Stage('square', lambda x: {'squared': x * x}, inputs=['x'], outputs=['squared']),
+    ])
+    assert graph.order == ['double', 'square', 'total']
+    assert graph.external_inputs() == ['x']
+    for workers in (1, 3):
+        assert graph.run({'x': 3}, max_workers=workers, registry=FakeRegistry())['total'] == 15
+
+
+def test_unavailable_plugin_is_skipped_with_none_outputs():
+    called = []
+    graph = PipelineGraph([
+        Stage('agri', lambda x: called.append('agri') or {'flags': x}, inputs=['x'], outputs=['flags'],
+              plugin='agricultural'),
+        Stage('combine', lambda flags: {'result': 'ohne' if flags is None else flags},
+              inputs=['flags'], outputs=['result']),
+    ])
+    run = graph.run({'x': 'mit'}, max_workers=2, registry=FakeRegistry())
+    assert run['result'] == 'ohne' and called == []
+    assert run.timings['agri']['skipped'] and 'übersprungen' in run.report()
+
+    assert graph.run({'x': 'mit'}, registry=FakeRegistry(['agricultural']))['result'] == 'mit'
+
+
+def concurrency_probe():
+    """Stufenfunktion, die die höchste Zahl gleichzeitig laufender Aufrufe mitschreibt."""
+    state = {'running': 0, 'peak': 0}
+    lock = threading.Lock()
+
+    def stage(**_):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.05)
+        with lock:
+            state['running'] -= 1
+        return {}
+    return stage, state
+
+
+@pytest.mark.parametrize('resources, expected_peak', [(['db'], 1), ([], 3)])
+def test_stages_sharing_a_resource_never_overlap(resources, expected_peak):
+    stage, state = concurrency_probe()
+    graph = PipelineGraph([Stage(f'write_{i}', stage, inputs=['x'], resources=resources) for i in range(3)])
+    graph.run({'x': None}, max_workers=3, registry=FakeRegistry())
+    assert state['peak'] == expected_peak
+
+
+def test_stage_exception_propagates_and_restores_stdout():
+    def failing(x):
+        print("Stufe schlägt fehl")
+        raise RuntimeError("kaputt")
+
+    stdout = sys.stdout
+    graph = PipelineGraph([Stage('fail', failing, inputs=['x'], outputs=['y']),
+                           Stage('after', lambda y: {'z': y}, inputs=['y'], outputs=['z'])])
+    for workers in (1, 2):
+        with pytest.raises(RuntimeError, match='kaputt'):
+            graph.run({'x': 1}, max_workers=workers, registry=FakeRegistry())
+        assert sys.stdout is stdout
+
+
+def test_missing_outputs_inputs_and_cycles_are_errors():
+    graph = PipelineGraph([Stage('lazy', lambda: {}, outputs=['y'])])
+    with pytest.raises(ValueError, match="nicht geliefert"):
+        graph.run({}, registry=FakeRegistry())
+    with pytest.raises(ValueError, match="Fehlende Eingaben"):
+        PipelineGraph([Stage('needs', lambda x: {}, inputs=['x'])]).run({}, registry=FakeRegistry())
+    with pytest.raises(ValueError, match="Zyklische"):
+        PipelineGraph([Stage('a', dict, inputs=['b_out'], outputs=['a_out']),
+                       Stage('b', dict, inputs=['a_out'], outputs=['b_out'])])
+
+
+def test_critical_path_follows_the_latest_finished_dependency():
+    graph = PipelineGraph([
+        Stage('read', dict, outputs=['data']),
+        Stage('fast', dict, inputs=['data'], outputs=['fast_out']),
+        Stage('slow', dict, inputs=['data'], outputs=['slow_out']),
+        Stage('combine', dict, inputs=['fast_out', 'slow_out'], outputs=['result']),
+        Stage('side', dict, inputs=['data']),
+    ])
+    timings = {
+        'read': {'start': 0.0, 'end': 1.0, 'skipped': False},
+        'fast': {'start': 1.0, 'end': 1.5, 'skipped': False},
+        'slow': {'start': 1.0, 'end': 4.0, 'skipped': False},
+        'side': {'start': 1.0, 'end': 3.0, 'skipped': False},
+        'combine': {'start': 4.0, 'end': 5.0, 'skipped': False},
+    }
+    run = GraphRun(graph, {}, timings)
+    assert run.critical_path() == ['read', 'slow', 'combine']
+    assert run.wall_time == 5.0
+    assert "Kritischer Pfad (*): read → slow → combine (5.00 s)" in run.report()
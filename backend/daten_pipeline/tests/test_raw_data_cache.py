@@ -0,0 +1,104 @@
+# test_raw_data_cache.py
+"""
+Tests des CSV-Zwischenspeichers (raw_data_cache.py): Hin- und Rückweg in beiden
+Formaten, inhaltsbasierte Schlüssel und Entfernen nach Alter und Größe.
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import raw_data_cache
+from raw_data_cache import cache_path, cache_summary, evict, load, store
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setitem(raw_data_cache.CSV_CACHE, 'cache_dir', str(tmp_path / 'csv'))
+    monkeypatch.setitem(raw_data_cache.CSV_CACHE, 'format', 'arrow')
+    return tmp_path / 'csv'
+
+
+def sample_frame(tz=None):
+    index = pd.date_range('2025-06-10', periods=48, freq='h', tz=tz, name='Zeitstempel')
+    values = np.random.default_rng(0).uniform(0, 500, (48, 3))
+    values[5, 1] = np.nan
+    # Doppelter Parametername aus den Metadaten bleibt erhalten
+    return pd.DataFrame(values, index=index, columns=pd.Index(['pH', 'Trübung', 'pH'], dtype=object))
+
+
+@pytest.mark.parametrize('cache_format', ['arrow', 'pickle'])
+@pytest.mark.parametrize('tz', [None, 'Europe/Berlin'])
+def test_round_trip(monkeypatch, cache_dir, cache_format, tz):
+    monkeypatch.setitem(raw_data_cache.CSV_CACHE, 'format', cache_format)
+    frame = sample_frame(tz)
+    path = os.path.join(cache_dir, f'eintrag{raw_data_cache.EXTENSIONS[cache_format]}')
+    store(frame, path)
+
+    loaded = load(path)
+    pd.testing.assert_frame_equal(loaded, frame, check_freq=False)
+    assert [name for name in os.listdir(cache_dir)] == [os.path.basename(path)]  # keine .tmp-Reste
+
+
+def test_key_depends_on_content_and_mapping(tmp_path):
+    first, second, copy = (tmp_path / name for name in ('a.csv', 'b.csv', 'c.csv'))
+    first.write_text('2025-06-10T00:00:00+0200,1.0\n')
+    copy.write_text('2025-06-10T00:00:00+0200,1.0\n')
+    second.write_text('2025-06-10T00:00:00+0200,2.0\n')
+    mapping = {2: 'pH'}
+
+    assert cache_path(str(first), mapping) == cache_path(str(copy), mapping)
+    assert cache_path(str(first), mapping) != cache_path(str(second), mapping)
+    assert cache_path(str(first), mapping) != cache_path(str(first), {2: 'Trübung'})
+    assert cache_path(str(first), mapping).endswith('.arrow')
+
+
+def test_unreadable_entry_is_a_miss(cache_dir):
+    os.makedirs(cache_dir)
+    path = os.path.join(cache_dir, 'kaputt.arrow')
+    with open(path, 'wb') as f:
+        f.write(b'kein arrow')
+    assert load(path) is None
+    assert load(os.path.join(cache_dir, 'fehlt.arrow')) is None
+
+
+def write_entries(cache_dir, ages_days):
+    """Einträge mit gleicher Größe, zuletzt genutzt vor `ages_days` Tagen."""
+    paths = []
+    for i, age in enumerate(ages_days):
+        path = os.path.join(cache_dir, f'eintrag{i}.pkl')
+        store(sample_frame(), path)
+        used_at = time.time() - age * 86400
+        os.utime(path, (used_at, used_at))
+        paths.append(path)
+    return paths
+
+
+def test_evict_removes_entries_not_used_within_max_age(monkeypatch, cache_dir):
+    monkeypatch.setitem(raw_data_cache.CSV_CACHE, 'max_age_days', 90)
+    old, recent = write_entries(cache_dir, [120, 10])
+    assert evict() == 1
+    assert not os.path.exists(old) and os.path.exists(recent)
+
+
+def test_evict_removes_least_recently_used_until_size_fits(monkeypatch, cache_dir):
+    paths = write_entries(cache_dir, [5, 1, 3, 2])
+    entry_mb = os.path.getsize(paths[0]) / 1e6
+    monkeypatch.setitem(raw_data_cache.CSV_CACHE, 'max_size_mb', 2.5 * entry_mb)
+
+    assert evict() == 2
+    assert [os.path.exists(path) for path in paths] == [False, True, False, True]
+    assert cache_summary()['entries'] == 2
+
+
+def test_load_marks_entry_as_used(monkeypatch, cache_dir):
+    paths = write_entries(cache_dir, [5, 1])
+    entry_mb = os.path.getsize(paths[0]) / 1e6
+    monkeypatch.setitem(raw_data_cache.CSV_CACHE, 'max_size_mb', 1.5 * entry_mb)
+    load(paths[0])  # älterer Eintrag wird gelesen und ist damit der zuletzt genutzte
+
+    assert evict() == 1
+    assert os.path.exists(paths[0]) and not os.path.exists(paths[1])
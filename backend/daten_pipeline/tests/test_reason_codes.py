@@ -0,0 +1,58 @@
+# test_reason_codes.py
+"""
+Tests der Gründe als Bitmasken (reason_codes.ReasonMask): Reihenfolge beim Rendern,
+Argumente pro Zeile beim Kombinieren und gespeicherte Texte.
+"""
+
+import numpy as np
+import pandas as pd
+
+from reason_codes import ReasonCodes, ReasonMask, combine_reason_masks
+
+INDEX = pd.date_range('2024-06-01', periods=4, freq='h')
+
+
+def test_render_follows_code_order_not_insertion_order():
+    mask = ReasonMask(INDEX)
+    mask.add([True, True, False, False], ReasonCodes.MULTIVARIATE_HIGH, param='pH')
+    mask.add([True, False, True, False], ReasonCodes.SPIKE)
+    mask.add([True, False, False, False], ReasonCodes.RANGE_HIGH, threshold='9.0', season=3)
+
+    assert mask.render().tolist() == [
+        "Wert > Max (9.0) (Sommer); Unrealistischer Sprung zum Vorwert; Multivariate Anomalie: pH ungewöhnlich hoch",
+        "Multivariate Anomalie: pH ungewöhnlich hoch",
+        "Unrealistischer Sprung zum Vorwert",
+        "",
+    ]
+    assert mask.render(rows=np.array([False, True, True, True])).tolist()[0] == ""
+    assert mask.render(separator=" | ").iloc[0].count(" | ") == 2
+
+
+def test_combined_masks_keep_row_arguments():
+    stuck_early = ReasonMask(INDEX).add(np.array([True, True, False, False]), ReasonCodes.STUCK,
+                                        run_length=np.array([2, 2, 0, 0]))
+    stuck_late = ReasonMask(INDEX).add(np.array([False, False, True, True]), ReasonCodes.STUCK,
+                                       run_length=np.array([0, 0, 5, 5]))
+    missing = ReasonMask(INDEX).add(np.array([False, True, False, False]), ReasonCodes.MISSING)
+
+    combined = combine_reason_masks([stuck_late, missing, stuck_early], INDEX)
+    assert combined.render().tolist() == [
+        "Wert seit 2 Stunden unverändert",
+        "Fehlender Wert; Wert seit 2 Stunden unverändert",
+        "Wert seit 5 Stunden unverändert",
+        "Wert seit 5 Stunden unverändert",
+    ]
+    # Die Eingaben bleiben unverändert
+    assert stuck_early.render().tolist()[2:] == ["", ""]
+
+
+def test_rendered_texts_are_kept_until_the_mask_changes():
+    mask = ReasonMask(INDEX).add(np.array([True, False, False, False]), ReasonCodes.SPIKE)
+    first = mask.render()
+    first.iloc[0] = "verändert"               # Kopie, nicht der gespeicherte Stand
+    assert mask.render().iloc[0] == "Unrealistischer Sprung zum Vorwert"
+
+    mask.add(np.array([False, True, False, False]), ReasonCodes.MISSING)
+    assert mask.render().iloc[1] == "Fehlender Wert"
+    mask |= ReasonMask(INDEX).add(np.array([False, False, True, False]), ReasonCodes.MULTIVARIATE_COMBINATION)
+    assert mask.render().iloc[2] == "Unplausible Parameterkombination"
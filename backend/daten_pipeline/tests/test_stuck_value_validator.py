@@ -0,0 +1,76 @@
+# test_stuck_value_validator.py
+"""
+Regressionstests des Flat-Line-Tests (stuck_value_validator.check_stuck_values).
+
+Referenz ist die frühere Umsetzung: Gruppen gleicher Werte über diff() != 0 und eine
+Schleife über groupby. Mit epsilon = 0 muss die NumPy-Fassung dieselben Flags und
+dieselben Gründe (Lauflänge und Zeitspanne) liefern.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stuck_value_validator import QartodFlags, check_stuck_values
+
+
+def reference_stuck_values(series, tolerance=3):
+    """Früher check_stuck_values (exakte Gleichheit, Schleife über Gruppen)."""
+    flags = pd.Series(QartodFlags.GOOD, index=series.index)
+    reasons = pd.Series("", index=series.index)
+    value_changed = series.diff() != 0
+    value_changed.iloc[0] = True
+    for _, group in series.groupby(value_changed.cumsum()):
+        if len(group) >= tolerance:
+            start = (group.index[0] + pd.Timedelta(hours=2)).strftime('%H:%M')
+            end = (group.index[-1] + pd.Timedelta(hours=2)).strftime('%H:%M')
+            flags[group.index] = QartodFlags.SUSPECT
+            reasons[group.index] = f"Wert seit {len(group)} Stunden unverändert ({start}-{end})"
+    return flags, reasons
+
+
+def hourly(values):
+    return pd.Series(values, index=pd.date_range('2024-01-01', periods=len(values), freq='h'), dtype=float)
+
+
+@pytest.mark.parametrize('tolerance', [2, 3, 4, 5])
+def test_matches_reference_on_random_series(tolerance):
+    """Wenige verschiedene Werte und Lücken erzeugen Läufe aller Längen."""
+    rng = np.random.default_rng(tolerance)
+    for _ in range(100):
+        n = int(rng.integers(1, 60))
+        values = rng.integers(0, 3, n).astype(float)
+        values[rng.random(n) < 0.1] = np.nan
+        series = hourly(values)
+        expected_flags, expected_reasons = reference_stuck_values(series, tolerance)
+        flags, reasons = check_stuck_values(series, tolerance=tolerance)
+        assert flags.tolist() == expected_flags.tolist(), values
+        assert reasons.tolist() == expected_reasons.tolist(), values
+
+
+def test_noise_within_epsilon_counts_as_flat():
+    series = hourly([5.0, 5.01, 4.99, 5.0, 5.02, 7.0, 7.5])
+    flags, reasons = check_stuck_values(series, tolerance=3, epsilon=0.05)
+    assert flags.tolist() == [QartodFlags.SUSPECT] * 5 + [QartodFlags.GOOD] * 2
+    assert reasons.iloc[0] == "Wert seit 5 Stunden unverändert (02:00-06:00)"
+    # Ohne epsilon ist kein Fenster flach
+    flags, _ = check_stuck_values(series, tolerance=3)
+    assert (flags == QartodFlags.GOOD).all()
+
+
+def test_fail_threshold_marks_long_runs_bad():
+    series = hourly([1.0] * 4 + [2.0] + [3.0] * 8)
+    flags, _ = check_stuck_values(series, tolerance=3, fail_threshold=6)
+    assert flags.tolist() == [QartodFlags.SUSPECT] * 4 + [QartodFlags.GOOD] + [QartodFlags.BAD] * 8
+
+
+def test_slow_drift_is_not_a_flat_line():
+    """pH steigt 48 h lang um 0.004/h: Nachbarschritte <= epsilon, die Spannweite aber nicht."""
+    series = hourly(7.0 + 0.004 * np.arange(48))
+    flags, _ = check_stuck_values(series, tolerance=4, epsilon=0.01, fail_threshold=12)
+    assert (flags == QartodFlags.GOOD).all()
+
+    # Drei Werte liegen innerhalb von epsilon: kurze Läufe, aber nie über 48 Stunden und nie BAD
+    flags, reasons = check_stuck_values(series, tolerance=3, epsilon=0.01, fail_threshold=12)
+    assert not (flags == QartodFlags.BAD).any()
+    assert reasons[flags == QartodFlags.SUSPECT].str.startswith("Wert seit 3 Stunden").all()
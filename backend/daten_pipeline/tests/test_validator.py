@@ -0,0 +1,94 @@
+# test_validator.py
+"""
+Regressionstests der saisonalen Bereichsprüfung (WaterQualityValidator.validate_range).
+
+Referenz ist die frühere Umsetzung: Schleife über alle Zeitpunkte, Saison über
+_get_season und Grenzwerte pro Wert nachgeschlagen, Gründe mit dem deutschen
+Saisonnamen. Die Monatstabellen müssen dieselben Flags und Texte liefern.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from validator import QartodFlags, WaterQualityValidator
+
+SEASON_NAMES = {'winter': 'Winter', 'spring': 'Frühling', 'summer': 'Sommer', 'autumn': 'Herbst'}
+
+
+def reference_validate_range(series, plausible_min=None, plausible_max=None, param_name=None, seasonal_rules=None):
+    """Früher validate_range (Schleife, _get_season_name)."""
+    validator = WaterQualityValidator()
+    flags = pd.Series(QartodFlags.GOOD, index=series.index, dtype=int)
+    reasons = pd.Series("", index=series.index, dtype=object)
+    if seasonal_rules and param_name and param_name in seasonal_rules:
+        for pos, (idx, value) in enumerate(series.items()):
+            if pd.isna(value):
+                flags.iloc[pos], reasons.iloc[pos] = QartodFlags.MISSING, "Fehlender Wert"
+                continue
+            season = validator._get_season(idx.month)
+            season_data = seasonal_rules[param_name].get(season, {})
+            min_val = season_data.get('min', plausible_min)
+            max_val = season_data.get('max', plausible_max)
+            season_info = f" ({SEASON_NAMES[season]})"
+            if max_val is not None and value > max_val:
+                flags.iloc[pos], reasons.iloc[pos] = QartodFlags.BAD, f"Wert > Max ({max_val}){season_info}"
+            elif min_val is not None and value < min_val:
+                flags.iloc[pos], reasons.iloc[pos] = QartodFlags.BAD, f"Wert < Min ({min_val}){season_info}"
+    else:
+        if plausible_max is not None:
+            flags[series > plausible_max] = QartodFlags.BAD
+            reasons[series > plausible_max] = f"Wert > Max ({plausible_max})"
+        if plausible_min is not None:
+            flags[series < plausible_min] = QartodFlags.BAD
+            reasons[series < plausible_min] = f"Wert < Min ({plausible_min})"
+        flags[series.isna()] = QartodFlags.MISSING
+        reasons[series.isna()] = "Fehlender Wert"
+    return flags, reasons
+
+
+@pytest.fixture(scope='module')
+def yearly_series():
+    """Ein Jahr Werte im Abstand von 7 Stunden (alle Monate und Tageszeiten), mit Lücken."""
+    rng = np.random.default_rng(4)
+    index = pd.date_range('2024-01-01', '2024-12-31 23:00', freq='7h')
+    values = rng.uniform(-5, 35, len(index))
+    values[rng.random(len(index)) < 0.05] = np.nan
+    return pd.Series(values, index=index, name='Wassertemp. (0.5m)')
+
+
+SEASONAL_RULES = {'Wassertemp. (0.5m)': {
+    'winter': {'min': 0.0, 'max': 8.0},
+    'summer': {'min': 12, 'max': 30.5},
+    'spring': {'max': 22.0},            # Minimum aus der Standardregel
+}}                                      # Herbst: nur Standardregel
+
+
+@pytest.mark.parametrize('plausible_min, plausible_max', [(0.0, 28.0), (-2, 25), (None, 28.0), (0.0, None)])
+def test_seasonal_tables_match_reference(yearly_series, plausible_min, plausible_max):
+    expected_flags, expected_reasons = reference_validate_range(
+        yearly_series, plausible_min, plausible_max, yearly_series.name, SEASONAL_RULES)
+    flags, reasons = WaterQualityValidator().validate_range(
+        yearly_series, plausible_min, plausible_max, param_name=yearly_series.name, seasonal_rules=SEASONAL_RULES)
+    assert flags.tolist() == expected_flags.tolist()
+    assert reasons.tolist() == expected_reasons.tolist()
+
+
+@pytest.mark.parametrize('seasonal_rules', [None, {'pH': {'summer': {'max': 9.0}}}])
+def test_without_seasonal_rule_matches_reference(yearly_series, seasonal_rules):
+    expected_flags, expected_reasons = reference_validate_range(yearly_series, 0.0, 28.0, yearly_series.name,
+                                                                seasonal_rules)
+    flags, reasons = WaterQualityValidator().validate_range(yearly_series, 0.0, 28.0, param_name=yearly_series.name,
+                                                            seasonal_rules=seasonal_rules)
+    assert flags.tolist() == expected_flags.tolist()
+    assert reasons.tolist() == expected_reasons.tolist()
+    assert reasons.str.contains("Winter").sum() == 0
+
+
+def test_reason_codes_carry_season_and_threshold(yearly_series):
+    flags, mask = WaterQualityValidator().validate_range(
+        yearly_series, 0.0, 28.0, param_name=yearly_series.name, seasonal_rules=SEASONAL_RULES, as_codes=True)
+    texts = mask.render()
+    winter_high = (yearly_series.index.month == 1) & (yearly_series > 8.0).to_numpy()
+    assert (flags[winter_high] == QartodFlags.BAD).all()
+    assert (texts[winter_high] == "Wert > Max (8.0) (Winter)").all()
@@ -0,0 +1,169 @@
+# test_wamo_csv_reader.py
+"""
+Regressionstests des CSV-Einlesens (wamo_csv_reader.read_station_files).
+
+Referenz ist der frühere Weg aus main_pipeline.py: jede Datei komplett als Text lesen,
+aneinanderhängen, UTC-Versatz abschneiden, Kopfzeilen verwerfen, sortieren, in Zahlen
+umwandeln und die Spalten über das Mapping benennen. Die Testdateien haben die
+Kopfzeile des mitgelieferten WAMO-Exports.
+"""
+
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import wamo_csv_reader
+from metadata_mapper import map_columns_to_names
+from wamo_csv_reader import read_station_files
+
+SAMPLE_EXPORT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'wamo00019_24313817_Zusammenfassung_20250611.csv')
+
+
+@pytest.fixture(scope='module')
+def header():
+    with open(SAMPLE_EXPORT, encoding='utf-8-sig') as f:
+        return next(csv.reader(f))
+
+
+@pytest.fixture(scope='module')
+def column_mapping(header):
+    """Mapping wie aus den Metadaten: CSV-Spaltennummer (ab 1) -> Parameter, ohne Flag-Spalten."""
+    return {col: name for col, name in enumerate(header, start=1)
+            if col > 1 and not name.startswith('Flags')}
+
+
+@pytest.fixture(autouse=True)
+def serial_without_cache(monkeypatch):
+    """Ohne Zwischenspeicher und nacheinander; einzelne Tests schalten das um."""
+    monkeypatch.setitem(wamo_csv_reader.CSV_CACHE, 'enabled', False)
+    monkeypatch.setitem(wamo_csv_reader.CSV_INGEST, 'parse_workers', 1)
+
+
+def write_export(path, header, timestamps, seed, with_header=True):
+    """Schreibt einen Export: Messwerte mit drei Nachkommastellen, Flag-Spalten leer."""
+    rng = np.random.default_rng(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        if with_header:
+            writer.writerow(header)
+        for timestamp in timestamps:
+            writer.writerow([timestamp] + ['' if name.startswith('Flags') else f'{rng.uniform(0, 500):.3f}'
+                                           for name in header[1:]])
+    return str(path)
+
+
+def export_timestamps(start, hours):
+    """Zeitstempel im Exportformat (Ortszeit mit Versatz, z.B. 2025-06-11T00:00:00+0200)."""
+    index = pd.date_range(pd.Timestamp(start, tz='UTC'), periods=hours, freq='h').tz_convert('Europe/Berlin')
+    return [ts.strftime('%Y-%m-%dT%H:%M:%S%z') for ts in index]
+
+
+def reference_concat(station_files, column_mapping):
+    """Früherer Weg in main_pipeline.py; doppelte Zeitstempel wie 'last' (spätere Datei gewinnt)."""
+    frames = [pd.read_csv(f, sep=',', header=None, index_col=0, on_bad_lines='skip', encoding='utf-8-sig')
+              for f in sorted(station_files, key=os.path.basename)]
+    raw_data = pd.concat(frames)
+    raw_data.index = raw_data.index.str.replace(r'[+-]\d{4}$', '', regex=True)
+    raw_data = raw_data[~raw_data.index.str.contains('Timestamp', na=False)]
+    raw_data.index = pd.to_datetime(raw_data.index, errors='coerce')
+    raw_data = raw_data[raw_data.index.notna()].sort_index(kind='stable')
+    raw_data = raw_data[~raw_data.index.duplicated(keep='last')]
+    return map_columns_to_names(raw_data.apply(pd.to_numeric, errors='coerce'), column_mapping)
+
+
+def assert_same_data(expected, actual):
+    pd.testing.assert_frame_equal(actual, expected, check_names=False, check_freq=False)
+
+
+def test_daily_files_match_concat_path(tmp_path, header, column_mapping):
+    files = [write_export(tmp_path / f'wamo00019_Zusammenfassung_202506{day:02d}.csv', header,
+                          export_timestamps(f'2025-06-{day - 1:02d} 22:00', 24), seed=day)
+             for day in (12, 10, 11)]
+    data = read_station_files(files, column_mapping)
+    assert_same_data(reference_concat(files, column_mapping), data)
+    assert list(data.columns) == list(column_mapping.values())
+    assert data.index.tz is None and data.index[0] == pd.Timestamp('2025-06-10 00:00')
+
+
+def test_appended_exports_and_text_values_match_concat_path(tmp_path, header, column_mapping):
+    """Aneinandergehängte Exporte (Kopfzeile mitten in der Datei) und Text in einer Messwertspalte."""
+    appended = write_export(tmp_path / 'wamo00019_Zusammenfassung_20250610.csv', header,
+                            export_timestamps('2025-06-09 22:00', 12), seed=1)
+    second_export = write_export(tmp_path / 'export.part', header, export_timestamps('2025-06-10 10:00', 12), seed=2)
+    with open(appended, 'a', encoding='utf-8') as f, open(second_export, encoding='utf-8') as part:
+        f.write(part.read())
+    with_text = write_export(tmp_path / 'wamo00019_Zusammenfassung_20250611.csv', header,
+                             export_timestamps('2025-06-10 22:00', 24), seed=3)
+    with open(with_text, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    cells = lines[5].split(',')
+    cells[7] = 'Err'  # Trübung
+    lines[5] = ','.join(cells)
+    with open(with_text, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+    files = [appended, with_text]
+    data = read_station_files(files, column_mapping)
+    assert_same_data(reference_concat(files, column_mapping), data)
+    assert data['Trübung'].isna().sum() == 1
+
+
+@pytest.fixture
+def overlapping_files(tmp_path, header):
+    """Zwei Exporte, die sich um zwölf Stunden überlappen (erneut hochgeladener Zeitraum)."""
+    return [write_export(tmp_path / 'wamo00019_Zusammenfassung_20250611.csv', header,
+                         export_timestamps('2025-06-10 22:00', 24), seed=1),
+            write_export(tmp_path / 'wamo00019_Zusammenfassung_20250612.csv', header,
+                         export_timestamps('2025-06-11 10:00', 24), seed=2)]
+
+
+def test_duplicate_files_last_policy_matches_concat_path(tmp_path, header, column_mapping, overlapping_files):
+    # Dieselbe Datei ein zweites Mal unter anderem Namen
+    files = overlapping_files + [write_export(tmp_path / 'wamo00019_Zusammenfassung_20250611_kopie.csv', header,
+                                              export_timestamps('2025-06-10 22:00', 24), seed=1)]
+    data = read_station_files(files, column_mapping)
+    assert_same_data(reference_concat(files, column_mapping), data)
+    assert len(data) == 36 and data.index.is_unique
+
+
+def test_duplicate_mean_policy(monkeypatch, column_mapping, overlapping_files):
+    monkeypatch.setitem(wamo_csv_reader.CSV_INGEST, 'duplicates', 'mean')
+    first, second = (read_station_files([path], column_mapping) for path in overlapping_files)
+    expected = pd.concat([first, second]).groupby(level=0).mean()
+    assert_same_data(expected, read_station_files(overlapping_files, column_mapping))
+
+
+def test_duplicate_error_policy(monkeypatch, column_mapping, overlapping_files):
+    monkeypatch.setitem(wamo_csv_reader.CSV_INGEST, 'duplicates', 'error')
+    with pytest.raises(ValueError, match='12 doppelte Zeitstempel'):
+        read_station_files(overlapping_files, column_mapping)
+
+
+def test_parallel_read_matches_serial(monkeypatch, tmp_path, header, column_mapping):
+    files = [write_export(tmp_path / f'wamo00019_Zusammenfassung_202506{day:02d}.csv', header,
+                          export_timestamps(f'2025-06-{day - 1:02d} 10:00', 36), seed=day)
+             for day in range(10, 16)]
+    serial = read_station_files(files, column_mapping)
+    monkeypatch.setitem(wamo_csv_reader.CSV_INGEST, 'parse_workers', 2)
+    monkeypatch.setitem(wamo_csv_reader.CSV_INGEST, 'parallel_min_files', 2)
+    assert_same_data(serial, read_station_files(files, column_mapping))
+
+
+def test_repeated_october_hour_is_not_a_duplicate(tmp_path, header, column_mapping):
+    """02:00+0200 und 02:00+0100 sind verschiedene Zeitpunkte; nur echte Überlappung wird aufgelöst."""
+    # 00:00+0200 bis 02:00+0100 (UTC 22:00 bis 01:00) und 02:00+0100 bis 05:00+0100
+    files = [write_export(tmp_path / 'wamo00019_Zusammenfassung_20251026_a.csv', header,
+                          export_timestamps('2025-10-25 22:00', 4), seed=1),
+             write_export(tmp_path / 'wamo00019_Zusammenfassung_20251026_b.csv', header,
+                          export_timestamps('2025-10-26 01:00', 4), seed=2)]
+    first, second = (read_station_files([path], column_mapping) for path in files)
+    data = read_station_files(files, column_mapping)
+
+    assert len(data) == 7 and data.index.is_monotonic_increasing
+    assert (data.index == pd.Timestamp('2025-10-26 02:00')).sum() == 2
+    # Sommerzeit-Stunde aus der ersten Datei, Winterzeit-Stunde (doppelt) aus der späteren
+    assert_same_data(pd.concat([first.iloc[:3], second]), data)
@@ -1,5 +1,9 @@
 import pandas as pd
 import numpy as np
+from reason_codes import ReasonCodes, ReasonMask
+
+# Saison -> Index in reason_codes.SEASON_INFO
+SEASON_INDEX = {'winter': 1, 'spring': 2, 'summer': 3, 'autumn': 4}
 
 class QartodFlags:
     """Definiert die standardisierten QARTOD-Flag-Werte."""
@@ -60,7 +64,7 @@ class WaterQualityValidator:
         return final_flags, final_reasons
 
     def validate_range(self, series: pd.Series, plausible_min=None, plausible_max=None, 
-                      param_name=None, seasonal_rules=None):
+                      param_name=None, seasonal_rules=None, as_codes=False):
         """
         QARTOD Test: Bereichsprüfung - jetzt mit optionaler saisonaler Unterstützung.
         
@@ -70,58 +74,74 @@ class WaterQualityValidator:
             plausible_max: Standard-Maximum (kann durch saisonale Werte überschrieben werden)
             param_name: Name des Parameters (optional, für saisonale Regeln)
             seasonal_rules: Dictionary mit saisonalen Regeln (optional)
+            as_codes: Gründe als ReasonMask statt als Texte zurückgeben
         """
-        flags = pd.Series(QartodFlags.GOOD, index=series.index, dtype=int)
-        reasons = pd.Series("", index=series.index, dtype=str)
-        
-        # Wenn saisonale Regeln vorhanden sind und param_name angegeben
+        # Grenzwerte und Saison je Monat einmalig nachschlagen und über
+        # series.index.month verteilen (Tabellenplatz 0 = Standardwerte)
+        param_seasonal_rules = None
         if seasonal_rules and param_name and param_name in seasonal_rules:
-            # Verwende saisonale Validierung
-            for idx, value in series.items():
-                if pd.isna(value):
-                    flags[idx] = QartodFlags.MISSING
-                    reasons[idx] = "Fehlender Wert"
-                    continue
-                
-                # Bestimme Saison basierend auf dem Datum
-                if hasattr(idx, 'month'):
-                    season = self._get_season(idx.month)
-                    season_data = seasonal_rules[param_name].get(season, {})
-                    
-                    # Verwende saisonale Werte wenn vorhanden, sonst Standards
-                    min_val = season_data.get('min', plausible_min)
-                    max_val = season_data.get('max', plausible_max)
-                    season_info = f" ({self._get_season_name(season)})"
-                else:
-                    # Fallback auf Standard-Werte
-                    min_val = plausible_min
-                    max_val = plausible_max
-                    season_info = ""
-                
-                # Validierung
-                if max_val is not None and value > max_val:
-                    flags[idx] = QartodFlags.BAD
-                    reasons[idx] = f"Wert > Max ({max_val}){season_info}"
-                elif min_val is not None and value < min_val:
-                    flags[idx] = QartodFlags.BAD
-                    reasons[idx] = f"Wert < Min ({min_val}){season_info}"
+            param_seasonal_rules = seasonal_rules[param_name]
+        min_table, max_table, season_table, min_labels, max_labels = self._build_seasonal_tables(
+            param_seasonal_rules, plausible_min, plausible_max
+        )
+        if param_seasonal_rules is not None and hasattr(series.index, 'month'):
+            months = np.asarray(series.index.month)
         else:
-            # Normale Validierung ohne saisonale Anpassung (wie bisher)
-            if plausible_max is not None:
-                mask_high = series > plausible_max
-                flags[mask_high] = QartodFlags.BAD
-                reasons[mask_high] = f"Wert > Max ({plausible_max})"
-            
-            if plausible_min is not None:
-                mask_low = series < plausible_min
-                flags[mask_low] = QartodFlags.BAD
-                reasons[mask_low] = f"Wert < Min ({plausible_min})"
+            months = np.zeros(len(series), dtype=int)
+        
+        values = series.to_numpy(dtype=float)
+        mask_na = np.isnan(values)
+        with np.errstate(invalid='ignore'):
+            mask_high = ~mask_na & (values > max_table[months])
+            mask_low = ~mask_na & ~mask_high & (values < min_table[months])
+        
+        flag_values = np.full(len(series), QartodFlags.GOOD, dtype=int)
+        flag_values[mask_high | mask_low] = QartodFlags.BAD
+        flag_values[mask_na] = QartodFlags.MISSING
+        
+        reasons = ReasonMask(series.index)
+        reasons.add(mask_na, ReasonCodes.MISSING)
+        reasons.add(mask_high, ReasonCodes.RANGE_HIGH,
+                    threshold=max_labels[months[mask_high]], season=season_table[months[mask_high]])
+        reasons.add(mask_low, ReasonCodes.RANGE_LOW,
+                    threshold=min_labels[months[mask_low]], season=season_table[months[mask_low]])
+        
+        flags = pd.Series(flag_values, index=series.index, dtype=int)
+        return flags, (reasons if as_codes else reasons.render())
+    
+    def _build_seasonal_tables(self, param_seasonal_rules, plausible_min, plausible_max):
+        """
+        Baut monatsindizierte Nachschlagetabellen für Min/Max und die Saison
+        (Index in SEASON_INFO). Platz 0 enthält die Standardwerte (ohne Saisonangabe),
+        die Plätze 1-12 die saisonalen Werte mit Fallback auf die Standards.
+        Die Grenzwerte liegen zusätzlich als Text vor, wie sie in den Regeln stehen
+        (200.0 bleibt "200.0", 10 bleibt "10").
+        """
+        min_table = np.full(13, np.nan)
+        max_table = np.full(13, np.nan)
+        season_table = np.zeros(13, dtype=int)
+        min_labels = np.full(13, '', dtype=object)
+        max_labels = np.full(13, '', dtype=object)
+        
+        for month in range(13):
+            if month == 0 or param_seasonal_rules is None:
+                min_val, max_val = plausible_min, plausible_max
+            else:
+                season = self._get_season(month)
+                season_data = param_seasonal_rules.get(season, {})
+                min_val = season_data.get('min', plausible_min)
+                max_val = season_data.get('max', plausible_max)
+                season_table[month] = SEASON_INDEX[season]
             
-            mask_na = series.isna()
-            flags[mask_na] = QartodFlags.MISSING
-            reasons[mask_na] = "Fehlender Wert"
+            # None = keine Grenze (NaN-Vergleiche sind immer False)
+            if min_val is not None:
+                min_table[month] = min_val
+                min_labels[month] = str(min_val)
+            if max_val is not None:
+                max_table[month] = max_val
+                max_labels[month] = str(max_val)
         
-        return flags, reasons
+        return min_table, max_table, season_table, min_labels, max_labels
     
     def _get_season(self, month):
         """Bestimmt die Jahreszeit basierend auf dem Monat."""
@@ -133,13 +153,3 @@ class WaterQualityValidator:
             return 'summer'
         else:  # 9, 10, 11
             return 'autumn'
-    
-    def _get_season_name(self, season):
-        """Gibt den deutschen Namen der Jahreszeit zurück."""
-        season_names = {
-            'winter': 'Winter',
-            'spring': 'Frühling',
-            'summer': 'Sommer',
-            'autumn': 'Herbst'
-        }
-        return season_names.get(season, season)
\ No newline at end of file
@@ -0,0 +1,84 @@
+# validator_registry.py
+"""
+Register der optionalen Validierungs- und Ausgabemodule.
+
+Die Module werden erst beim ersten Zugriff importiert (importlib), nicht beim Import
+von main_pipeline.py. Läufe und Debugging-Skripte, die z.B. die multivariate
+Validierung nicht brauchen, laden damit weder pyod noch scikit-learn.
+Ob ein Modul verwendet wird, steuert VALIDATION_MODULES in config_file.py.
+
+Importzeiten messen: python benchmark_importtime.py
+"""
+
+import importlib
+import importlib.util
+from typing import Any, Dict, Optional, Tuple
+from config_file import VALIDATION_MODULES
+
+# Name -> (Modul, Attribut)
+VALIDATOR_PLUGINS: Dict[str, Tuple[str, str]] = {
+    'multivariate': ('multivariate_validator', 'check_multivariate_anomalies'),
+    'correlation': ('enhanced_correlation_validator', 'EnhancedCorrelationValidator'),
+    'agricultural': ('agricultural_runoff_detector', 'AgriculturalRunoffDetector'),
+    'regional': ('regional_config_mv', 'RegionalConfigMV'),
+    'dashboard': ('html_dashboard_generator', 'generate_html_dashboard'),
+}
+
+
+class ValidatorRegistry:
+    """
+    Löst Plugins bei Bedarf auf und merkt sich das Ergebnis (auch fehlgeschlagene Importe).
+    """
+
+    def __init__(self, plugins: Optional[Dict[str, Tuple[str, str]]] = None,
+                 enabled: Optional[Dict[str, bool]] = None):
+        self.plugins = dict(plugins or VALIDATOR_PLUGINS)
+        self.enabled = enabled if enabled is not None else VALIDATION_MODULES
+        self._resolved: Dict[str, Any] = {}
+
+    def register(self, name: str, module: str, attribute: str):
+        """Registriert ein weiteres Plugin (z.B. ein zusätzliches Validierungsmodul)."""
+        self.plugins[name] = (module, attribute)
+        self._resolved.pop(name, None)
+
+    def is_enabled(self, name: str) -> bool:
+        """In VALIDATION_MODULES aktiviert (nicht aufgeführte Plugins gelten als aktiv)."""
+        return name in self.plugins and self.enabled.get(name, True)
+
+    def is_available(self, name: str) -> bool:
+        """Aktiviert und Modul vorhanden - ohne es zu importieren."""
+        if not self.is_enabled(name):
+            return False
+        if name in self._resolved:
+            return self._resolved[name] is not None
+        return importlib.util.find_spec(self.plugins[name][0]) is not None
+
+    def get(self, name: str) -> Any:
+        """
+        Gibt das Plugin-Objekt zurück und importiert das Modul beim ersten Zugriff.
+
+        Returns:
+            Funktion/Klasse des Plugins oder None (deaktiviert oder nicht importierbar)
+        """
+        if not self.is_enabled(name):
+            return None
+        if name not in self._resolved:
+            module_name, attribute = self.plugins[name]
+            try:
+                self._resolved[name] = getattr(importlib.import_module(module_name), attribute)
+            except ImportError as e:
+                print(f"WARNUNG: {module_name} nicht verfügbar ({e}) - wird übersprungen")
+                self._resolved[name] = None
+        return self._resolved[name]
+
+    def status(self) -> Dict[str, bool]:
+        """Verfügbarkeit aller Plugins (für die Ausgabe der aktiven Module)."""
+        return {name: self.is_available(name) for name in self.plugins}
+
+    def loaded(self) -> Dict[str, bool]:
+        """Bisher tatsächlich importierte Plugins."""
+        return {name: value is not None for name, value in self._resolved.items()}
+
+
+# Gemeinsames Register für main_pipeline.py und die Debugging-Werkzeuge
+validators = ValidatorRegistry()
@@ -0,0 +1,248 @@
+# wamo_csv_reader.py
+"""
+Einlesen der WAMO-CSV-Exporte (wamo*_Zusammenfassung_*.csv) einer Station.
+
+Die Metadaten (create_column_mapping) legen fest, welche CSV-Spalten Messwerte
+enthalten. Gelesen werden nur der Zeitstempel und diese Spalten (usecols), die
+Messwerte direkt als Gleitkommazahlen; die 'Flags ...'-Spalten werden gar nicht erst
+geparst. Kopfzeilen - auch mitten in der Datei, wenn Exporte aneinandergehängt
+wurden - werden beim Parsen als fehlende Werte gelesen und mit den ungültigen
+Zeitstempeln verworfen. Zeitstempel im Format 2025-06-11T00:00:00+0200 werden über
+ein festes Format samt UTC-Versatz geparst und nach Europe/Berlin umgerechnet.
+Zusammenführen und Auflösen doppelter Zeitstempel geschehen zeitzonenbewusst; erst das
+Ergebnis erhält wieder einen Zeitindex in Ortszeit ohne Zeitzone. Die bei der Umstellung
+im Oktober wiederholte Stunde (02:00+0200 und 02:00+0100) bleibt so zweimal erhalten
+und wird nicht als Duplikat verworfen.
+
+Passt eine Datei nicht zu diesem Schema (z.B. Text in einer Messwertspalte), wird
+sie wie bisher generisch gelesen (alle Spalten als Text, danach konvertiert).
+
+Die Dateien einer Station (meist eine pro Tag) werden parallel in einem Prozess-Pool
+gelesen und die zeitlich sortierten Einzelergebnisse per k-Wege-Merge zusammengeführt.
+Doppelte Zeitstempel aus überlappenden Exporten werden nach CSV_INGEST['duplicates']
+aufgelöst: 'last' (spätere Datei gewinnt), 'mean' (Mittelwert) oder 'error' (Abbruch).
+
+Bereits eingelesene Dateien (gleicher Inhalt, gleiches Spalten-Mapping) werden aus dem
+Zwischenspeicher geladen statt geparst (CSV_CACHE, siehe raw_data_cache.py).
+"""
+
+import os
+import re
+import csv
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+from config_file import CSV_CACHE, CSV_INGEST
+import raw_data_cache
+from metadata_mapper import map_columns_to_names
+
+# Zeitstempel der WAMO-Exporte: Ortszeit mit UTC-Versatz
+TIMESTAMP_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[+-]\d{4}$')
+
+
+def read_station_files(station_files: List[str], column_mapping: Dict) -> pd.DataFrame:
+    """
+    Liest alle CSV-Dateien einer Station.
+
+    Die Dateien werden nach Namen sortiert (Exportdatum im Namen); "spätere Datei"
+    bezieht sich auf diese Reihenfolge.
+
+    Returns:
+        pd.DataFrame: Messwerte mit Parameternamen als Spalten und sortiertem Zeitindex
+                      (Ortszeit ohne Zeitzone; eindeutig bis auf die wiederholte Stunde
+                      der Zeitumstellung im Oktober)
+    """
+    station_files = sorted(station_files, key=os.path.basename)
+    workers = min(CSV_INGEST['parse_workers'] or os.cpu_count() or 1, len(station_files))
+    # Innerhalb eines Pool-Prozesses (main_pipeline.py --workers) keine weiteren Prozesse
+    if workers > 1 and len(station_files) >= CSV_INGEST['parallel_min_files'] \
+            and multiprocessing.parent_process() is None:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_read_sorted, station_files, [column_mapping] * len(station_files)))
+    else:
+        results = [_read_sorted(path, column_mapping) for path in station_files]
+    frames = [frame for frame, _ in results]
+    cached = sum(from_cache for _, from_cache in results)
+    if cached:
+        print(f"  - {cached} von {len(station_files)} CSV-Dateien aus dem Zwischenspeicher")
+    if CSV_CACHE['enabled']:
+        evicted = raw_data_cache.evict()
+        if evicted:
+            print(f"  - {evicted} alte Einträge aus dem CSV-Zwischenspeicher entfernt")
+
+    data = resolve_duplicates(merge_sorted_frames(frames), CSV_INGEST['duplicates'])
+    if cached and any(data is frame for frame in frames):
+        # Nur eine Datei mit Daten: der Frame verweist noch auf das schreibgeschützte Speicherabbild
+        data = data.copy()
+    data.index = _local_wall_time(data.index)
+    return data
+
+
+def _local_wall_time(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """Zeitzonenbewusster Index -> Ortszeit ohne Zeitzone (wie bisher von der Pipeline erwartet)."""
+    if index.tz is None:
+        return index
+    return index.tz_convert('Europe/Berlin').tz_localize(None)
+
+
+def _read_sorted(path: str, column_mapping: Dict) -> Tuple[pd.DataFrame, bool]:
+    """
+    Liest eine Datei - bevorzugt aus dem Zwischenspeicher - zeitlich stabil sortiert
+    (Eingabe für den k-Wege-Merge).
+
+    Returns:
+        (Frame, True wenn aus dem Zwischenspeicher)
+    """
+    entry = raw_data_cache.cache_path(path, column_mapping) if CSV_CACHE['enabled'] else None
+    if entry:
+        frame = raw_data_cache.load(entry)
+        if frame is not None:
+            return frame, True
+
+    frame = read_wamo_csv(path, column_mapping)
+    if not frame.index.is_monotonic_increasing:
+        frame = frame.sort_index(kind='stable')
+    if entry:
+        raw_data_cache.store(frame, entry)
+    return frame, False
+
+
+def merge_sorted_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    k-Wege-Merge zeitlich sortierter Frames als Turnier paarweiser Merges
+    (log2(k) Runden). Stabil: bei gleichem Zeitstempel bleibt die Dateireihenfolge erhalten.
+    """
+    if not frames:
+        return pd.DataFrame(index=pd.DatetimeIndex([]))
+    non_empty = [frame for frame in frames if len(frame)]
+    if not non_empty:
+        return pd.concat(frames)
+    frames = non_empty
+    while len(frames) > 1:
+        frames = [_merge_two(frames[i], frames[i + 1]) if i + 1 < len(frames) else frames[i]
+                  for i in range(0, len(frames), 2)]
+    return frames[0]
+
+
+def _merge_two(first: pd.DataFrame, second: pd.DataFrame) -> pd.DataFrame:
+    """Merge zweier sortierter Frames; `first` gewinnt bei Gleichstand die vordere Position."""
+    # Tagesdateien überlappen meist nicht: dann reicht das Aneinanderhängen
+    if first.index[-1] <= second.index[0]:
+        return pd.concat([first, second])
+    if second.index[-1] < first.index[0]:
+        return pd.concat([second, first])
+
+    # asi8: Nanosekunden seit der Epoche (bei Zeitzonen in UTC, also zeitlich richtig geordnet)
+    first_times, second_times = first.index.asi8, second.index.asi8
+    order = np.empty(len(first_times) + len(second_times), dtype=np.intp)
+    order[np.arange(len(first_times)) + np.searchsorted(second_times, first_times, side='left')] = \
+        np.arange(len(first_times))
+    order[np.arange(len(second_times)) + np.searchsorted(first_times, second_times, side='right')] = \
+        len(first_times) + np.arange(len(second_times))
+    return pd.concat([first, second]).iloc[order]
+
+
+def resolve_duplicates(data: pd.DataFrame, policy: str = 'last') -> pd.DataFrame:
+    """
+    Löst doppelte Zeitstempel auf (Eingabe zeitlich sortiert, stabil nach Dateireihenfolge).
+    Der Index ist zeitzonenbewusst: nur Zeilen desselben Zeitpunkts gelten als doppelt.
+
+    Args:
+        policy: 'last' (Zeile der späteren Datei), 'mean' (Mittelwert je Spalte) oder 'error'
+    """
+    duplicated = data.index.duplicated(keep='last')
+    if not duplicated.any():
+        return data
+
+    count = int(duplicated.sum())
+    if policy == 'error':
+        examples = ', '.join(str(ts) for ts in data.index[duplicated].unique()[:3])
+        raise ValueError(f"{count} doppelte Zeitstempel in den CSV-Dateien (z.B. {examples})")
+    print(f"  - {count} doppelte Zeitstempel aufgelöst (Richtlinie '{policy}')")
+    if policy == 'last':
+        return data[~duplicated]
+    if policy == 'mean':
+        return data.groupby(level=0, sort=False).mean()
+    raise ValueError(f"Unbekannte Richtlinie für doppelte Zeitstempel: {policy}")
+
+
+def read_wamo_csv(path: str, column_mapping: Dict) -> pd.DataFrame:
+    """Liest eine CSV-Datei, bevorzugt über das Schema aus den Metadaten."""
+    try:
+        return _read_with_schema(path, column_mapping)
+    except ValueError as e:
+        print(f"  - {os.path.basename(path)}: Einlesen über das Schema nicht möglich ({e}), lese generisch")
+        return _read_generic(path, column_mapping)
+
+
+def _read_with_schema(path: str, column_mapping: Dict) -> pd.DataFrame:
+    """Ein Durchlauf über die Datei: nur gemappte Spalten, typisiert, Kopfzeilen als NA."""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        first_row = next(csv.reader([f.readline()]), [])
+
+    # Spalte 1 der CSV ist der Zeitstempel; Mapping-Schlüssel sind CSV-Spaltennummern (ab 1).
+    # Gemappte Spalten, die der Export nicht enthält, werden wie bisher ignoriert.
+    positions = sorted(col - 1 for col in column_mapping if 1 < col <= len(first_row))
+
+    # Kopfzeile(n): die Spaltennamen der ersten Zeile gelten in jeder Spalte als fehlender Wert
+    na_values = {}
+    if first_row and 'Timestamp' in first_row[0]:
+        na_values = {pos: [first_row[pos]] for pos in positions if first_row[pos]}
+
+    frame = pd.read_csv(
+        path, sep=',', header=None, usecols=[0] + positions,
+        dtype={0: str, **{pos: CSV_INGEST['value_dtype'] for pos in positions}},
+        na_values=na_values, on_bad_lines='skip', encoding='utf-8-sig'
+    )
+    timestamps = frame.pop(0)
+    frame.index = _parse_timestamps(timestamps)
+    frame = frame[frame.index.notna()]
+    frame.columns = pd.Index([column_mapping[pos + 1] for pos in frame.columns], dtype=object)
+    return frame
+
+
+def _parse_timestamps(timestamps: pd.Series) -> pd.DatetimeIndex:
+    """
+    Zeitzonenbewusster Index (Europe/Berlin). Schneller Weg für das feste Exportformat
+    (festes Format mit Versatz), sonst Format erkennen lassen.
+    """
+    sample = timestamps.dropna()
+    sample = sample[~sample.str.contains('Timestamp', regex=False)]
+    if sample.empty or TIMESTAMP_PATTERN.match(sample.iloc[0]):
+        # utc=True: Sommer- und Winterzeit (+0200/+0100) in einer Datei
+        index = pd.to_datetime(timestamps, format=CSV_INGEST['timestamp_format'], utc=True, errors='coerce')
+        return pd.DatetimeIndex(index).tz_convert('Europe/Berlin')
+    if sample.str.contains(r'[+-]\d{2}:?\d{2}$|Z$', regex=True).all():
+        index = pd.to_datetime(timestamps, utc=True, errors='coerce')
+        return pd.DatetimeIndex(index).tz_convert('Europe/Berlin')
+    return _localize(pd.DatetimeIndex(pd.to_datetime(timestamps, errors='coerce')))
+
+
+def _localize(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """
+    Zeitstempel ohne Versatz gelten als Ortszeit. Die wiederholte Stunde im Oktober ist
+    dann nicht unterscheidbar und wird als Winterzeit gelesen (gleiche Zeitstempel bleiben
+    Duplikate); Zeitstempel in der übersprungenen Stunde im März werden vorgerückt.
+    """
+    if index.tz is not None:
+        return index.tz_convert('Europe/Berlin')
+    return index.tz_localize('Europe/Berlin', ambiguous=np.zeros(len(index), dtype=bool),
+                             nonexistent='shift_forward')
+
+
+def _read_generic(path: str, column_mapping: Dict) -> pd.DataFrame:
+    """Bisheriger Weg: alle Spalten als Text lesen, danach bereinigen und konvertieren."""
+    raw_data = pd.read_csv(path, sep=',', header=None, index_col=0, on_bad_lines='skip', encoding='utf-8-sig')
+
+    # Bereinige Header-Zeilen
+    if raw_data.index.dtype == 'object':
+        raw_data = raw_data[~raw_data.index.str.contains('Timestamp', na=False)]
+
+    # Zeitzonenbewusst in Ortszeit (wie _read_with_schema)
+    raw_data.index = _parse_timestamps(pd.Series(raw_data.index.astype(str), index=raw_data.index))
+    raw_data = raw_data[raw_data.index.notna()]
+
+    processed_data = raw_data.apply(pd.to_numeric, errors='coerce')
+    return map_columns_to_names(processed_data, column_mapping)
@@ -243,6 +243,103 @@ const createDatabaseTables = async () => {
             ON daily_aggregations(date);
         `);
 
+        // Zusammenführbare Tageszustände (Basis für daily_aggregations bei Teil-Uploads)
+        const createDailySketchesTable = `
+            CREATE TABLE IF NOT EXISTS daily_sketches (
+                station_id VARCHAR(50) NOT NULL,
+                date DATE NOT NULL,
+                parameter VARCHAR(100) NOT NULL,
+                
+                -- Zustand (nur GOOD-Werte gehen in Summen, Min/Max und Skizze ein)
+                value_count INTEGER NOT NULL,
+                value_sum DOUBLE PRECISION NOT NULL,
+                value_sum_sq DOUBLE PRECISION NOT NULL,
+                min_value DOUBLE PRECISION,
+                max_value DOUBLE PRECISION,
+                good_count INTEGER NOT NULL,
+                hour_mask INTEGER NOT NULL,
+                reasons JSONB,
+                quantile_sketch JSONB,
+                -- Stundenwerte des Tages (Wert, Flag, Grund): erlauben das Ersetzen neu
+                -- validierter Stunden und die Konsolidierung mit der Pipeline-Strategie
+                hourly_slots JSONB,
+                
+                updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (station_id, date, parameter)
+            );
+        `;
+        await client.query(createDailySketchesTable);
+        await client.query(`ALTER TABLE daily_sketches ADD COLUMN IF NOT EXISTS hourly_slots JSONB;`);
+        console.log('Tabelle "daily_sketches" erfolgreich geprüft/erstellt.');
+
+        // Wochen-, Monats- und Badesaison-Aggregate (aus daily_sketches fortgeschrieben)
+        const createPeriodRollupsTable = `
+            CREATE TABLE IF NOT EXISTS period_rollups (
+                station_id VARCHAR(50) NOT NULL,
+                period_type VARCHAR(20) NOT NULL,
+                period_start DATE NOT NULL,
+                parameter VARCHAR(100) NOT NULL,
+                
+                -- Zustand
+                value_count INTEGER NOT NULL,
+                value_sum DOUBLE PRECISION NOT NULL,
+                value_sum_sq DOUBLE PRECISION NOT NULL,
+                min_value DOUBLE PRECISION,
+                max_value DOUBLE PRECISION,
+                good_count INTEGER NOT NULL,
+                quantile_sketch JSONB,
+                
+                -- Abgeleitete Kennwerte
+                mean_value DOUBLE PRECISION,
+                median_value DOUBLE PRECISION,
+                std_dev DOUBLE PRECISION,
+                good_values_percentage NUMERIC,
+                aggregated_flag INTEGER,
+                
+                updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (station_id, period_type, period_start, parameter)
+            );
+        `;
+        await client.query(createPeriodRollupsTable);
+        console.log('Tabelle "period_rollups" erfolgreich geprüft/erstellt.');
+
+        // Versionsstempel der Pipeline-Konfiguration: die Python-Pipeline lädt ihre
+        // zwischengespeicherte Konfiguration nur neu, wenn sich die Version geändert hat
+        const createConfigVersionTable = `
+            CREATE TABLE IF NOT EXISTS config_version (
+                id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+                version BIGINT NOT NULL DEFAULT 1,
+                changed_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+            );
+        `;
+        await client.query(createConfigVersionTable);
+        await client.query('INSERT INTO config_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING');
+        await client.query(`
+            CREATE OR REPLACE FUNCTION bump_config_version() RETURNS trigger AS $$
+            BEGIN
+                UPDATE config_version SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE id = 1;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        `);
+        // Jede Änderung an einer Konfigurationstabelle (auch über den Admin-PUT-Endpunkt
+        // oder die Migration) erhöht die Version - nur für Tabellen, die existieren
+        await client.query(`
+            DO $$
+            DECLARE config_table TEXT;
+            BEGIN
+                FOREACH config_table IN ARRAY ARRAY['parameters', 'stations', 'station_coordinates',
+                        'station_catchment_areas', 'station_data_status', 'config_rules', 'validation_parameters'] LOOP
+                    IF to_regclass(config_table) IS NOT NULL THEN
+                        EXECUTE format('DROP TRIGGER IF EXISTS trg_config_version ON %I', config_table);
+                        EXECUTE format('CREATE TRIGGER trg_config_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+                                       'FOR EACH STATEMENT EXECUTE PROCEDURE bump_config_version()', config_table);
+                    END IF;
+                END LOOP;
+            END $$;
+        `);
+        console.log('Tabelle "config_version" erfolgreich geprüft/erstellt.');
+
         // OPTIONAL: View für einfachen Zugriff auf die neuesten Tageswerte
         const createLatestDailyView = `
             CREATE OR REPLACE VIEW latest_daily_values AS
@@ -518,16 +615,23 @@ const saveValidationData = async (resultData, sourceFile, stationId = null, hour
 
         const actualStationId = stationId || 'wamo_placeholder';
 
-        // 1. Validierungslauf erstellen
-        const runResult = await client.query(
-            'INSERT INTO validation_runs (station_id, source_zip_file) VALUES ($1, $2) RETURNING run_id',
-            [actualStationId, sourceFile]
-        );
-        const runId = runResult.rows[0].run_id;
-        console.log(`Neuer Validierungslauf mit ID ${runId} für Station ${actualStationId} erstellt.`);
+        // 1. Validierungslauf: von der Python-Pipeline angelegt (sie hat die Stundenwerte
+        //    bereits per COPY geladen) oder - im Rückfall - hier erstellen
+        const pipelineRunId = extendedData ? extendedData.validation_run_id : null;
+        let runId = pipelineRunId;
+        if (pipelineRunId) {
+            console.log(`Übernehme Validierungslauf ${runId} der Pipeline für Station ${actualStationId}.`);
+        } else {
+            const runResult = await client.query(
+                'INSERT INTO validation_runs (station_id, source_zip_file) VALUES ($1, $2) RETURNING run_id',
+                [actualStationId, sourceFile]
+            );
+            runId = runResult.rows[0].run_id;
+            console.log(`Neuer Validierungslauf mit ID ${runId} für Station ${actualStationId} erstellt.`);
+        }
 
-        // 2. Stundenwerte speichern (wenn vorhanden)
-        if (hourlyDataPath && fs.existsSync(hourlyDataPath)) {
+        // 2. Stundenwerte speichern (nur Rückfall: Pipeline ohne Datenbankverbindung)
+        if (!pipelineRunId && hourlyDataPath && fs.existsSync(hourlyDataPath)) {
             console.log('Lade und speichere Stundenwerte...');
             const hourlyData = JSON.parse(fs.readFileSync(hourlyDataPath, 'utf-8'));
             await saveHourlyMeasurements(hourlyData, runId, client);
@@ -8,6 +8,7 @@ const path = require('path');
 const fs = require('fs');
 const multer = require('multer');
 const { spawn } = require('child_process');
+const net = require('net');
 const { v4: uuidv4 } = require('uuid');
 const nodemailer = require('nodemailer');
 require('dotenv').config();
@@ -1193,6 +1194,76 @@ const storage = multer.diskStorage({
 });
 const upload = multer({ storage: storage });
 
+// Dauerhafter Pipeline-Worker (main_pipeline.py --serve): hält Bibliotheken, Konfiguration
+// und Modelle warm. Läuft keiner, wird wie bisher pro Upload ein Python-Prozess gestartet.
+const PIPELINE_SOCKET = process.env.PIPELINE_SOCKET || path.resolve(__dirname, 'daten_pipeline', 'pipeline_worker.sock');
+
+// Antwortet der Worker nicht innerhalb von ACCEPT_TIMEOUT, läuft der Upload über einen eigenen
+// Python-Prozess; ein angenommener Auftrag wird nach JOB_TIMEOUT als fehlgeschlagen gemeldet.
+const PIPELINE_WORKER_ACCEPT_TIMEOUT_MS = Number(process.env.PIPELINE_WORKER_ACCEPT_TIMEOUT_MS) || 5000;
+const PIPELINE_WORKER_JOB_TIMEOUT_MS = Number(process.env.PIPELINE_WORKER_JOB_TIMEOUT_MS) || 30 * 60 * 1000;
+
+// connected: false -> Auftrag wurde nicht angenommen (kein Worker, belegt, keine Antwort),
+// der Aufrufer startet dann einen eigenen Python-Prozess
+const runPipelineInWorker = (job, onLine) => new Promise((resolve, reject) => {
+    const socket = net.createConnection(PIPELINE_SOCKET);
+    let connected = false;
+    let accepted = false;
+    let buffer = '';
+    let result = null;
+
+    const fail = (reason) => {
+        clearTimeout(acceptTimer);
+        clearTimeout(jobTimer);
+        socket.destroy();
+        reject(reason);
+    };
+    const acceptTimer = setTimeout(() => fail({
+        connected: false, error: new Error(`Pipeline-Worker hat den Auftrag nicht innerhalb von ${PIPELINE_WORKER_ACCEPT_TIMEOUT_MS} ms angenommen.`)
+    }), PIPELINE_WORKER_ACCEPT_TIMEOUT_MS);
+    let jobTimer = null;
+
+    socket.setEncoding('utf8');
+    socket.on('connect', () => {
+        connected = true;
+        socket.write(JSON.stringify(job) + '\n');
+    });
+    socket.on('data', (chunk) => {
+        buffer += chunk;
+        let newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+            const line = buffer.slice(0, newline);
+            buffer = buffer.slice(newline + 1);
+            if (!line.trim()) continue;
+            const message = JSON.parse(line);
+            if (message.type === 'accepted') {
+                accepted = true;
+                clearTimeout(acceptTimer);
+                jobTimer = setTimeout(() => fail({
+                    connected: true, error: new Error(`Pipeline-Worker hat nach ${PIPELINE_WORKER_JOB_TIMEOUT_MS} ms kein Ergebnis geliefert.`)
+                }), PIPELINE_WORKER_JOB_TIMEOUT_MS);
+            } else if (message.type === 'log') {
+                onLine(message.line);
+            } else if (message.type === 'result') {
+                if (message.status === 'busy') {
+                    return fail({ connected: false, error: new Error(message.message) });
+                }
+                result = message;
+            }
+        }
+    });
+    socket.on('error', (err) => fail({ connected: connected && accepted, error: err }));
+    socket.on('close', () => {
+        clearTimeout(acceptTimer);
+        clearTimeout(jobTimer);
+        if (result) {
+            resolve(result);
+        } else {
+            reject({ connected: connected && accepted, error: new Error('Verbindung zum Pipeline-Worker ohne Ergebnis beendet.') });
+        }
+    });
+});
+
 app.post('/api/validate-data-zip', upload.single('file'), async (req, res) => {
     console.log('API-Endpunkt /api/validate-data-zip aufgerufen.');
 
@@ -1285,23 +1356,52 @@ app.post('/api/validate-data-zip', upload.single('file'), async (req, res) => {
             return res.status(500).json({ message: `Haupt-Pipeline-Skript nicht gefunden: ${pythonScriptPath}` });
         }
         
-        // 4. Jetzt die Promise starten
-        const executionPromise = new Promise((resolve, reject) => {
+        const statusLog = [];
+        const handlePythonOutput = (output) => {
+            console.log(`[PYTHON STDOUT]:`, output);
+            if (output.startsWith('STATUS_UPDATE:')) {
+                statusLog.push(output.replace('STATUS_UPDATE:', ''));
+            }
+        };
+
+        // 4a. Zuerst den laufenden Pipeline-Worker versuchen
+        let workerUsed = false;
+        if (fs.existsSync(PIPELINE_SOCKET)) {
+            try {
+                const workerResult = await runPipelineInWorker({
+                    input_dir: inputDir,
+                    output_dir: outputDir,
+                    metadata_path: metadataPath,
+                    source_file: req.file.originalname
+                }, (line) => handlePythonOutput(line.trim()));
+                if (workerResult.status !== 'ok') {
+                    throw { message: 'Fehler bei der Ausführung der Python-Pipeline.', error: workerResult.message };
+                }
+                workerUsed = true;
+            } catch (err) {
+                if (err.connected === false) {
+                    console.warn(`Pipeline-Worker nicht verfügbar (${err.error.message}), starte Python-Prozess.`);
+                } else if (err.connected) {
+                    throw { message: 'Verbindung zum Pipeline-Worker abgebrochen.', error: err.error.message };
+                } else {
+                    throw err;
+                }
+            }
+        }
+
+        // 4b. Sonst: Jetzt die Promise starten
+        const executionPromise = workerUsed ? Promise.resolve(statusLog) : new Promise((resolve, reject) => {
             const pythonProcess = spawn(pythonExecutable, [
-                pythonScriptPath, '--input-dir', inputDir, '--output-dir', outputDir, '--metadata-path', metadataPath
+                pythonScriptPath, '--input-dir', inputDir, '--output-dir', outputDir, '--metadata-path', metadataPath,
+                '--source-file', req.file.originalname
             ], {
                 // Diese Option zwingt Python, UTF-8 zu verwenden, was den Fehler behebt.
                 env: { ...process.env, PYTHONIOENCODING: 'UTF-8' }
             });
-            const statusLog = [];
             let pythonError = '';
 
             pythonProcess.stdout.on('data', (data) => {
-                const output = data.toString().trim();
-                console.log(`[PYTHON STDOUT]:`, output);
-                if (output.startsWith('STATUS_UPDATE:')) {
-                    statusLog.push(output.replace('STATUS_UPDATE:', ''));
-                }
+                handlePythonOutput(data.toString().trim());
             });
             pythonProcess.stderr.on('data', (data) => {
                 pythonError += data.toString().trim() + "\n";